@@ -0,0 +1,105 @@
+"""
+Capabilities - One-time probe of the external tools the agents shell out to
+"""
+import time
+import shutil
+import asyncio
+from typing import Dict, List, Optional
+
+from .metrics import get_metrics
+
+
+# Tool -> command that prints its version
+TOOLS: Dict[str, List[str]] = {
+    "git": ["git", "--version"],
+    "pylint": ["pylint", "--version"],
+    "eslint": ["eslint", "--version"],
+    "pytest": ["pytest", "--version"],
+    "npm": ["npm", "--version"],
+    "go": ["go", "version"],
+    "cargo": ["cargo", "--version"],
+}
+
+PROBE_TIMEOUT = 15
+
+
+class Capabilities:
+    """
+    Which linters, test runners and git the host has, and their versions.
+    Each tool is checked once per process (the server probes at startup)
+    and every run reads the cached answer instead of spawning its own
+    check. Tools that have not been probed yet count as available, so
+    callers fall back to trying them.
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, Dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def probe(self) -> Dict[str, Dict]:
+        """Check every known tool (concurrently) and return the results"""
+        await asyncio.gather(*(self.check(tool) for tool in TOOLS))
+        return self.tools
+
+    async def check(self, tool: str) -> Dict:
+        """Probe `tool` unless it already was; concurrent callers share one probe"""
+        if tool in self.tools:
+            return self.tools[tool]
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+        if tool not in self._pending:
+            self._pending[tool] = asyncio.create_task(self._probe_tool(tool), name=f"probe.{tool}")
+        return await asyncio.shield(self._pending[tool])
+
+    def has(self, tool: str) -> bool:
+        """False only when the tool was probed and is missing"""
+        result = self.tools.get(tool)
+        return result is None or result["available"]
+
+    async def _probe_tool(self, tool: str) -> Dict:
+        command = TOOLS[tool]
+        path = shutil.which(command[0])
+        result = {"available": False, "version": None, "path": path}
+        if path:
+            try:
+                async with get_metrics().subprocess_span("capabilities", " ".join(command)):
+                    process = await asyncio.create_subprocess_exec(
+                        path, *command[1:],
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT
+                    )
+                    try:
+                        stdout, _ = await asyncio.wait_for(process.communicate(), PROBE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        process.kill()
+                        await process.wait()
+                        raise
+                output = stdout.decode('utf-8', 'replace').strip()
+                result["available"] = process.returncode == 0
+                result["version"] = output.splitlines()[0][:200] if output else None
+            except (OSError, asyncio.TimeoutError) as e:
+                result["error"] = str(e) or type(e).__name__
+        result["probed_at"] = time.time()
+        self.tools[tool] = result
+        self._pending.pop(tool, None)
+        return result
+
+    def get_stats(self) -> Dict:
+        return {
+            tool: {k: v for k, v in result.items() if k != "probed_at"}
+            for tool, result in sorted(self.tools.items())
+        }
+
+
+_capabilities: Optional[Capabilities] = None
+
+
+def get_capabilities() -> Capabilities:
+    """Return the process-wide capability cache"""
+    global _capabilities
+    if _capabilities is None:
+        _capabilities = Capabilities()
+    return _capabilities
@@ -0,0 +1,72 @@
+"""
+Checkpoint Store - Persists run progress so interrupted runs can resume
+"""
+import os
+import json
+import tempfile
+from typing import Dict, List, Optional
+
+
+def default_checkpoint_dir() -> str:
+    return os.getenv("RIFT_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "rift_checkpoints"))
+
+
+class CheckpointStore:
+    """
+    One JSON file per unfinished run, rewritten after every stage. A run's
+    file is removed once it finalizes, so whatever is left on startup
+    belongs to runs the process was killed in the middle of.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or default_checkpoint_dir()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def save(self, run_id: str, checkpoint: Dict):
+        # Write-then-rename so a crash mid-write keeps the previous checkpoint
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(checkpoint, f)
+            os.replace(temp_path, self._path(run_id))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Failed to write checkpoint for {run_id}: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(run_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, run_id: str):
+        try:
+            os.unlink(self._path(run_id))
+        except FileNotFoundError:
+            pass
+
+    def pending(self) -> List[Dict]:
+        """Checkpoints of every run that did not finish"""
+        checkpoints = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".json"):
+                checkpoint = self.load(name[:-len(".json")])
+                if checkpoint:
+                    checkpoints.append(checkpoint)
+        return checkpoints
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.json")
+
+
+_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the process-wide checkpoint store"""
+    global _store
+    if _store is None:
+        _store = CheckpointStore()
+    return _store
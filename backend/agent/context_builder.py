@@ -0,0 +1,247 @@
+"""
+Context Builder - Selects the code sent to the model for a fix, within a token budget
+"""
+import ast
+import os
+import re
+from typing import List, Optional, Set, Tuple
+
+
+# Default prompt budget for code context, in estimated tokens
+DEFAULT_TOKEN_BUDGET = 2000
+
+IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Definition lines for brace-based languages (JS/TS/Java/Go/Rust)
+DEFINITION = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?'
+    r'(?:public\s+|private\s+|protected\s+|static\s+|final\s+|abstract\s+)*'
+    r'(?:function\*?|class|interface|struct|enum|impl|trait|func|fn|def|const|let|var|type)\s+'
+    r'(?:\([^)]*\)\s*)?([A-Za-z_$][\w$]*)'
+)
+IMPORT_LINE = re.compile(r'^\s*(?:import\b|from\s+\S+\s+import\b|use\s|#include\b|.*\brequire\s*\()')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class FixContext:
+    """The code selected for a prompt"""
+
+    def __init__(self, text: str, line_numbers: List[int], total_lines: int):
+        self.text = text
+        self.line_numbers = line_numbers
+        self.total_lines = total_lines
+        self.tokens = estimate_tokens(text)
+
+    @property
+    def start_line(self) -> int:
+        return self.line_numbers[0] if self.line_numbers else 0
+
+    @property
+    def end_line(self) -> int:
+        return self.line_numbers[-1] if self.line_numbers else 0
+
+
+class ContextBuilder:
+    """
+    Builds prompt context around an issue: the enclosing function or class,
+    the imports it uses and the signatures of other symbols it references,
+    trimmed to fit a token budget.
+    """
+
+    def __init__(self, token_budget: int = None):
+        if token_budget is None:
+            token_budget = int(os.getenv("FIXER_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+        self.token_budget = token_budget
+
+    def build(self, file_content: str, file_path: str, line: int) -> FixContext:
+        """Select numbered context lines for an issue at 1-based `line`"""
+        lines = file_content.split('\n')
+        if not lines:
+            return FixContext("", [], 0)
+        line = min(max(line, 1), len(lines))
+
+        tree = self._parse_python(file_content) if file_path.endswith('.py') else None
+        if tree is not None:
+            block = self._python_block(tree, line)
+            imports = self._python_imports(tree)
+            definitions = self._python_definitions(tree)
+        else:
+            block = self._brace_block(lines, line)
+            imports = self._generic_imports(lines)
+            definitions = self._generic_definitions(lines)
+
+        budget = self.token_budget
+        selected: Set[int] = set()
+
+        # 1. The enclosing block, or a window around the issue if it is too big
+        start, end = max(1, block[0]), min(len(lines), block[1])
+        start, end = self._fit_window(lines, start, end, line, budget)
+        selected.update(range(start, end + 1))
+        budget -= self._cost(lines, range(start, end + 1))
+
+        referenced = self._identifiers(lines, start, end)
+
+        # 2. Imports that bind names used in the block
+        for import_range, names in imports:
+            if budget <= 0:
+                break
+            if names and not names & referenced:
+                continue
+            cost = self._cost(lines, import_range)
+            if cost <= budget:
+                selected.update(import_range)
+                budget -= cost
+
+        # 3. Signatures of other symbols defined in this file that the block references
+        for name, signature_range in definitions:
+            if budget <= 0:
+                break
+            if name not in referenced or signature_range[0] in selected:
+                continue
+            cost = self._cost(lines, signature_range)
+            if cost <= budget:
+                selected.update(signature_range)
+                budget -= cost
+
+        numbers = sorted(selected)
+        return FixContext(self._render(lines, numbers), numbers, len(lines))
+
+    def _fit_window(self, lines: List[str], start: int, end: int, line: int,
+                    budget: int) -> Tuple[int, int]:
+        """Shrink [start, end] around `line` until it fits the budget"""
+        if self._cost(lines, range(start, end + 1)) <= budget:
+            return start, end
+
+        start = end = line
+        spent = self._cost(lines, [line])
+        while True:
+            grew = False
+            for candidate in (start - 1, end + 1):
+                if candidate < 1 or candidate > len(lines):
+                    continue
+                cost = self._cost(lines, [candidate])
+                if spent + cost > budget:
+                    continue
+                spent += cost
+                if candidate < start:
+                    start = candidate
+                else:
+                    end = candidate
+                grew = True
+            if not grew:
+                return start, end
+
+    def _cost(self, lines: List[str], numbers) -> int:
+        # Each rendered line carries a ~7 character number prefix
+        return sum(len(lines[n - 1]) + 8 for n in numbers) // 4
+
+    def _render(self, lines: List[str], numbers: List[int]) -> str:
+        rendered = []
+        previous = None
+        for number in numbers:
+            if previous is not None and number != previous + 1:
+                rendered.append("  ...")
+            rendered.append(f"{number:>5}| {lines[number - 1]}")
+            previous = number
+        return '\n'.join(rendered)
+
+    def _identifiers(self, lines: List[str], start: int, end: int) -> Set[str]:
+        return set(IDENTIFIER.findall('\n'.join(lines[start - 1:end])))
+
+    # Python: use the AST when the file parses
+
+    def _parse_python(self, content: str) -> Optional[ast.AST]:
+        try:
+            return ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+
+    def _python_block(self, tree: ast.AST, line: int) -> Tuple[int, int]:
+        """Innermost function or class containing `line`"""
+        best = None
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            end = node.end_lineno or node.lineno
+            if start <= line <= end and (best is None or end - start < best[1] - best[0]):
+                best = (start, end)
+        return best or (max(1, line - 10), line + 10)
+
+    def _python_imports(self, tree: ast.AST) -> List[Tuple[range, Set[str]]]:
+        imports = []
+        for node in tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                names = {
+                    (alias.asname or alias.name).split('.')[0]
+                    for alias in node.names if alias.name != '*'
+                }
+                imports.append((range(node.lineno, (node.end_lineno or node.lineno) + 1), names))
+        return imports
+
+    def _python_definitions(self, tree: ast.AST) -> List[Tuple[str, range]]:
+        definitions = []
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                # Signature runs from the def line to the line before the body
+                body_start = node.body[0].lineno if node.body else node.lineno
+                end = max(node.lineno, body_start - 1)
+                definitions.append((node.name, range(node.lineno, end + 1)))
+        return definitions
+
+    # Other languages: brace and indentation heuristics
+
+    def _brace_block(self, lines: List[str], line: int) -> Tuple[int, int]:
+        """Nearest definition above `line` whose braces enclose it"""
+        for start in range(line, 0, -1):
+            if not DEFINITION.match(lines[start - 1]):
+                continue
+            end = self._block_end(lines, start)
+            if end is not None and end >= line:
+                return start, end
+        return max(1, line - 10), min(len(lines), line + 10)
+
+    def _block_end(self, lines: List[str], start: int) -> Optional[int]:
+        depth = 0
+        opened = False
+        for number in range(start, len(lines) + 1):
+            text = lines[number - 1]
+            depth += text.count('{') - text.count('}')
+            if '{' in text:
+                opened = True
+            if opened and depth <= 0:
+                return number
+        return None
+
+    def _generic_imports(self, lines: List[str]) -> List[Tuple[range, Set[str]]]:
+        imports = []
+        in_go_block = False
+        for number, text in enumerate(lines, 1):
+            stripped = text.strip()
+            if in_go_block:
+                imports.append((range(number, number + 1), set()))
+                if stripped.startswith(')'):
+                    in_go_block = False
+                continue
+            if stripped == 'import (':
+                in_go_block = True
+                imports.append((range(number, number + 1), set()))
+            elif IMPORT_LINE.match(text):
+                names = set(IDENTIFIER.findall(stripped.split(' from ')[0])) - {
+                    'import', 'from', 'require', 'const', 'let', 'var', 'as', 'use', 'type'
+                }
+                imports.append((range(number, number + 1), names))
+        return imports
+
+    def _generic_definitions(self, lines: List[str]) -> List[Tuple[str, range]]:
+        definitions = []
+        for number, text in enumerate(lines, 1):
+            match = DEFINITION.match(text)
+            if match:
+                definitions.append((match.group(1), range(number, number + 1)))
+        return definitions
+
@@ -0,0 +1,513 @@
+"""
+Dependency Cache - Content-addressed node_modules / virtualenv cache for test runs
+"""
+import os
+import sys
+import json
+import time
+import re
+import shlex
+import shutil
+import asyncio
+import hashlib
+import platform
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .test_cache import default_cache_dir
+from .metrics import get_metrics
+
+
+NODE_LOCKFILES = [
+    ("package-lock.json", "npm ci --prefer-offline --no-audit --no-fund"),
+    ("npm-shrinkwrap.json", "npm ci --prefer-offline --no-audit --no-fund"),
+    ("yarn.lock", "yarn install --frozen-lockfile --prefer-offline"),
+    ("pnpm-lock.yaml", "pnpm install --frozen-lockfile --prefer-offline"),
+]
+PYTHON_REQUIREMENTS = ("requirements.txt", "requirements-dev.txt", "requirements-test.txt",
+                       "requirements_dev.txt", "requirements_test.txt", "dev-requirements.txt",
+                       "test-requirements.txt")
+COMPLETE_MARKER = ".rift-complete"
+# Per-workspace venv layered over the cached one, for requirements that point into the workspace
+WORKSPACE_VENV = ".rift-venv"
+
+
+class DependencyCache:
+    """
+    Prepares test dependencies for a workspace. Each environment is keyed by
+    a hash of the lockfiles that define it and built once; later workspaces
+    with the same lockfiles restore it without touching the network.
+
+    node_modules is restored into the workspace as a copy-on-write clone
+    where the filesystem supports it, otherwise as a full copy, so tests
+    and install scripts that write into it cannot alter the cache.
+    Virtualenvs embed absolute paths and cannot be moved, so the cached
+    venv is used in place by putting its bin directory first on PATH.
+    Requirements that point into the workspace (`-e .`, `./libs/foo`) are
+    left out of it: they go into a small venv inside the workspace that
+    sees the cached packages through a .pth file, reinstalled before
+    every test run so the code under test is the code being fixed.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "deps")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.install_timeout = float(os.getenv("DEPS_INSTALL_TIMEOUT", 900))
+
+    async def prepare(self, repo_dir: str) -> Dict:
+        """
+        Make dependencies available to tests in `repo_dir`. Returns
+        {"env": extra environment variables, "steps": [per-ecosystem status]}.
+        """
+        env: Dict[str, str] = {}
+        steps: List[Dict] = []
+
+        node = self._node_spec(repo_dir)
+        if node:
+            steps.append(await self._prepare_node(repo_dir, *node))
+
+        python = self._python_spec(repo_dir)
+        if python:
+            key, requirements, local = python
+            step, venv_dir = await self._prepare_python(repo_dir, key, requirements)
+            steps.append(step)
+            if venv_dir and local:
+                step, venv_dir = await self._prepare_workspace_python(repo_dir, venv_dir, local)
+                steps.append(step)
+            if venv_dir:
+                env["VIRTUAL_ENV"] = venv_dir
+                env["PATH"] = os.path.join(venv_dir, "bin") + os.pathsep + os.environ.get("PATH", "")
+
+        return {"env": env, "steps": steps}
+
+    def environment_key(self, repo_dir: str) -> str:
+        """Hash of the cache keys `prepare` would use; changes whenever the installed dependencies would"""
+        node = self._node_spec(repo_dir)
+        python = self._python_spec(repo_dir)
+        keys = [node[0] if node else "", python[0] if python else ""]
+        return hashlib.sha256("\0".join(keys).encode('utf-8')).hexdigest()[:32]
+
+    # Node
+
+    def _node_spec(self, repo_dir: str) -> Optional[Tuple[str, str]]:
+        """(cache key, install command) for a JS project, or None"""
+        if not os.path.exists(os.path.join(repo_dir, "package.json")):
+            return None
+        for lockfile, command in NODE_LOCKFILES:
+            path = os.path.join(repo_dir, lockfile)
+            if os.path.exists(path):
+                return _hash_files("node", lockfile, [path]), command
+        # No lockfile: key on the manifest itself. Do not write one either, or
+        # it would be committed with the fixes and change the tree hash
+        return _hash_files("node", "package.json", [os.path.join(repo_dir, "package.json")]), \
+            "npm install --no-package-lock --prefer-offline --no-audit --no-fund"
+
+    async def _prepare_node(self, repo_dir: str, key: str, command: str) -> Dict:
+        started = time.time()
+        target = os.path.join(repo_dir, "node_modules")
+        entry = os.path.join(self.cache_dir, f"node-{key}")
+        cached = os.path.join(entry, "node_modules")
+
+        if os.path.exists(target):
+            return _step("node", "present", started, key)
+
+        if not os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+            async with EntryLock(entry):
+                if not os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+                    ok, output = await self._run(command, repo_dir)
+                    if not ok:
+                        return _step("node", "failed", started, key, output)
+                    _exclude_from_git(repo_dir, "/node_modules/")
+                    if os.path.exists(target):
+                        shutil.rmtree(cached, ignore_errors=True)
+                        await self._clone_tree(target, cached)
+                        _mark_complete(entry)
+                    return _step("node", "miss", started, key)
+
+        await self._clone_tree(cached, target)
+        _exclude_from_git(repo_dir, "/node_modules/")
+        return _step("node", "hit", started, key)
+
+    # Python
+
+    def _python_spec(self, repo_dir: str) -> Optional[Tuple[str, List[str], List[str]]]:
+        """
+        (cache key, requirement lines for the cached venv, workspace-local
+        requirement lines) for a Python project, or None
+        """
+        requirements = [
+            os.path.join(repo_dir, name) for name in PYTHON_REQUIREMENTS
+            if os.path.exists(os.path.join(repo_dir, name))
+        ]
+        if requirements:
+            files, remote, local = _read_requirements(requirements)
+            return _hash_files("python", sys.version, files), remote, local
+
+        poetry_lock = os.path.join(repo_dir, "poetry.lock")
+        if os.path.exists(poetry_lock):
+            pins = _poetry_pins(poetry_lock, os.path.join(repo_dir, "pyproject.toml"))
+            if pins:
+                return _hash_files("python", sys.version, [poetry_lock]), pins, []
+
+        pyproject = os.path.join(repo_dir, "pyproject.toml")
+        if os.path.exists(pyproject):
+            dependencies = _pyproject_dependencies(pyproject)
+            if dependencies:
+                return _hash_files("python", sys.version, [pyproject]), dependencies, []
+        return None
+
+    async def _prepare_python(self, repo_dir: str, key: str,
+                              requirements: List[str]) -> Tuple[Dict, Optional[str]]:
+        started = time.time()
+        entry = os.path.join(self.cache_dir, f"python-{key}")
+        venv_dir = os.path.join(entry, "venv")
+
+        if os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+            return _step("python", "hit", started, key), venv_dir
+
+        async with EntryLock(entry):
+            if os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+                return _step("python", "hit", started, key), venv_dir
+
+            shutil.rmtree(venv_dir, ignore_errors=True)
+            python = os.path.join(venv_dir, "bin", "python")
+            requirements_file = os.path.join(entry, "requirements.txt")
+            with open(requirements_file, 'w') as f:
+                f.write("\n".join(requirements) + "\n")
+            for command in (
+                f"{shlex.quote(sys.executable)} -m venv {shlex.quote(venv_dir)}",
+                f"{shlex.quote(python)} -m pip install --disable-pip-version-check -q "
+                f"-r {shlex.quote(requirements_file)}",
+                # The test agent runs pytest, so make sure the env has it
+                f"{shlex.quote(python)} -c 'import pytest' || "
+                f"{shlex.quote(python)} -m pip install --disable-pip-version-check -q pytest",
+            ):
+                ok, output = await self._run(command, repo_dir)
+                if not ok:
+                    shutil.rmtree(venv_dir, ignore_errors=True)
+                    return _step("python", "failed", started, key, output), None
+
+            _mark_complete(entry)
+            return _step("python", "miss", started, key), venv_dir
+
+    async def _prepare_workspace_python(self, repo_dir: str, base_venv: str,
+                                        local: List[str]) -> Tuple[Dict, str]:
+        """
+        Install the workspace-local requirements into a venv inside the
+        workspace, layered over `base_venv`. Returns the venv tests should
+        use: the layered one, or `base_venv` if it could not be set up.
+        """
+        started = time.time()
+        venv_dir = os.path.join(repo_dir, WORKSPACE_VENV)
+        python = os.path.join(venv_dir, "bin", "python")
+        key = hashlib.sha256("\n".join(local).encode('utf-8')).hexdigest()[:32]
+
+        if not os.path.exists(python):
+            ok, output = await self._run(
+                f"{shlex.quote(sys.executable)} -m venv --without-pip {shlex.quote(venv_dir)}", repo_dir
+            )
+            if not ok:
+                return _step("python-workspace", "failed", started, key, output), base_venv
+            _exclude_from_git(repo_dir, f"/{WORKSPACE_VENV}/")
+            # The cached packages (pip and pytest among them) stay importable
+            with open(os.path.join(_site_packages(venv_dir), "rift-deps.pth"), 'w') as f:
+                f.write(f"import site; site.addsitedir({_site_packages(base_venv)!r})\n")
+            # The cached venv's pytest script would start the cached interpreter
+            pytest_script = os.path.join(venv_dir, "bin", "pytest")
+            with open(pytest_script, 'w') as f:
+                f.write(f"#!{python}\nimport sys\nimport pytest\nsys.exit(pytest.main())\n")
+            os.chmod(pytest_script, 0o755)
+
+        # Editable installs follow the workspace; anything else is a copy of
+        # it and has to be reinstalled to pick up the latest fixes
+        installed = os.path.join(venv_dir, COMPLETE_MARKER)
+        editable = all(_is_editable(line) for line in local)
+        if editable and _read_text(installed) == key:
+            return _step("python-workspace", "hit", started, key), venv_dir
+
+        args = ' '.join(shlex.quote(arg) for line in local for arg in shlex.split(line))
+        ok, output = await self._run(
+            f"{shlex.quote(python)} -m pip install --disable-pip-version-check -q "
+            f"--no-deps --force-reinstall {args}",
+            repo_dir
+        )
+        if not ok:
+            return _step("python-workspace", "failed", started, key, output), base_venv
+        with open(installed, 'w') as f:
+            f.write(key)
+        return _step("python-workspace", "miss", started, key), venv_dir
+
+    # Helpers
+
+    async def _run(self, command: str, cwd: str) -> Tuple[bool, str]:
+        async with get_metrics().subprocess_span("deps", command):
+            process = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), self.install_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.communicate()
+                return False, f"Timed out after {self.install_timeout:.0f}s: {command}"
+        return process.returncode == 0, stdout.decode(errors='replace')[-2000:]
+
+    async def _clone_tree(self, source: str, destination: str):
+        """
+        Copy-on-write clone if supported, else a plain copy. Never hardlinks:
+        a write through a link (jest cache, patched packages) would change
+        the cached tree for every later run.
+        """
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        ok, _ = await self._run(
+            f"cp -a --reflink=always {shlex.quote(source)} {shlex.quote(destination)}",
+            os.path.dirname(destination)
+        )
+        if ok:
+            return
+        shutil.rmtree(destination, ignore_errors=True)
+        await asyncio.to_thread(shutil.copytree, source, destination, symlinks=True)
+
+
+class EntryLock:
+    """Cross-process lock on a cache directory so only one worker (or task) works on it at a time"""
+
+    def __init__(self, entry: str):
+        self.entry = entry
+        self.handle = None
+
+    async def __aenter__(self):
+        os.makedirs(self.entry, exist_ok=True)
+        self.handle = open(os.path.join(self.entry, ".lock"), 'w')
+        await asyncio.to_thread(_lock_file, self.handle)
+        return self
+
+    async def __aexit__(self, *exc):
+        _unlock_file(self.handle)
+        self.handle.close()
+
+
+def _lock_file(handle):
+    """Block until this process holds the lock on `handle`"""
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            # LK_LOCK gives up after ~10 seconds; keep waiting
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _hash_files(ecosystem: str, variant: str, paths: List[str]) -> str:
+    """Cache key over the lockfile contents, the toolchain variant and the platform"""
+    digest = hashlib.sha256()
+    for label in (ecosystem, variant, platform.machine()):
+        digest.update(label.encode('utf-8') + b"\0")
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8') + b"\0")
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:32]
+
+
+def _exclude_from_git(repo_dir: str, pattern: str):
+    """Keep installed dependencies out of `git add .` without touching .gitignore"""
+    exclude = os.path.join(repo_dir, ".git", "info", "exclude")
+    try:
+        existing = open(exclude, 'r').read() if os.path.exists(exclude) else ""
+        if pattern not in existing.splitlines():
+            os.makedirs(os.path.dirname(exclude), exist_ok=True)
+            with open(exclude, 'a') as f:
+                f.write(("" if not existing or existing.endswith("\n") else "\n") + pattern + "\n")
+    except OSError as e:
+        print(f"Failed to exclude {pattern} from git: {e}")
+
+
+def _mark_complete(entry: str):
+    with open(os.path.join(entry, COMPLETE_MARKER), 'w') as f:
+        json.dump({"created": time.time()}, f)
+
+
+def _step(ecosystem: str, status: str, started: float, key: str, output: str = "") -> Dict:
+    step = {
+        "ecosystem": ecosystem,
+        "status": status,
+        "key": key,
+        "duration": round(time.time() - started, 2)
+    }
+    if output:
+        step["output"] = output
+    return step
+
+
+def _read_requirements(paths: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Flatten requirement files, following nested `-r` includes. Returns
+    (every file read, lines that can go into a shared venv, lines that
+    refer to the workspace: editable or local-path installs). Constraint
+    files are referenced by absolute path and hashed with the rest.
+    """
+    files: List[str] = []
+    remote: List[str] = []
+    local: List[str] = []
+
+    def read(path: str):
+        path = os.path.realpath(path)
+        if path in files or not os.path.isfile(path):
+            return
+        files.append(path)
+        with open(path, 'r', errors='replace') as f:
+            text = f.read().replace("\\\n", " ")
+        for line in text.splitlines():
+            line = re.sub(r"(^|\s)#.*$", "", line).strip()
+            if not line:
+                continue
+            include = re.match(r"(-r|--requirement|-c|--constraint)(?:\s*=?\s*)(\S+)$", line)
+            if include:
+                nested = os.path.join(os.path.dirname(path), include.group(2))
+                if include.group(1) in ("-r", "--requirement"):
+                    read(nested)
+                else:
+                    remote.append(f"-c {os.path.realpath(nested)}")
+                    if os.path.isfile(nested) and os.path.realpath(nested) not in files:
+                        files.append(os.path.realpath(nested))
+            elif _is_local_requirement(line):
+                local.append(line)
+            else:
+                remote.append(line)
+
+    for path in paths:
+        read(path)
+    return files, remote, local
+
+
+def _is_editable(line: str) -> bool:
+    return line.startswith(("-e", "--editable"))
+
+
+def _is_local_requirement(line: str) -> bool:
+    """Editable or path requirements, which pip resolves against the workspace"""
+    target = re.sub(r"^(-e|--editable)(\s*=?\s*)", "", line)
+    if target != line:
+        return "://" not in target or target.startswith("file:")
+    if line.startswith("-"):
+        return False
+    if " @ " in line:
+        return line.split(" @ ", 1)[1].strip().startswith("file:")
+    target = line.split(";", 1)[0].strip()
+    return target.startswith((".", "/", "~", "file:")) or (
+        "://" not in target and ("/" in target or target.endswith((".whl", ".tar.gz", ".zip")))
+    )
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _site_packages(venv_dir: str) -> str:
+    return os.path.join(venv_dir, "lib", f"python{sys.version_info[0]}.{sys.version_info[1]}",
+                        "site-packages")
+
+
+def _poetry_pins(path: str, pyproject: str) -> List[str]:
+    """
+    Pins for every locked package, each with the environment markers
+    under which it is needed (pywin32 on Windows only, say), so pip skips
+    packages for other platforms instead of failing on them
+    """
+    import tomllib
+    try:
+        with open(path, 'rb') as f:
+            lock = tomllib.load(f)
+    except (OSError, ValueError):
+        return []
+    try:
+        with open(pyproject, 'rb') as f:
+            poetry = tomllib.load(f).get("tool", {}).get("poetry", {})
+    except (OSError, ValueError):
+        poetry = {}
+
+    # Markers on every edge that pulls a package in; None means unconditional
+    requested: Dict[str, List[Optional[str]]] = {}
+
+    def request(name: str, spec):
+        for constraint in spec if isinstance(spec, list) else [spec]:
+            marker = constraint.get("markers") if isinstance(constraint, dict) else None
+            requested.setdefault(_normalize(name), []).append(marker)
+
+    for package in lock.get("package", []):
+        for name, spec in package.get("dependencies", {}).items():
+            request(name, spec)
+    groups = [poetry.get("dependencies", {}), poetry.get("dev-dependencies", {})]
+    groups.extend(group.get("dependencies", {}) for group in poetry.get("group", {}).values())
+    for dependencies in groups:
+        for name, spec in dependencies.items():
+            if name != "python":
+                request(name, spec)
+
+    pins = []
+    for package in lock.get("package", []):
+        if not package.get("name") or not package.get("version"):
+            continue
+        pin = f"{package['name']}=={package['version']}"
+        # Lock format 2.1 records the markers itself, per group
+        marker = package.get("markers")
+        if isinstance(marker, dict):
+            marker = " or ".join(f"({m})" for m in dict.fromkeys(marker.values()))
+        if marker is None:
+            markers = requested.get(_normalize(package["name"]), [None])
+            if all(markers):
+                marker = " or ".join(f"({m})" for m in dict.fromkeys(markers))
+        pins.append(f"{pin} ; {marker}" if marker else pin)
+    return pins
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _pyproject_dependencies(path: str) -> List[str]:
+    import tomllib
+    try:
+        with open(path, 'rb') as f:
+            project = tomllib.load(f).get("project", {})
+    except (OSError, ValueError):
+        return []
+    dependencies = list(project.get("dependencies", []))
+    for extra in ("test", "tests", "dev"):
+        dependencies.extend(project.get("optional-dependencies", {}).get(extra, []))
+    return dependencies
+
+
+_deps_cache: Optional[DependencyCache] = None
+
+
+def get_dependency_cache() -> DependencyCache:
+    """Return the process-wide dependency cache"""
+    global _deps_cache
+    if _deps_cache is None:
+        _deps_cache = DependencyCache()
+    return _deps_cache
@@ -2,29 +2,48 @@
 Fixer Agent - Generates and applies code fixes using AI
 """
 import os
-import asyncio
-from typing import Dict
-import google.generativeai as genai
+import re
+from typing import Dict, Optional
+
+from .patcher import apply_patch, PatchError
+from .context_builder import ContextBuilder, estimate_tokens
+from .llm_client import get_llm_client, LLMCallError
+from .local_fixer import LocalFixer
+from .validator import get_fix_validator
+from .metrics import get_metrics
+
+# Sections the model is asked to produce, in any order
+RESPONSE_SECTIONS = ["FIXED_CODE", "PATCH", "COMMIT_MESSAGE", "EXPLANATION"]
 
 
 class FixerAgent:
     """Generates code fixes using Gemini AI"""
     
-    def __init__(self):
-        # Configure Gemini API
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        else:
-            self.model = None
-            print("Warning: GEMINI_API_KEY not set, using fallback fixes")
+    def __init__(self, patch_mode: bool = None):
+        # Patch mode asks for a diff instead of the whole file, so the
+        # response size tracks the size of the fix rather than the file
+        if patch_mode is None:
+            patch_mode = os.getenv("FIXER_MODE", "patch").lower() != "full"
+        self.patch_mode = patch_mode
+        self.context_builder = ContextBuilder()
+        self.local_fixer = LocalFixer()
+        self.validator = get_fix_validator()
+        self.validation_retries = int(os.getenv("FIXER_VALIDATION_RETRIES", 1))
+        
+        # Shared across all runs in the process: one rate limit, one pool
+        self.llm = get_llm_client()
     
     async def generate_fix(self, issue: Dict, repo_dir: str) -> Dict:
         """Generate a fix for the given issue"""
-        
-        # Read file context
+        async with get_metrics().span("fix.generate", file=issue.get("file"), line=issue.get("line")):
+            return await self._generate_fix(issue, repo_dir)
+    
+    async def _generate_fix(self, issue: Dict, repo_dir: str) -> Dict:
+        # Read file context (linters may report paths relative to the repo)
         file_path = issue["file"]
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(repo_dir, file_path)
+            issue = {**issue, "file": file_path}
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 file_content = f.read()
@@ -34,6 +53,26 @@ class FixerAgent:
                 "error": f"Failed to read file: {e}"
             }
         
+        # Mechanical issues are rewritten locally without a model round trip
+        local_fix = self.local_fixer.fix(issue, file_content)
+        if local_fix is not None:
+            if local_fix["fixed_code"] is None:
+                return {
+                    "success": False,
+                    "skipped": True,
+                    "error": "Issue already resolved",
+                    "file_path": file_path
+                }
+            if await self._is_acceptable(file_path, file_content, local_fix["fixed_code"]) is None:
+                return {
+                    "success": True,
+                    "fixed_code": local_fix["fixed_code"],
+                    "commit_message": f"{local_fix['commit_message']} in {os.path.basename(file_path)}",
+                    "explanation": f"Applied deterministic fix for {issue['type']}",
+                    "local": True,
+                    "file_path": file_path
+                }
+        
         # Get surrounding context (10 lines before and after)
         lines = file_content.split('\n')
         issue_line = issue["line"] - 1
@@ -41,16 +80,70 @@ class FixerAgent:
         end_line = min(len(lines), issue_line + 10)
         context = '\n'.join(lines[start_line:end_line])
         
-        # Generate fix using AI
-        if self.model:
-            fix_result = await self._generate_ai_fix(issue, context, file_content)
-        else:
+        # Whole-file rewrites only make sense when the file fits the budget
+        fits_budget = estimate_tokens(file_content) <= self.context_builder.token_budget
+        
+        if not self.llm.available:
             fix_result = self._generate_fallback_fix(issue, context)
+            fix_result["file_path"] = file_path
+            return fix_result
         
+        # Generate fix using AI, retrying with the parser error if the fix
+        # does not parse so broken files never reach a commit or test run
+        feedback = ""
+        prompt_tokens = 0
+        for attempt in range(self.validation_retries + 1):
+            if self.patch_mode or not fits_budget:
+                fix_result = await self._generate_ai_patch(issue, file_content, feedback)
+            else:
+                fix_result = await self._generate_ai_fix(issue, context, file_content, feedback)
+            prompt_tokens += fix_result.get("prompt_tokens", 0)
+            fix_result["file_path"] = file_path
+            
+            if not fix_result["success"] or not fix_result.get("fixed_code"):
+                break
+            
+            error = await self._is_acceptable(file_path, file_content, fix_result["fixed_code"])
+            if error is None:
+                break
+            
+            print(f"Generated fix for {file_path} failed validation: {error}")
+            feedback = error
+            fix_result = {
+                "success": False,
+                "error": f"Fix failed syntax validation: {error}",
+                "file_path": file_path
+            }
+        
+        fix_result["prompt_tokens"] = prompt_tokens
         return fix_result
     
-    async def _generate_ai_fix(self, issue: Dict, context: str, full_content: str) -> Dict:
-        """Generate fix using Gemini AI"""
+    async def _is_acceptable(self, file_path: str, original: str, fixed: str) -> Optional[str]:
+        """Return a syntax error if `fixed` breaks a file that used to parse, else None"""
+        async with get_metrics().span("fix.validate"):
+            result = await self.validator.validate(file_path, fixed)
+        if result.valid:
+            return None
+        
+        # Do not block fixes to files that were already unparseable
+        baseline = await self.validator.validate(file_path, original)
+        if not baseline.valid:
+            return None
+        return result.error
+    
+    def _feedback_section(self, feedback: str) -> str:
+        if not feedback:
+            return ""
+        return f"""
+Your previous fix was rejected because the result does not parse:
+{feedback}
+Make sure the fixed code is syntactically valid.
+"""
+    
+    async def _generate_ai_patch(self, issue: Dict, file_content: str, feedback: str = "") -> Dict:
+        """Generate a fix as a patch against the current file using Gemini AI"""
+        
+        context = self.context_builder.build(file_content, issue["file"], issue["line"])
         
         prompt = f"""You are an expert code fixer. Fix the following issue:
 
@@ -58,7 +151,83 @@ File: {issue['file']}
 Line: {issue['line']}
 Bug Type: {issue['type']}
 Description: {issue['description']}
+{self._feedback_section(feedback)}
+Relevant code from the file ({context.total_lines} lines total), each line prefixed
+with its line number; "..." marks omitted lines:
+```
+{context.text}
+```
+
+Provide:
+1. A minimal patch against the current file, either as a unified diff
+   (with ---/+++ headers and @@ hunks, 3 lines of context) or as one or
+   more line-range replacements in the form:
+   REPLACE <start>-<end>:
+   <replacement lines>
+   END_REPLACE
+   Do not include the line-number prefixes in the patch.
+2. A concise commit message (max 50 chars)
+3. Explanation of the fix
+
+Format your response as:
+PATCH:
+<patch>
+
+COMMIT_MESSAGE:
+<commit message>
+
+EXPLANATION:
+<explanation>
+"""
+        
+        try:
+            response = await self.llm.generate(prompt)
+            response_text = response.text
+            
+            patch = self._extract_section(response_text, "PATCH")
+            commit_message = self._extract_section(response_text, "COMMIT_MESSAGE")
+            explanation = self._extract_section(response_text, "EXPLANATION")
+            
+            # Validate against the file as it is now, not as the model saw it
+            with open(issue["file"], 'r', encoding='utf-8') as f:
+                current_content = f.read()
+            fixed_code = apply_patch(current_content, patch)
+            
+            if fixed_code == current_content:
+                raise PatchError("Patch does not change the file")
+            
+            return {
+                "success": True,
+                "fixed_code": fixed_code,
+                "patch": patch,
+                "commit_message": commit_message or f"Fix {issue['type']} in {os.path.basename(issue['file'])}",
+                "explanation": explanation,
+                "prompt_tokens": estimate_tokens(prompt),
+                "llm_latency": response.latency,
+                "llm_queue_wait": response.queue_wait
+            }
+            
+        except PatchError as e:
+            print(f"AI patch rejected for {issue['file']}: {e}")
+            return self._failed_fix(f"Patch rejected: {e}", prompt)
+        except LLMCallError as e:
+            print(f"AI fix generation failed: {e}")
+            return self._failed_fix(f"LLM call failed: {e}", prompt)
+        except Exception as e:
+            print(f"AI fix generation failed: {e}")
+            return self._failed_fix(str(e), prompt)
+    
+    async def _generate_ai_fix(self, issue: Dict, context: str, full_content: str,
+                               feedback: str = "") -> Dict:
+        """Generate fix using Gemini AI"""
+        
+        prompt = f"""You are an expert code fixer. Fix the following issue:
 
+File: {issue['file']}
+Line: {issue['line']}
+Bug Type: {issue['type']}
+Description: {issue['description']}
+{self._feedback_section(feedback)}
 Context (surrounding code):
 ```
 {context}
@@ -86,11 +255,7 @@ EXPLANATION:
 """
         
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt
-            )
-            
+            response = await self.llm.generate(prompt)
             response_text = response.text
             
             # Parse response
@@ -102,12 +267,26 @@ EXPLANATION:
                 "success": True,
                 "fixed_code": fixed_code,
                 "commit_message": commit_message or f"Fix {issue['type']} in {os.path.basename(issue['file'])}",
-                "explanation": explanation
+                "explanation": explanation,
+                "prompt_tokens": estimate_tokens(prompt),
+                "llm_latency": response.latency,
+                "llm_queue_wait": response.queue_wait
             }
             
+        except LLMCallError as e:
+            print(f"AI fix generation failed: {e}")
+            return self._failed_fix(f"LLM call failed: {e}", prompt)
         except Exception as e:
             print(f"AI fix generation failed: {e}")
-            return self._generate_fallback_fix(issue, context)
+            return self._failed_fix(str(e), prompt)
+    
+    def _failed_fix(self, error: str, prompt: str) -> Dict:
+        """Result for a fix attempt that produced nothing to apply"""
+        return {
+            "success": False,
+            "error": error,
+            "prompt_tokens": estimate_tokens(prompt)
+        }
     
     def _generate_fallback_fix(self, issue: Dict, context: str) -> Dict:
         """Generate a simple fallback fix"""
@@ -152,8 +331,9 @@ EXPLANATION:
         if fix_result.get("fixed_code"):
             # Write complete fixed file
             file_path = fix_result.get("file_path")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(fix_result["fixed_code"])
+            with get_metrics().span("fix.apply"):
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(fix_result["fixed_code"])
         
         # For simple fixes, the scanner would have already identified the issue
         # and we just commit the change
@@ -161,21 +341,33 @@ EXPLANATION:
     def _extract_section(self, text: str, section_name: str) -> str:
         """Extract a section from AI response"""
         try:
-            start_marker = f"{section_name}:"
-            if start_marker in text:
-                start = text.index(start_marker) + len(start_marker)
-                # Find next section or end
-                next_sections = ["FIXED_CODE:", "COMMIT_MESSAGE:", "EXPLANATION:"]
+            match = re.search(rf"^{section_name}:[ \t]*\n?", text, re.MULTILINE)
+            if match:
+                start = match.end()
+                # Find the nearest following section header or end
                 end = len(text)
-                for section in next_sections:
-                    if section != start_marker and section in text[start:]:
-                        end = text.index(section, start)
-                        break
+                for section in RESPONSE_SECTIONS:
+                    if section == section_name:
+                        continue
+                    following = re.search(rf"^{section}:", text[start:], re.MULTILINE)
+                    if following:
+                        end = min(end, start + following.start())
                 
-                content = text[start:end].strip()
-                # Remove code block markers if present
-                content = content.replace("```", "").strip()
-                return content
+                content = text[start:end].strip('\n')
+                # Remove only the fence wrapping the section, so code that
+                # itself contains triple backticks survives intact
+                content_lines = content.split('\n')
+                if content_lines and content_lines[0].strip().startswith("```"):
+                    content_lines = content_lines[1:]
+                    while content_lines and not content_lines[-1].strip():
+                        content_lines.pop()
+                    if content_lines and content_lines[-1].strip() == "```":
+                        content_lines = content_lines[:-1]
+                content = '\n'.join(content_lines)
+                # Keep indentation of code sections, trim prose sections
+                if section_name in ("FIXED_CODE", "PATCH"):
+                    return content.strip('\n')
+                return content.strip()
         except Exception as e:
             print(f"Error extracting section {section_name}: {e}")
         
@@ -2,9 +2,14 @@
 Git Agent - Handles all Git operations
 """
 import os
+import shlex
 import asyncio
 import subprocess
-from typing import Optional
+from typing import List, Optional
+
+from .metrics import get_metrics
+from .object_store import get_object_store, GC_CONFIG
+from .github_client import GitHubAPIError, get_github_client, parse_repository
 
 
 class GitAgent:
@@ -18,13 +23,20 @@ class GitAgent:
     
     async def _run_command(self, command: str, cwd: Optional[str] = None) -> tuple:
         """Run a shell command asynchronously"""
-        process = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd or self.repo_dir
-        )
-        stdout, stderr = await process.communicate()
+        metrics = get_metrics()
+        words = command.split()
+        # The subcommand is the first word after "git" that is not an option
+        subcommand = next((w for w in words[1:] if not w.startswith("-")), None)
+        stage = f"git.{subcommand}" if subcommand and words[0] == "git" else "git.other"
+        metrics.inc("rift_subprocesses_total", agent="git")
+        with metrics.span(stage):
+            process = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd or self.repo_dir
+            )
+            stdout, stderr = await process.communicate()
         return process.returncode, stdout.decode(), stderr.decode()
     
     async def clone_repository(self, repo_url: str):
@@ -43,9 +55,11 @@ class GitAgent:
             # Convert to authenticated URL: https://TOKEN@github.com/user/repo.git
             clone_url = repo_url.replace("https://", f"https://{self.github_token}@")
         
-        # Clone
+        # Clone, borrowing objects from the shared store when it has the history
+        reference = await self._prime_object_store(repo_url, clone_url)
+        reference_arg = f"--reference-if-able {shlex.quote(reference)} " if reference else ""
         returncode, stdout, stderr = await self._run_command(
-            f"git clone {clone_url} {self.repo_dir}",
+            f"git clone {reference_arg}{clone_url} {self.repo_dir}",
             cwd=self.workspace_dir
         )
         
@@ -56,6 +70,49 @@ class GitAgent:
         await self._run_command("git config user.name 'AI Agent'")
         await self._run_command("git config user.email 'agent@rift2026.ai'")
     
+    async def _prime_object_store(self, repo_url: str, clone_url: str) -> Optional[str]:
+        """Fetch the repository into the shared object store; its path, or None to clone directly"""
+        store = get_object_store()
+        if not store.enabled:
+            return None
+        
+        async with store.family_lock(repo_url):
+            if not store.exists():
+                os.makedirs(os.path.dirname(store.path), exist_ok=True)
+                await self._run_command(f"git init --bare --quiet {shlex.quote(store.path)}", cwd=self.workspace_dir)
+                for name, value in GC_CONFIG.items():
+                    await self._run_command(
+                        f"git --git-dir={shlex.quote(store.path)} config {name} {value}", cwd=self.workspace_dir
+                    )
+            # Also on the command line, for stores created before the config was set
+            no_gc = ' '.join(f"-c {name}={value}" for name, value in GC_CONFIG.items())
+            returncode, stdout, stderr = await self._run_command(
+                f"git {no_gc} --git-dir={shlex.quote(store.path)} fetch --quiet --no-tags --no-write-fetch-head "
+                f"{clone_url} '+refs/heads/*:{store.namespace(repo_url)}/heads/*'",
+                cwd=self.workspace_dir
+            )
+        
+        if returncode != 0:
+            print(f"Shared object store fetch failed, cloning directly: {stderr.strip()}")
+            return None
+        return store.path
+    
+    def attach_repository(self, repo_url: str) -> bool:
+        """Point at an existing clone in the workspace; False if it is gone"""
+        self.repo_url = repo_url
+        repo_name = repo_url.rstrip('/').split('/')[-1].replace('.git', '')
+        self.repo_dir = os.path.join(self.workspace_dir, repo_name)
+        return os.path.isdir(os.path.join(self.repo_dir, '.git'))
+    
+    async def reset_to(self, branch_name: str, commit: str):
+        """Check out `branch_name` at `commit`, dropping uncommitted changes"""
+        returncode, stdout, stderr = await self._run_command(
+            f"git checkout -B {shlex.quote(branch_name)} {shlex.quote(commit)} && git reset --hard"
+        )
+        
+        if returncode != 0:
+            raise Exception(f"Failed to reset to {commit}: {stderr}")
+    
     async def create_branch(self, branch_name: str):
         """Create and checkout a new branch"""
         returncode, stdout, stderr = await self._run_command(
@@ -65,13 +122,17 @@ class GitAgent:
         if returncode != 0:
             raise Exception(f"Failed to create branch: {stderr}")
     
-    async def commit_changes(self, commit_message: str):
-        """Stage and commit all changes"""
+    async def commit_changes(self, commit_message: str, paths: Optional[List[str]] = None):
+        """Stage and commit all changes, or only `paths` when given"""
         # Escape commit message for shell - handle quotes and newlines
         safe_message = commit_message.replace('"', '\\"').replace('\n', ' ').replace('\r', '')
         
-        # Stage all changes
-        returncode, stdout, stderr = await self._run_command("git add .")
+        # Stage changes; restricting to paths keeps concurrent fixes out of this commit
+        if paths:
+            add_command = "git add -- " + ' '.join(shlex.quote(p) for p in paths)
+        else:
+            add_command = "git add ."
+        returncode, stdout, stderr = await self._run_command(add_command)
         
         if returncode != 0:
             raise Exception(f"Failed to stage changes: {stderr}")
@@ -93,6 +154,24 @@ class GitAgent:
             error_msg = f"Failed to commit: {stderr if stderr else stdout}"
             raise Exception(error_msg)
     
+    async def get_head(self) -> str:
+        """Return the commit SHA of HEAD"""
+        returncode, stdout, stderr = await self._run_command("git rev-parse HEAD")
+        
+        if returncode != 0:
+            raise Exception(f"Failed to read HEAD: {stderr}")
+        return stdout.strip()
+    
+    async def changed_files(self, since: str) -> List[str]:
+        """Files changed between commit `since` and HEAD, relative to the repo root"""
+        returncode, stdout, stderr = await self._run_command(
+            f"git diff --name-only {since} HEAD"
+        )
+        
+        if returncode != 0:
+            raise Exception(f"Failed to list changed files: {stderr}")
+        return [line for line in stdout.splitlines() if line.strip()]
+    
     async def push_branch(self, branch_name: str):
         """Push branch to remote"""
         # If we have a GitHub token, set up authenticated remote
@@ -109,25 +188,19 @@ class GitAgent:
             raise Exception(f"Failed to push branch: {stderr}")
     
     async def create_pull_request(self, branch_name: str, title: str, body: str) -> str:
-        """Create a pull request using GitHub CLI or API"""
-        # Try using GitHub CLI if available
-        returncode, stdout, stderr = await self._run_command(
-            f'gh pr create --title "{title}" --body "{body}" --base main --head {branch_name}'
-        )
-        
-        if returncode == 0:
-            return stdout.strip()
-        
-        # Fallback: return GitHub URL
-        # Extract owner/repo from git remote
-        returncode, stdout, stderr = await self._run_command("git remote get-url origin")
-        remote_url = stdout.strip()
-        
-        # Parse GitHub URL
-        if "github.com" in remote_url:
-            parts = remote_url.replace(".git", "").split("/")
-            owner = parts[-2]
-            repo = parts[-1]
+        """Open a pull request into the default branch through the GitHub API"""
+        client = get_github_client()
+        target = parse_repository(self.repo_url)
+        if client.available and target:
+            owner, repo = target
+            try:
+                return await client.create_pull_request(owner, repo, branch_name, title, body)
+            except (GitHubAPIError, OSError) as e:
+                print(f"GitHub API pull request failed: {e}")
+        
+        # Fallback: link to GitHub's compare page
+        if target and "github.com" in self.repo_url:
+            owner, repo = target
             return f"https://github.com/{owner}/{repo}/compare/{branch_name}?expand=1"
         
         return "PR creation pending - manual intervention required"
@@ -0,0 +1,202 @@
+"""
+GitHub Client - Async GitHub REST client over pooled keep-alive connections
+"""
+import os
+import ssl
+import json
+import queue
+import asyncio
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .metrics import get_metrics
+
+
+# Connection errors after which a pooled connection is replaced and the request retried
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                           http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class GitHubAPIError(Exception):
+    """Non-2xx response from the GitHub API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class GitHubClient:
+    """
+    Creates pull requests, looks up default branches and finds existing PRs
+    through the REST API. Requests reuse a small pool of keep-alive
+    connections (one TLS handshake per connection, not per call) and run
+    on the client's own threads, so callers simply await them.
+
+    GITHUB_API_URL points the client at GitHub Enterprise or at a local
+    stand-in such as `github_stub_server`.
+    """
+
+    def __init__(self, token: str = None, api_url: str = None, pool_size: int = None,
+                 timeout: float = None):
+        self.token = token if token is not None else os.getenv("GITHUB_TOKEN")
+        self.api_url = (api_url or os.getenv("GITHUB_API_URL", "https://api.github.com")).rstrip('/')
+        self.pool_size = pool_size or int(os.getenv("GITHUB_POOL_SIZE", 4))
+        self.timeout = timeout or float(os.getenv("GITHUB_TIMEOUT", 30))
+
+        parts = urlsplit(self.api_url)
+        self._https = parts.scheme == "https"
+        self._host = parts.netloc
+        self._prefix = parts.path.rstrip('/')
+        self._ssl = ssl.create_default_context() if self._https else None
+        self._connections: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="github")
+        self._default_branches: Dict[Tuple[str, str], str] = {}
+        self.stats = {"requests": 0, "connections": 0, "errors": 0}
+
+    @property
+    def available(self) -> bool:
+        return bool(self.token)
+
+    async def get_default_branch(self, owner: str, repo: str) -> str:
+        """Default branch of a repository (remembered per repository)"""
+        key = (owner, repo)
+        if key not in self._default_branches:
+            data = await self.request("GET", f"/repos/{_path(owner)}/{_path(repo)}")
+            self._default_branches[key] = data.get("default_branch") or "main"
+        return self._default_branches[key]
+
+    async def find_pull_request(self, owner: str, repo: str, branch: str) -> Optional[str]:
+        """URL of an open PR from `branch` (in the same repository), if there is one"""
+        head = quote(f"{owner}:{branch}", safe='')
+        pulls = await self.request("GET", f"/repos/{_path(owner)}/{_path(repo)}/pulls?state=open&head={head}")
+        return pulls[0]["html_url"] if pulls else None
+
+    async def create_pull_request(self, owner: str, repo: str, branch: str, title: str,
+                                  body: str, base: str = None) -> str:
+        """
+        Open a PR from `branch` into `base` (default: the repository's
+        default branch) and return its URL. If one is already open for the
+        branch, that PR's URL is returned instead.
+        """
+        base = base or await self.get_default_branch(owner, repo)
+        try:
+            pull = await self.request("POST", f"/repos/{_path(owner)}/{_path(repo)}/pulls", {
+                "title": title,
+                "body": body,
+                "head": branch,
+                "base": base
+            })
+            return pull["html_url"]
+        except GitHubAPIError as e:
+            if e.status == 422 and "already exists" in e.message:
+                existing = await self.find_pull_request(owner, repo, branch)
+                if existing:
+                    return existing
+            raise
+
+    async def request(self, method: str, path: str, payload: Dict = None):
+        """Send one API request and return the decoded JSON body"""
+        metrics = get_metrics()
+        async with metrics.span("github.request", method=method, path=path.split('?')[0]):
+            loop = asyncio.get_running_loop()
+            status, data = await loop.run_in_executor(
+                self._executor, self._send, method, path, payload
+            )
+        metrics.inc("rift_github_requests_total", method=method, status=status)
+        if status >= 400:
+            self.stats["errors"] += 1
+            message = data.get("message", "") if isinstance(data, dict) else str(data)
+            errors = data.get("errors") if isinstance(data, dict) else None
+            if errors:
+                message += " " + "; ".join(str(err.get("message", err)) for err in errors if err)
+            raise GitHubAPIError(status, message.strip())
+        return data
+
+    def _send(self, method: str, path: str, payload: Optional[Dict]):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "rift-agent",
+            "Connection": "keep-alive"
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                connection.request(method, self._prefix + path, body=body, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+            except STALE_CONNECTION_ERRORS:
+                # The server closed an idle keep-alive connection; retry once on a new one
+                connection.close()
+                if attempt == 1:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+
+            self.stats["requests"] += 1
+            if response.will_close:
+                connection.close()
+            else:
+                self._connections.put(connection)
+            try:
+                return response.status, json.loads(raw.decode('utf-8')) if raw else {}
+            except ValueError:
+                return response.status, {"message": raw.decode('utf-8', 'replace')[:200]}
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            self.stats["connections"] += 1
+            if self._https:
+                return http.client.HTTPSConnection(self._host, timeout=self.timeout, context=self._ssl)
+            return http.client.HTTPConnection(self._host, timeout=self.timeout)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+def parse_repository(url: str) -> Optional[Tuple[str, str]]:
+    """(owner, repo) from an https or ssh remote URL, credentials stripped"""
+    if not url:
+        return None
+    url = url.strip()
+    if "://" in url:
+        path = urlsplit(url).path
+    elif ":" in url:
+        # git@github.com:owner/repo.git
+        path = url.split(":", 1)[1]
+    else:
+        return None
+    parts = [part for part in path.strip('/').split('/') if part]
+    if len(parts) < 2:
+        return None
+    repo = parts[-1][:-4] if parts[-1].endswith('.git') else parts[-1]
+    return parts[-2], repo
+
+
+def _path(segment: str) -> str:
+    return quote(segment, safe='')
+
+
+_client: Optional[GitHubClient] = None
+
+
+def get_github_client() -> GitHubClient:
+    """Return the process-wide GitHub client"""
+    global _client
+    if _client is None:
+        _client = GitHubClient()
+    return _client
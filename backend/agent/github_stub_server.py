@@ -0,0 +1,145 @@
+"""
+GitHub Stub Server - Localhost stand-in for the GitHub REST API's repository and pull request endpoints
+
+Run with:
+    python -m backend.agent.github_stub_server --port 8766 --default-branch master
+
+and point the backend at it with GITHUB_API_URL=http://127.0.0.1:8766
+"""
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class GitHubStubState:
+    """Repositories and pull requests the stub knows about"""
+
+    def __init__(self, default_branch: str = "main"):
+        self.default_branch = default_branch
+        self.pulls: Dict[Tuple[str, str], List[Dict]] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state: GitHubStubState):
+    class GitHubHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so clients can reuse connections
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def do_GET(self):
+            parts, query = self._route()
+            if len(parts) == 3 and parts[0] == "repos":
+                self._send(200, {
+                    "full_name": f"{parts[1]}/{parts[2]}",
+                    "default_branch": state.default_branch
+                })
+            elif len(parts) == 4 and parts[0] == "repos" and parts[3] == "pulls":
+                head = query.get("head", [None])[0]
+                with state.lock:
+                    pulls = list(state.pulls.get((parts[1], parts[2]), []))
+                if head:
+                    pulls = [p for p in pulls if f"{parts[1]}:{p['head']['ref']}" == head]
+                self._send(200, [p for p in pulls if p["state"] == "open"])
+            else:
+                self._send(404, {"message": "Not Found"})
+
+        def do_POST(self):
+            parts, _ = self._route()
+            if not (len(parts) == 4 and parts[0] == "repos" and parts[3] == "pulls"):
+                self._send(404, {"message": "Not Found"})
+                return
+            if not self.headers.get("Authorization"):
+                self._send(401, {"message": "Requires authentication"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length).decode('utf-8'))
+                head, base, title = body["head"], body["base"], body["title"]
+            except (ValueError, KeyError) as e:
+                self._send(400, {"message": f"Problems parsing JSON: {e}"})
+                return
+
+            owner, repo = parts[1], parts[2]
+            with state.lock:
+                pulls = state.pulls.setdefault((owner, repo), [])
+                if any(p["head"]["ref"] == head and p["state"] == "open" for p in pulls):
+                    self._send(422, {
+                        "message": "Validation Failed",
+                        "errors": [{"message": f"A pull request already exists for {owner}:{head}."}]
+                    })
+                    return
+                number = len(pulls) + 1
+                pull = {
+                    "number": number,
+                    "state": "open",
+                    "title": title,
+                    "body": body.get("body", ""),
+                    "head": {"ref": head},
+                    "base": {"ref": base},
+                    "html_url": f"https://github.com/{owner}/{repo}/pull/{number}"
+                }
+                pulls.append(pull)
+            self._send(201, pull)
+
+        def _route(self):
+            url = urlsplit(self.path)
+            with state.lock:
+                state.requests.append((self.command, url.path))
+            parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+            # Enterprise-style prefix: /api/v3/repos/...
+            if parts[:2] == ["api", "v3"]:
+                parts = parts[2:]
+            return parts, parse_qs(url.query)
+
+        def _send(self, status: int, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return GitHubHandler
+
+
+def start_stub_server(state: GitHubStubState = None, host: str = "127.0.0.1",
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub server on a background thread; returns (server, api_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(state or GitHubStubState()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="github-stub", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline GitHub API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--default-branch", default="main")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(GitHubStubState(args.default_branch)))
+    print(f"[RIFT] GitHub stub server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Impact Analyzer - Maps changed files to the tests that can reach them
+"""
+import os
+import re
+import ast
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Set
+
+
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', 'venv', '.venv', '.rift-venv', 'dist', 'build', 'target'}
+PYTHON_EXTENSIONS = ('.py',)
+JS_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+GO_EXTENSIONS = ('.go',)
+SOURCE_EXTENSIONS = PYTHON_EXTENSIONS + JS_EXTENSIONS + GO_EXTENSIONS
+
+# Changes to these can affect any test, so they force a full run
+GLOBAL_FILES = {
+    'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
+    'jest.config.js', 'jest.config.ts', 'vitest.config.ts', 'vite.config.ts', 'tsconfig.json',
+    'babel.config.js', '.babelrc', 'conftest.py', 'pytest.ini', 'setup.py', 'setup.cfg',
+    'pyproject.toml', 'tox.ini', 'requirements.txt', 'go.mod', 'go.sum', 'Cargo.toml', 'Cargo.lock'
+}
+
+JS_IMPORT = re.compile(
+    r'''(?:import\s+(?:[\w*{}\s,]+\s+from\s+)?|export\s+[\w*{}\s,]+\s+from\s+|require\s*\(\s*|import\s*\(\s*)['"]([^'"]+)['"]'''
+)
+GO_IMPORT_BLOCK = re.compile(r'^import\s*\((.*?)^\)', re.MULTILINE | re.DOTALL)
+GO_IMPORT_LINE = re.compile(r'^import\s+(?:\w+\s+)?"([^"]+)"', re.MULTILINE)
+GO_IMPORT_PATH = re.compile(r'"([^"]+)"')
+
+
+def is_test_file(path: str) -> bool:
+    """Whether `path` (relative to the repo) is a test file"""
+    name = os.path.basename(path)
+    parts = path.replace('\\', '/').split('/')
+    if name.endswith('.py'):
+        return name.startswith('test_') or name.endswith('_test.py')
+    if name.endswith('_test.go'):
+        return True
+    if name.endswith(JS_EXTENSIONS):
+        return bool(re.search(r'\.(test|spec)\.[cm]?[jt]sx?$', name)) or '__tests__' in parts
+    return False
+
+
+class ImpactAnalyzer:
+    """
+    Builds a file-level dependency graph for Python, JS/TS and Go sources
+    and answers "which test files depend on these changed files?".
+    """
+
+    def __init__(self, repo_dir: str):
+        self.repo_dir = repo_dir
+        self.files: Set[str] = set()
+        self.dependencies: Dict[str, Set[str]] = defaultdict(set)
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self.go_module = self._read_go_module()
+        self._build()
+
+    def select_tests(self, changed_files: List[str]) -> Optional[List[str]]:
+        """
+        Test files affected by `changed_files` (repo-relative paths), or None
+        when a change cannot be traced and the full suite should run.
+        """
+        reached: Set[str] = set()
+        queue = deque()
+        for path in changed_files:
+            if os.path.basename(path) in GLOBAL_FILES:
+                return None
+            if not path.endswith(SOURCE_EXTENSIONS):
+                # Non-source change (docs, assets); no test imports it
+                continue
+            if path not in reached:
+                reached.add(path)
+                queue.append(path)
+
+        while queue:
+            current = queue.popleft()
+            for dependent in self.dependents.get(current, ()):
+                if dependent not in reached:
+                    reached.add(dependent)
+                    queue.append(dependent)
+
+        return sorted(path for path in reached if is_test_file(path) and path in self.files)
+
+    def dependency_closure(self, path: str) -> Set[str]:
+        """Every file `path` transitively imports, including itself"""
+        closure = {path}
+        queue = deque([path])
+        while queue:
+            current = queue.popleft()
+            for dependency in self.dependencies.get(current, ()):
+                if dependency not in closure:
+                    closure.add(dependency)
+                    queue.append(dependency)
+        return closure
+
+    def _build(self):
+        for root, dirs, files in os.walk(self.repo_dir):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for file in files:
+                if file.endswith(SOURCE_EXTENSIONS):
+                    self.files.add(os.path.relpath(os.path.join(root, file), self.repo_dir))
+
+        go_packages: Dict[str, List[str]] = defaultdict(list)
+        for path in self.files:
+            if path.endswith(GO_EXTENSIONS):
+                go_packages[os.path.dirname(path)].append(path)
+
+        for path in self.files:
+            try:
+                with open(os.path.join(self.repo_dir, path), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+
+            if path.endswith(PYTHON_EXTENSIONS):
+                targets = self._python_imports(path, content)
+            elif path.endswith(JS_EXTENSIONS):
+                targets = self._js_imports(path, content)
+            else:
+                targets = self._go_imports(path, content, go_packages)
+
+            for target in targets:
+                if target != path:
+                    self.dependencies[path].add(target)
+                    self.dependents[target].add(path)
+
+    # Python
+
+    def _python_imports(self, path: str, content: str) -> Set[str]:
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return set()
+
+        package = os.path.dirname(path)
+        targets = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    targets.update(self._resolve_python(alias.name, ""))
+            elif isinstance(node, ast.ImportFrom):
+                base = ""
+                if node.level:
+                    base = package
+                    for _ in range(node.level - 1):
+                        base = os.path.dirname(base)
+                module = node.module or ""
+                targets.update(self._resolve_python(module, base))
+                for alias in node.names:
+                    submodule = f"{module}.{alias.name}" if module else alias.name
+                    targets.update(self._resolve_python(submodule, base))
+        return targets
+
+    def _resolve_python(self, module: str, base: str) -> Set[str]:
+        if not module and not base:
+            return set()
+        relative = module.replace('.', '/')
+        roots = [base] if base else ["", "src"]
+        found = set()
+        for root in roots:
+            stem = os.path.normpath(os.path.join(root, relative)) if relative else os.path.normpath(root)
+            for candidate in (f"{stem}.py", os.path.join(stem, "__init__.py")):
+                if candidate in self.files:
+                    found.add(candidate)
+        return found
+
+    # JavaScript / TypeScript
+
+    def _js_imports(self, path: str, content: str) -> Set[str]:
+        targets = set()
+        directory = os.path.dirname(path)
+        for specifier in JS_IMPORT.findall(content):
+            if not specifier.startswith('.'):
+                continue
+            stem = os.path.normpath(os.path.join(directory, specifier))
+            resolved = self._resolve_js(stem)
+            if resolved:
+                targets.add(resolved)
+        return targets
+
+    def _resolve_js(self, stem: str) -> Optional[str]:
+        if stem in self.files:
+            return stem
+        # TS sources are often imported with a .js suffix
+        base = re.sub(r'\.[cm]?js$', '', stem)
+        for extension in JS_EXTENSIONS:
+            if base + extension in self.files:
+                return base + extension
+        for extension in JS_EXTENSIONS:
+            index = os.path.join(stem, "index" + extension)
+            if index in self.files:
+                return index
+        return None
+
+    # Go: files in one directory form a package and see each other
+
+    def _read_go_module(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.repo_dir, 'go.mod'), 'r', encoding='utf-8') as f:
+                match = re.search(r'^module\s+(\S+)', f.read(), re.MULTILINE)
+                return match.group(1) if match else None
+        except OSError:
+            return None
+
+    def _go_imports(self, path: str, content: str, packages: Dict[str, List[str]]) -> Set[str]:
+        targets = set(packages.get(os.path.dirname(path), []))
+        if not self.go_module:
+            return targets
+
+        imports = GO_IMPORT_LINE.findall(content)
+        for block in GO_IMPORT_BLOCK.findall(content):
+            imports.extend(GO_IMPORT_PATH.findall(block))
+        for imported in imports:
+            if imported == self.go_module or imported.startswith(self.go_module + '/'):
+                directory = imported[len(self.go_module):].lstrip('/')
+                targets.update(
+                    f for f in packages.get(directory, []) if not f.endswith('_test.go')
+                )
+        return targets
@@ -0,0 +1,173 @@
+"""
+Job Queue - Durable SQLite queue of agent runs shared by the API and worker processes
+"""
+import os
+import json
+import time
+import sqlite3
+import tempfile
+from typing import Dict, Optional
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    heartbeat REAL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS snapshots (
+    run_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def default_queue_path() -> str:
+    return os.getenv("RIFT_QUEUE_DB", os.path.join(tempfile.gettempdir(), "rift_jobs.db"))
+
+
+class JobQueue:
+    """
+    Runs waiting for or held by a worker, plus the latest state each worker
+    reported for its runs. A worker holds a job through a lease it renews
+    with `heartbeat`; if the worker dies, the lease expires and another
+    worker claims the job (up to `max_attempts` times).
+
+    Every process opens its own connection; SQLite's WAL mode lets the API
+    read snapshots while workers write them.
+    """
+
+    def __init__(self, path: str = None, lease: float = None, max_attempts: int = None):
+        self.path = path or default_queue_path()
+        self.lease = lease or float(os.getenv("WORKER_LEASE_SECONDS", 60))
+        self.max_attempts = max_attempts or int(os.getenv("WORKER_MAX_ATTEMPTS", 3))
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, run_id: str, payload: Dict):
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO jobs (run_id, payload, status, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (run_id, json.dumps(payload), QUEUED, now, now)
+        )
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Take the oldest queued job, or one whose worker stopped renewing its lease"""
+        now = time.time()
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT run_id, payload, attempts FROM jobs"
+                " WHERE status = ? OR (status = ? AND heartbeat < ?)"
+                " ORDER BY created LIMIT 1",
+                (QUEUED, RUNNING, now - self.lease)
+            ).fetchone()
+            if row is None:
+                return None
+            run_id, payload, attempts = row
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE run_id = ?",
+                    (FAILED, f"Gave up after {attempts} attempts", now, run_id)
+                )
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = ?, heartbeat = ?, updated = ?"
+                " WHERE run_id = ?",
+                (RUNNING, worker, attempts + 1, now, now, run_id)
+            )
+        return {"run_id": run_id, "attempt": attempts + 1, **json.loads(payload)}
+
+    def heartbeat(self, run_id: str, worker: str):
+        self._conn.execute(
+            "UPDATE jobs SET heartbeat = ? WHERE run_id = ? AND worker = ?",
+            (time.time(), run_id, worker)
+        )
+
+    def release(self, run_id: str, worker: str):
+        """Hand a job back without counting the attempt (worker shutting down)"""
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, attempts = attempts - 1, updated = ?"
+            " WHERE run_id = ? AND worker = ? AND status = ?",
+            (QUEUED, time.time(), run_id, worker, RUNNING)
+        )
+
+    def finish(self, run_id: str, worker: str, error: Optional[str] = None):
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE run_id = ? AND worker = ?",
+            (FAILED if error else DONE, error, time.time(), run_id, worker)
+        )
+
+    def job(self, run_id: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT status, worker, attempts, error FROM jobs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("status", "worker", "attempts", "error"), row))
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def publish(self, run_id: str, data: Dict):
+        """Store a run's latest state, replacing the previous snapshot"""
+        self._conn.execute(
+            "INSERT INTO snapshots (run_id, version, data, updated) VALUES (?, 1, ?, ?)"
+            " ON CONFLICT (run_id) DO UPDATE SET"
+            " version = version + 1, data = excluded.data, updated = excluded.updated",
+            (run_id, json.dumps(data), time.time())
+        )
+
+    def snapshot(self, run_id: str, newer_than: int = 0) -> Optional[Dict]:
+        """The run's latest snapshot if its version is above `newer_than`"""
+        row = self._conn.execute(
+            "SELECT version, data FROM snapshots WHERE run_id = ? AND version > ?", (run_id, newer_than)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "data": json.loads(row[1])}
+
+    def _transaction(self):
+        return _Immediate(self._conn)
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT, so two workers cannot claim the same job"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return this process's connection to the job queue"""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
@@ -0,0 +1,250 @@
+"""
+LLM Client - Process-wide, rate-limited access to the fix generation model
+"""
+import os
+import time
+import random
+import asyncio
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .llm_providers import LLMProvider, create_provider
+from .context_builder import estimate_tokens
+from .metrics import get_metrics
+
+
+# Exception names / messages that indicate a transient provider failure
+RETRIABLE_ERRORS = (
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "Timeout"
+)
+RETRIABLE_MESSAGES = ("429", "500", "503", "rate limit", "quota", "timed out", "timeout")
+
+
+class LLMCallError(Exception):
+    """Raised when the model call fails after all retries"""
+
+
+class LLMResponse:
+    """Text returned by the model plus timing for the call"""
+
+    def __init__(self, text: str, latency: float, queue_wait: float, attempts: int):
+        self.text = text
+        self.latency = latency
+        self.queue_wait = queue_wait
+        self.attempts = attempts
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while, e.g. after a 429"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LLMClient:
+    """
+    Shared model client. All runs in the process go through one token
+    bucket and one concurrency cap, transient failures are retried with
+    jittered exponential backoff, and identical prompts already in flight
+    are answered by the same call.
+    """
+
+    def __init__(self, requests_per_minute: int = None, max_concurrency: int = None,
+                 max_retries: int = None, provider: LLMProvider = None):
+        self.requests_per_minute = requests_per_minute or int(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", 4))
+        self.backoff_base = 1.0
+        self.backoff_cap = 30.0
+
+        self.provider = provider or create_provider()
+
+        # Dedicated threads so blocking SDK calls never starve the default pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="llm"
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bucket: Optional[TokenBucket] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "coalesced": 0,
+            "rate_limited": 0
+        }
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+
+    @property
+    def available(self) -> bool:
+        return self.provider.available
+
+    def _bind_loop(self):
+        """(Re)create asyncio primitives for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = TokenBucket(
+                rate=self.requests_per_minute / 60.0,
+                capacity=max(1, self.max_concurrency)
+            )
+            self._inflight = {}
+        return loop
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        """Generate a completion, sharing the call with identical in-flight prompts"""
+        if not self.available:
+            raise LLMCallError("No model configured")
+
+        loop = self._bind_loop()
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The task that owned the call was cancelled, not this one:
+                # make the call here instead of failing
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.generate(prompt)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._generate_with_retry(prompt)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure does not warn on GC
+            future.exception()
+            raise
+        finally:
+            # Owner cancelled (BaseException): release callers sharing the call
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    async def _generate_with_retry(self, prompt: str) -> LLMResponse:
+        loop = asyncio.get_running_loop()
+        queue_wait = 0.0
+
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            wall_queued_at = time.time()
+            metrics = get_metrics()
+            async with self._semaphore:
+                await self._bucket.acquire()
+                waited = time.monotonic() - queued_at
+                queue_wait += waited
+                metrics.record_event("llm.wait", "llm", wall_queued_at, waited, {"attempt": attempt + 1})
+
+                started = time.monotonic()
+                try:
+                    self.stats["calls"] += 1
+                    async with metrics.span("llm.call", provider=self.provider.name, attempt=attempt + 1):
+                        text = await loop.run_in_executor(
+                            self._executor, self.provider.generate, prompt
+                        )
+                    latency = time.monotonic() - started
+                    self._latencies.append(latency)
+                    self._queue_waits.append(queue_wait)
+                    metrics.inc("rift_llm_calls_total", provider=self.provider.name, outcome="ok")
+                    metrics.observe("rift_llm_latency_seconds", latency, provider=self.provider.name)
+                    metrics.observe("rift_llm_queue_wait_seconds", queue_wait, provider=self.provider.name)
+                    metrics.inc("rift_llm_prompt_tokens_total", estimate_tokens(prompt), provider=self.provider.name)
+                    metrics.inc("rift_llm_response_tokens_total", estimate_tokens(text), provider=self.provider.name)
+                    return LLMResponse(text, latency, queue_wait, attempt + 1)
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    metrics.inc("rift_llm_calls_total", provider=self.provider.name, outcome="error")
+                    error = e
+
+            if not self._is_retriable(error) or attempt == self.max_retries:
+                raise LLMCallError(f"{type(error).__name__}: {error}") from error
+
+            # Full jitter keeps concurrent callers from retrying in lockstep
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            if self._is_rate_limit(error):
+                self.stats["rate_limited"] += 1
+                self._bucket.pause(delay)
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _is_retriable(self, error: Exception) -> bool:
+        name = type(error).__name__
+        message = str(error).lower()
+        return any(n in name for n in RETRIABLE_ERRORS) or \
+            any(m in message for m in RETRIABLE_MESSAGES)
+
+    def _is_rate_limit(self, error: Exception) -> bool:
+        message = str(error).lower()
+        return "ResourceExhausted" in type(error).__name__ or "429" in message or "quota" in message
+
+    def get_stats(self) -> Dict:
+        """Call counters plus latency and queue-wait percentiles (seconds)"""
+        return {
+            "provider": self.provider.name,
+            **self.stats,
+            "in_flight": len(self._inflight),
+            "latency": _percentiles(self._latencies),
+            "queue_wait": _percentiles(self._queue_waits)
+        }
+
+
+def _percentiles(samples) -> Dict:
+    if not samples:
+        return {"count": 0, "mean": 0, "p50": 0, "p95": 0, "max": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3)
+    }
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = LLMClient()
+    return _client
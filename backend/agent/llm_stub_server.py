@@ -0,0 +1,95 @@
+"""
+LLM Stub Server - Localhost HTTP stand-in for the model, for offline load tests
+
+Run with:
+    python -m backend.agent.llm_stub_server --port 8765 --latency 0.8 --error-rate 0.05 --max-rps 2
+
+and point the backend at it with LLM_PROVIDER=http LLM_STUB_URL=http://127.0.0.1:8765
+"""
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from .llm_providers import StubProvider, StubRateLimitError, StubServerError
+
+
+def make_handler(provider: StubProvider):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/generate":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                prompt = json.loads(self.rfile.read(length).decode('utf-8'))["prompt"]
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": f"bad request: {e}"})
+                return
+
+            try:
+                self._send(200, {"text": provider.generate(prompt)})
+            except StubRateLimitError as e:
+                self._send(429, {"error": str(e)})
+            except StubServerError as e:
+                self._send(503, {"error": str(e)})
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", "calls": provider.calls})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(provider: StubProvider = None, host: str = "127.0.0.1",
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub server on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(provider or StubProvider()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=None, help="mean response latency (s)")
+    parser.add_argument("--jitter", type=float, default=None, help="latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=None, help="fraction of 503 responses")
+    parser.add_argument("--max-rps", type=float, default=None, help="requests/s before 429 (0 = unlimited)")
+    parser.add_argument("--script", default=None, help="JSON file of scripted responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    provider = StubProvider(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        max_rps=args.max_rps, script_path=args.script, seed=args.seed
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(provider))
+    print(f"[RIFT] LLM stub server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
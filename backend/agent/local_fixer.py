@@ -0,0 +1,328 @@
+"""
+Local Fixer - Deterministic rewrites for mechanical issues, no LLM needed
+"""
+import ast
+import re
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Lines after which a JS statement clearly continues, so no semicolon is added
+JS_CONTINUATION_ENDINGS = (
+    ';', '{', '}', '(', '[', ',', '.', '+', '-', '*', '/', '%', '=', '&', '|',
+    '?', ':', '<', '>', '!', '~', '^', '=>', '*/', '\\'
+)
+JS_BLOCK_STATEMENT = re.compile(r'^\s*(?:}\s*)?(?:if|for|while|else|do|switch|try|catch|finally|function|class)\b')
+JS_CONTINUATION_STARTS = ('.', '?', ':', '+', '-', '*', '/', '&&', '||', ')', ']', '}', '=>')
+# Characters after which `{` opens an object literal rather than a block
+JS_LITERAL_CONTEXT = set('=(,:[?!&|+-*%<~^')
+JS_LITERAL_KEYWORDS = ('return', 'yield', 'await', 'typeof', 'in', 'of')
+
+PY_BLOCK_KEYWORD = re.compile(
+    r'^\s*(?:async\s+)?(?:def|class|if|elif|else|for|while|try|except|finally|with)\b'
+)
+
+UNUSED_IMPORT = re.compile(
+    r"unused import[:\s]+'?([\w.]+)'?|unused ([\w.]+) imported from|'([\w.]+)' imported but unused",
+    re.IGNORECASE
+)
+
+STDLIB_MODULES = getattr(sys, 'stdlib_module_names', frozenset())
+
+
+class LocalFixer:
+    """
+    Applies rule-based edits for lint-class findings: missing semicolons,
+    unused imports, trailing whitespace, import ordering and missing
+    colons on Python block statements.
+    """
+
+    def __init__(self):
+        self.rules: List[Tuple[Callable[[Dict], bool], Callable, str]] = [
+            (self._is_trailing_whitespace, self._fix_trailing_whitespace, "Remove trailing whitespace"),
+            (self._is_missing_semicolon, self._fix_missing_semicolon, "Add missing semicolon"),
+            (self._is_unused_import, self._fix_unused_import, "Remove unused import"),
+            (self._is_import_order, self._fix_import_order, "Sort imports"),
+            (self._is_missing_colon, self._fix_missing_colon, "Add missing colon"),
+        ]
+
+    def can_fix(self, issue: Dict) -> bool:
+        return any(matches(issue) for matches, _, _ in self.rules)
+
+    def fix(self, issue: Dict, content: str) -> Optional[Dict]:
+        """
+        Try to fix `issue` in `content`. Returns None when no rule applies,
+        otherwise a dict with `fixed_code` (None if the issue is already gone)
+        and `commit_message`.
+        """
+        for matches, apply, message in self.rules:
+            if not matches(issue):
+                continue
+
+            trailing_newline = content.endswith('\n')
+            lines = content.split('\n')
+            if trailing_newline:
+                lines = lines[:-1]
+
+            fixed_lines = apply(lines, issue)
+            if fixed_lines is None:
+                continue
+
+            fixed = '\n'.join(fixed_lines) + ('\n' if trailing_newline else '')
+            return {
+                "fixed_code": fixed if fixed != content else None,
+                "commit_message": message
+            }
+        return None
+
+    # Matchers
+
+    def _description(self, issue: Dict) -> str:
+        return issue.get("description", "").lower()
+
+    def _is_trailing_whitespace(self, issue: Dict) -> bool:
+        return "trailing whitespace" in self._description(issue) or \
+            "no-trailing-spaces" in self._description(issue)
+
+    def _is_missing_semicolon(self, issue: Dict) -> bool:
+        return "missing semicolon" in self._description(issue) and \
+            issue["file"].endswith(('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'))
+
+    def _is_unused_import(self, issue: Dict) -> bool:
+        return issue["file"].endswith('.py') and bool(UNUSED_IMPORT.search(issue.get("description", "")))
+
+    def _is_import_order(self, issue: Dict) -> bool:
+        description = self._description(issue)
+        return issue["file"].endswith('.py') and (
+            "should be placed before" in description
+            or "wrong-import-order" in description
+            or "imports are incorrectly sorted" in description
+            or "import order" in description
+        )
+
+    def _is_missing_colon(self, issue: Dict) -> bool:
+        description = self._description(issue)
+        return issue["file"].endswith('.py') and (
+            "missing colon" in description or "expected ':'" in description
+        )
+
+    # Rewrites: each returns the new lines, or None if the rule does not apply
+
+    def _fix_trailing_whitespace(self, lines: List[str], issue: Dict) -> Optional[List[str]]:
+        # Whitespace before the newline of a multi-line string is part of the string
+        states = _scan_lines(lines, python=issue["file"].endswith('.py'))
+        return [line if in_string else line.rstrip()
+                for line, (in_string, _) in zip(lines, states)]
+
+    def _fix_missing_semicolon(self, lines: List[str], issue: Dict) -> Optional[List[str]]:
+        index = issue["line"] - 1
+        if not 0 <= index < len(lines):
+            return None
+
+        line = lines[index]
+        code = line.rstrip()
+        stripped = code.strip()
+        if not stripped or stripped.startswith(('//', '/*', '*', '<', '@', '#')):
+            return None
+        if code.endswith(';'):
+            # Already fixed by an earlier edit
+            return lines
+        if code.endswith(JS_CONTINUATION_ENDINGS) or JS_BLOCK_STATEMENT.match(code) or '//' in code:
+            return None
+
+        following = next((l.strip() for l in lines[index + 1:] if l.strip()), "")
+        if following.startswith(JS_CONTINUATION_STARTS):
+            return None
+
+        # Inside a call, array or object literal a semicolon is a syntax error
+        in_string, brackets = _scan_lines(lines[:index + 1], python=False)[-1]
+        if in_string or (brackets and brackets[-1] != '{'):
+            return None
+
+        fixed = list(lines)
+        fixed[index] = code + ';' + line[len(code):]
+        return fixed
+
+    def _fix_unused_import(self, lines: List[str], issue: Dict) -> Optional[List[str]]:
+        match = UNUSED_IMPORT.search(issue.get("description", ""))
+        name = next(group for group in match.groups() if group)
+        tree = _parse('\n'.join(lines))
+        if tree is None:
+            return None
+
+        for node in tree.body:
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                continue
+            bound = [(alias, alias.asname or alias.name) for alias in node.names]
+            remaining = [alias for alias, binding in bound
+                         if binding != name and alias.name != name]
+            if len(remaining) == len(node.names):
+                continue
+
+            start, end = node.lineno - 1, node.end_lineno
+            indent = lines[start][:len(lines[start]) - len(lines[start].lstrip())]
+            if not remaining:
+                return lines[:start] + lines[end:]
+            return lines[:start] + [indent + _render_import(node, remaining)] + lines[end:]
+
+        # Name no longer imported: the issue was already fixed
+        return lines
+
+    def _fix_import_order(self, lines: List[str], issue: Dict) -> Optional[List[str]]:
+        tree = _parse('\n'.join(lines))
+        if tree is None:
+            return None
+
+        # Only reorder the leading run of single-line, top-level imports
+        block = []
+        for node in tree.body:
+            if isinstance(node, ast.Expr) and isinstance(getattr(node, 'value', None), ast.Constant) \
+                    and not block:
+                continue  # module docstring
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                break
+            if node.end_lineno != node.lineno:
+                return None
+            block.append(node)
+        if len(block) < 2:
+            return None
+
+        start, end = block[0].lineno - 1, block[-1].lineno
+        region = lines[start:end]
+        if any(l.strip().startswith('#') for l in region):
+            # Comments are attached to specific imports; leave them alone
+            return None
+
+        statements = [lines[node.lineno - 1] for node in block]
+        grouped: Dict[int, List[Tuple[str, str]]] = {}
+        for node, text in zip(block, statements):
+            grouped.setdefault(_import_group(node), []).append((_import_sort_key(node), text))
+
+        ordered = []
+        for group in sorted(grouped):
+            if ordered:
+                ordered.append('')
+            ordered.extend(text for _, text in sorted(grouped[group]))
+        return lines[:start] + ordered + lines[end:]
+
+    def _fix_missing_colon(self, lines: List[str], issue: Dict) -> Optional[List[str]]:
+        index = issue["line"] - 1
+        # Parser errors sometimes point at the line after the block header
+        for candidate in (index, index - 1):
+            if not 0 <= candidate < len(lines):
+                continue
+            code = lines[candidate].rstrip()
+            if not PY_BLOCK_KEYWORD.match(code) or '#' in code:
+                continue
+            if code.endswith(':'):
+                return lines
+            if code.count('(') != code.count(')') or code.count('[') != code.count(']'):
+                continue
+            fixed = list(lines)
+            fixed[candidate] = code + ':'
+            return fixed
+        return None
+
+
+def _scan_lines(lines: List[str], python: bool) -> List[Tuple[bool, List[str]]]:
+    """
+    Lexical state at the end of each line: whether it ends inside a string
+    (multi-line string, template literal or backslash continuation), and
+    the brackets still open. An open `{` is reported as '{' for a block and
+    '{literal' for an object literal (JS). Comments are skipped; regex
+    literals are not recognized.
+    """
+    states = []
+    quote = None        # delimiter of the string being read, '/*' in a block comment
+    stack: List[str] = []
+    last = ''           # last two significant characters outside strings
+    word = ''           # last identifier outside strings
+    for line in lines:
+        i, n = 0, len(line)
+        continued = False
+        while i < n:
+            char = line[i]
+            if quote == '/*':
+                if line.startswith('*/', i):
+                    quote = None
+                    i += 1
+            elif quote:
+                if char == '\\':
+                    continued = i == n - 1
+                    i += 1
+                elif line.startswith(quote, i):
+                    i += len(quote) - 1
+                    quote = None
+                elif quote == '`' and line.startswith('${', i):
+                    stack.append('${')
+                    quote = None
+                    i += 1
+            elif (python and char == '#') or (not python and line.startswith('//', i)):
+                break
+            elif not python and line.startswith('/*', i):
+                quote = '/*'
+                i += 1
+            elif char in '\'"' or (char == '`' and not python):
+                triple = char * 3
+                quote = triple if python and line.startswith(triple, i) else char
+                i += len(quote) - 1
+            else:
+                if char in '([':
+                    stack.append(char)
+                elif char == '{':
+                    literal = last[-1:] in JS_LITERAL_CONTEXT and last != '=>' or word in JS_LITERAL_KEYWORDS
+                    stack.append('{literal' if literal else '{')
+                elif char in ')]}' and stack:
+                    if stack.pop() == '${':
+                        quote = '`'
+                if char.isalnum() or char in '_$':
+                    joined = i > 0 and (line[i - 1].isalnum() or line[i - 1] in '_$')
+                    word = word + char if joined else char
+                    last = (last + char)[-2:]
+                elif not char.isspace():
+                    word = ''
+                    last = (last + char)[-2:]
+            i += 1
+        # Only triple-quoted strings, template literals and continued lines span lines
+        if quote in ("'", '"') and not continued:
+            quote = None
+        states.append((quote is not None and quote != '/*', list(stack)))
+    return states
+
+
+def _parse(content: str) -> Optional[ast.AST]:
+    try:
+        return ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def _render_import(node: ast.AST, aliases: List[ast.alias]) -> str:
+    names = ', '.join(
+        f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+        for alias in aliases
+    )
+    if isinstance(node, ast.ImportFrom):
+        module = '.' * node.level + (node.module or '')
+        return f"from {module} import {names}"
+    return f"import {names}"
+
+
+def _import_group(node: ast.AST) -> int:
+    """0 = __future__, 1 = stdlib, 2 = third party, 3 = relative"""
+    if isinstance(node, ast.ImportFrom):
+        if node.level:
+            return 3
+        module = node.module or ''
+    else:
+        module = node.names[0].name
+    root = module.split('.')[0]
+    if root == '__future__':
+        return 0
+    return 1 if root in STDLIB_MODULES else 2
+
+
+def _import_sort_key(node: ast.AST) -> str:
+    if isinstance(node, ast.ImportFrom):
+        return f"1 {node.module or ''}".lower()
+    return f"0 {node.names[0].name}".lower()
@@ -0,0 +1,108 @@
+"""
+Log Store - Compact per-run log lines, turned into dicts only when served
+"""
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+# Log types are a handful of strings repeated on every line; each run
+# stores a small code per line and the process keeps one copy of the name
+_type_names: List[str] = []
+_type_codes: Dict[str, int] = {}
+
+
+def _type_code(log_type: str) -> int:
+    code = _type_codes.get(log_type)
+    if code is None:
+        code = _type_codes[log_type] = len(_type_names)
+        _type_names.append(log_type)
+    return code
+
+
+class RunLog:
+    """
+    A run's log as three columns: creation times (float seconds), type
+    codes and messages. A line's sequence number is its position, so ids
+    and ISO timestamps are only formatted for the lines an endpoint
+    returns. Costs about 18 bytes per line besides the message itself.
+
+    Resuming from a checkpoint restores an older, shorter log, so sequence
+    numbers after it repeat ones already served. `epoch` counts those
+    resumes; a client that sees it change must re-read from the start.
+    """
+
+    __slots__ = ("run_id", "epoch", "_times", "_types", "_messages")
+
+    def __init__(self, run_id: str, epoch: int = 0):
+        self.run_id = run_id
+        self.epoch = epoch
+        self._times = array('d')
+        self._types = array('H')
+        self._messages: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def append(self, message: str, log_type: str = "info", created: float = None) -> int:
+        """Add a line and return its sequence number"""
+        self._times.append(created if created is not None else time.time())
+        self._types.append(_type_code(log_type))
+        self._messages.append(message)
+        return len(self._messages) - 1
+
+    def entry(self, seq: int) -> Dict:
+        return {
+            "id": f"{self.run_id}_{seq}",
+            "seq": seq,
+            "timestamp": datetime.fromtimestamp(self._times[seq]).isoformat(),
+            "message": self._messages[seq],
+            "type": _type_names[self._types[seq]]
+        }
+
+    def entries(self, limit: Optional[int] = None, after: Optional[int] = None) -> List[Dict]:
+        """
+        Lines as API dicts: the last `limit` lines, or with `after`, the
+        first `limit` lines whose sequence number is greater than it
+        """
+        total = len(self._messages)
+        if after is not None:
+            start = max(after + 1, 0)
+            end = total if limit is None else min(total, start + max(limit, 0))
+        else:
+            end = total
+            start = 0 if limit is None else max(total - max(limit, 0), 0)
+        return [self.entry(seq) for seq in range(start, end)]
+
+    def export(self) -> Dict:
+        """Plain, columnar data for checkpoints and worker snapshots"""
+        codes = sorted(set(self._types))
+        local = {code: index for index, code in enumerate(codes)}
+        return {
+            "epoch": self.epoch,
+            "types": [_type_names[code] for code in codes],
+            "codes": [local[code] for code in self._types],
+            "times": self._times.tolist(),
+            "messages": list(self._messages)
+        }
+
+    @classmethod
+    def restore(cls, run_id: str, data: Union[Dict, List, None]) -> "RunLog":
+        """Rebuild from `export`, or from the list of dicts older checkpoints hold"""
+        log = cls(run_id)
+        if not data:
+            return log
+        if isinstance(data, dict):
+            log.epoch = data.get("epoch", 0)
+            codes = [_type_code(name) for name in data["types"]]
+            log._times = array('d', data["times"])
+            log._types = array('H', (codes[code] for code in data["codes"]))
+            log._messages = list(data["messages"])
+            return log
+        for entry in data:
+            try:
+                created = datetime.fromisoformat(entry["timestamp"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                created = time.time()
+            log.append(entry.get("message", ""), entry.get("type", "info"), created)
+        return log
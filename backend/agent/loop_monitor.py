@@ -0,0 +1,146 @@
+"""
+Loop Monitor - Measures event-loop lag and reports the code that blocked the loop
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+from .metrics import get_metrics
+
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Frames kept from the blocked stack, innermost last
+STACK_DEPTH = 12
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """
+    A sampler task sleeps for `interval` and records how late it woke up:
+    that delay is time the loop spent running something else without
+    yielding. A watchdog thread notices when the sampler is overdue by more
+    than `threshold` and, while the loop is still stuck, captures the loop
+    thread's stack. When the loop comes back, the stall is logged with that
+    stack and counted per blocking site in /metrics.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None):
+        self.enabled = os.getenv("LOOP_MONITOR", "true").lower() == "true"
+        self.interval = interval or float(os.getenv("LOOP_MONITOR_INTERVAL", 0.1))
+        self.threshold = threshold or float(os.getenv("LOOP_STALL_THRESHOLD", 0.25))
+        self.recent = deque(maxlen=20)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = 0.0
+        self._captured: Optional[Dict] = None
+
+    def start(self):
+        """Start monitoring the running loop"""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample(self):
+        metrics = get_metrics()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            metrics.observe("rift_event_loop_lag_seconds", lag, buckets=LAG_BUCKETS)
+            if lag >= self.threshold:
+                self._report(lag)
+            else:
+                self._captured = None
+
+    def _watch(self):
+        # Poll often enough to catch the loop while it is still blocked
+        while not self._stopped.wait(min(self.interval, self.threshold / 2)):
+            heartbeat = self._heartbeat
+            if self._captured is not None or time.monotonic() - heartbeat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop)
+            captured = {
+                "site": _blocking_site(frame),
+                "task": task.get_name() if task else None,
+                "stack": traceback.format_stack(frame)[-STACK_DEPTH:]
+            }
+            del frame
+            # The loop may have moved on while the stack was being taken
+            if self._heartbeat == heartbeat:
+                self._captured = captured
+
+    def _report(self, lag: float):
+        captured = self._captured or {"site": "unknown", "task": None, "stack": []}
+        self._captured = None
+        metrics = get_metrics()
+        metrics.inc("rift_event_loop_stalls_total", site=captured["site"])
+        metrics.observe("rift_event_loop_stall_seconds", lag, buckets=LAG_BUCKETS)
+        self.recent.append({"time": time.time(), "duration": round(lag, 3), **captured})
+
+        print(f"[RIFT] Event loop blocked for {lag:.3f}s at {captured['site']}"
+              f" (task {captured['task'] or 'unknown'})")
+        if captured["stack"]:
+            print("".join(captured["stack"]).rstrip())
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "threshold": self.threshold,
+            "recent_stalls": [
+                {k: v for k, v in stall.items() if k != "stack"} for stall in self.recent
+            ]
+        }
+
+
+def _blocking_site(frame) -> str:
+    """Innermost frame in this codebase, else the innermost frame"""
+    innermost = frame
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(BACKEND_DIR) and not path.endswith("loop_monitor.py"):
+            return f"{os.path.relpath(path, BACKEND_DIR)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Return the process-wide loop monitor"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor()
+    return _monitor
@@ -0,0 +1,307 @@
+"""
+Metrics - Stage spans, counters and histograms exported in Prometheus text format
+"""
+import os
+import re
+import time
+import asyncio
+import weakref
+import itertools
+import threading
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+
+# Run the current task belongs to; set by the orchestrator, inherited by child tasks
+current_run: ContextVar[Optional[str]] = ContextVar("current_run", default=None)
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Credentials embedded in URLs (https://token@host) are kept out of traces
+URL_CREDENTIALS = re.compile(r'//[^/@\s]+@')
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms keyed by name and labels.
+    Stage durations are additionally totalled per run (through the
+    `current_run` context variable) for the run's results.json, and every
+    span is kept on the run's timeline for `trace`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.help: Dict[str, str] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self.gauges: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self.histograms: Dict[str, Dict[LabelKey, _Histogram]] = defaultdict(dict)
+        self.runs: Dict[str, Dict] = defaultdict(lambda: {
+            "stages": {},
+            "counters": defaultdict(float),
+            "events": [],
+            "lanes": {},
+            "dropped_events": 0
+        })
+        self.max_trace_events = int(os.getenv("TRACE_MAX_EVENTS", 50000))
+        # Timeline lane per asyncio task (or thread), so overlapping work gets its own row
+        self._lanes = weakref.WeakKeyDictionary()
+        self._lane_ids = itertools.count(1)
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter, also totalled for the current run"""
+        with self._lock:
+            self.counters[name][_key(labels)] += value
+            run_id = current_run.get()
+            if run_id:
+                self.runs[run_id]["counters"][name] += value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[name][_key(labels)] = value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        with self._lock:
+            self.gauges[name][_key(labels)] += delta
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        with self._lock:
+            series = self.histograms[name]
+            key = _key(labels)
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    def observe_stage(self, stage: str, duration: float):
+        """Record a stage duration globally and for the current run"""
+        self.observe("rift_stage_duration_seconds", duration, stage=stage)
+        run_id = current_run.get()
+        if run_id:
+            with self._lock:
+                stats = self.runs[run_id]["stages"].setdefault(
+                    stage, {"count": 0, "total": 0.0, "max": 0.0}
+                )
+                stats["count"] += 1
+                stats["total"] += duration
+                stats["max"] = max(stats["max"], duration)
+
+    def span(self, stage: str, **args) -> "Span":
+        """Time a block as a stage; `args` are shown on its trace event"""
+        return Span(self, stage, args=args)
+
+    def subprocess_span(self, agent: str, command: str) -> "Span":
+        """Count a subprocess and put it on the run's timeline"""
+        self.inc("rift_subprocesses_total", agent=agent)
+        return Span(self, f"{agent}.subprocess", category="subprocess",
+                    args={"command": URL_CREDENTIALS.sub('//***@', command)[:500]}, observe=False)
+
+    def record_event(self, name: str, category: str, started: float, duration: float,
+                     args: Optional[Dict] = None):
+        """
+        Add a complete event to the current run's timeline. `started` is a
+        time.time() timestamp, `duration` is in seconds.
+        """
+        run_id = current_run.get()
+        if not run_id:
+            return
+        lane, lane_name = self._lane()
+        with self._lock:
+            run = self.runs[run_id]
+            if len(run["events"]) >= self.max_trace_events:
+                run["dropped_events"] += 1
+                return
+            run["lanes"].setdefault(lane, lane_name)
+            run["events"].append((name, category, started, duration, lane, args or None))
+
+    def trace(self, run_id: str) -> Optional[Dict]:
+        """The run's timeline in Chrome trace-event format (chrome://tracing, Perfetto)"""
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None or not run["events"]:
+                return None
+            events = list(run["events"])
+            lanes = dict(run["lanes"])
+            dropped = run["dropped_events"]
+
+        trace_events: List[Dict] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": f"run {run_id}"}}
+        ]
+        for lane, lane_name in sorted(lanes.items()):
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": lane_name}})
+            trace_events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": lane, "args": {"sort_index": lane}})
+        for name, category, started, duration, lane, args in sorted(events, key=lambda e: (e[2], -e[3])):
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": int(started * 1_000_000),
+                "dur": max(1, int(duration * 1_000_000)),
+                "pid": 1,
+                "tid": lane
+            }
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run_id": run_id, "dropped_events": dropped}
+        }
+
+    def discard_run(self, run_id: str):
+        """Free everything recorded for a run once its summary and timeline are saved elsewhere"""
+        with self._lock:
+            self.runs.pop(run_id, None)
+
+    def _lane(self) -> Tuple[int, str]:
+        try:
+            owner = asyncio.current_task()
+        except RuntimeError:
+            owner = None
+        if owner is None:
+            owner = threading.current_thread()
+        with self._lock:
+            lane = self._lanes.get(owner)
+            if lane is None:
+                lane = self._lanes[owner] = next(self._lane_ids)
+        return lane, owner.get_name() if isinstance(owner, asyncio.Task) else owner.name
+
+    def run_summary(self, run_id: str) -> Dict:
+        """Per-stage totals and counters recorded while `run_id` was current"""
+        with self._lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return {"stages": {}, "counters": {}}
+            return {
+                "stages": {
+                    stage: {**stats, "total": round(stats["total"], 3), "max": round(stats["max"], 3)}
+                    for stage, stats in sorted(run["stages"].items())
+                },
+                "counters": {name: value for name, value in sorted(run["counters"].items())}
+            }
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                self._header(lines, name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name, series in sorted(self.gauges.items()):
+                self._header(lines, name, "gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name, series in sorted(self.histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.total)}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines, name: str, kind: str):
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+class Span:
+    """
+    Times a block (`with` or `async with`) as a named stage and records it
+    on the run's timeline. With `observe=False` it is only a trace event.
+    """
+
+    def __init__(self, registry: MetricsRegistry, stage: str, category: str = None,
+                 args: Optional[Dict] = None, observe: bool = True):
+        self.registry = registry
+        self.stage = stage
+        self.category = category or stage.split(".")[0]
+        self.args = args
+        self.observe = observe
+        self.started = 0.0
+        self.wall_started = 0.0
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.monotonic() - self.started
+        if self.observe:
+            self.registry.observe_stage(self.stage, duration)
+        args = self.args
+        if exc_type is not None:
+            args = {**(args or {}), "error": exc_type.__name__}
+        self.registry.record_event(self.stage, self.category, self.wall_started, duration, args)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(round(value, 6))
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+        _registry.describe("rift_stage_duration_seconds", "Duration of agent stages and spans")
+        _registry.describe("rift_subprocesses_total", "Subprocesses started by agents")
+        _registry.describe("rift_llm_latency_seconds", "Model call latency")
+        _registry.describe("rift_llm_queue_wait_seconds", "Time model calls waited for a rate-limit slot")
+        _registry.describe("rift_llm_prompt_tokens_total", "Estimated tokens sent to the model")
+        _registry.describe("rift_llm_response_tokens_total", "Estimated tokens received from the model")
+        _registry.describe("rift_pipeline_queue_depth", "Issues waiting in fix pipeline queues")
+        _registry.describe("rift_active_runs", "Agent runs currently executing")
+        _registry.describe("rift_github_requests_total", "GitHub API requests by method and status")
+        _registry.describe("rift_event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up")
+        _registry.describe("rift_event_loop_stalls_total", "Event loop stalls past the threshold, by blocking site")
+        _registry.describe("rift_event_loop_stall_seconds", "Duration of event loop stalls")
+    return _registry
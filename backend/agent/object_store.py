@@ -0,0 +1,62 @@
+"""
+Object Store - Shared bare repository whose objects clones borrow through git alternates
+"""
+import os
+import hashlib
+from typing import Optional
+
+from .test_cache import default_cache_dir
+from .deps_cache import EntryLock
+
+
+# Objects borrowed by workspaces through alternates must never be pruned
+GC_CONFIG = {
+    "gc.auto": "0",
+    "gc.autoPackLimit": "0",
+    "gc.pruneExpire": "never",
+    "gc.reflogExpireUnreachable": "never",
+}
+
+
+class SharedObjectStore:
+    """
+    Every repository is fetched into one bare repo (under its own ref
+    namespace) before it is cloned with `--reference`, so the clone only
+    links to objects the store already has. Forks of the same upstream and
+    repeated runs on the same repository download only what is new.
+
+    Fetches for repositories with the same name (forks, usually) are
+    serialized, across worker processes too, so the second one negotiates
+    against the first one's objects instead of downloading them in parallel.
+
+    The store is never garbage collected: workspaces depend on its objects,
+    including ones a force-push or branch deletion left unreferenced. Auto
+    gc and pruning are switched off in its config (see `GC_CONFIG`).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(default_cache_dir(), "git", "objects.git")
+        self.enabled = os.getenv("GIT_SHARED_OBJECTS", "true").lower() == "true"
+
+    def namespace(self, repo_url: str) -> str:
+        """Ref namespace holding `repo_url`'s branches"""
+        return f"refs/rift/{hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:16]}"
+
+    def family_lock(self, repo_url: str) -> EntryLock:
+        """File lock shared by every process fetching a repository of this name"""
+        family = repo_url.rstrip('/').split('/')[-1].replace('.git', '').lower()
+        return EntryLock(os.path.join(os.path.dirname(self.path), "locks", family))
+
+    def exists(self) -> bool:
+        return os.path.isfile(os.path.join(self.path, "HEAD"))
+
+
+_store: Optional[SharedObjectStore] = None
+
+
+def get_object_store() -> SharedObjectStore:
+    """Return the process-wide shared object store"""
+    global _store
+    if _store is None:
+        _store = SharedObjectStore()
+    return _store
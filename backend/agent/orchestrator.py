@@ -9,10 +9,15 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from .git_agent import GitAgent
-from .scanner_agent import ScannerAgent
+from .scanner_agent import get_scanner_agent
 from .fixer_agent import FixerAgent
-from .test_agent import TestAgent
+from .test_agent import get_test_agent
 from .state_manager import StateManager
+from .pipeline import FixPipeline
+from .checkpoint import get_checkpoint_store
+from .capabilities import get_capabilities
+from .metrics import get_metrics, current_run
+from .progress import ProgressTracker, STOP_TESTS_PASSED, STOP_RETRY_LIMIT
 
 
 class AgentOrchestrator:
@@ -21,33 +26,69 @@ class AgentOrchestrator:
     """
     
     def __init__(self, repo_url: str, team_name: str, team_leader: str, 
-                 retry_limit: int, state_manager: StateManager):
+                 retry_limit: int, state_manager: StateManager, run_id: Optional[str] = None):
         self.repo_url = repo_url
         self.team_name = team_name
         self.team_leader = team_leader
         self.retry_limit = retry_limit
         self.state_manager = state_manager
         
-        self.run_id = str(uuid.uuid4())
+        self.run_id = run_id or str(uuid.uuid4())
         self.branch_name = self._generate_branch_name()
         self.workspace_dir = f"/tmp/agent_workspace_{self.run_id}"
         
-        # Initialize agents
+        # Initialize agents. The git agent owns this run's workspace and the
+        # fixer this run's patch mode; scanning and testing are shared
         self.git_agent = GitAgent(self.workspace_dir)
-        self.scanner_agent = ScannerAgent()
+        self.scanner_agent = get_scanner_agent()
         self.fixer_agent = FixerAgent()
-        self.test_agent = TestAgent()
+        self.test_agent = get_test_agent()
         
-        # Initialize state
-        self.state_manager.initialize_run(self.run_id, {
-            "repo_url": repo_url,
-            "team_name": team_name,
-            "team_leader": team_leader,
-            "branch_name": self.branch_name,
-            "retry_limit": retry_limit,
-            "start_time": datetime.now().isoformat()
-        })
+        # Test selection: run only tests affected by each iteration's changes
+        self.test_selection = os.getenv("TEST_SELECTION", "impact").lower()
+        self.full_suite_every = int(os.getenv("TEST_FULL_SUITE_EVERY", 3))
+        
+        # Fix workers commit concurrently; git's index takes one writer at a time
+        self._commit_lock = asyncio.Lock()
+        
+        # Checkpoints after every stage let a restarted process resume the run
+        self.checkpoints = get_checkpoint_store()
+        self._resume: Optional[Dict] = None
+        self._elapsed_before = 0.0
+        self._started = 0.0
         
+        # Initialize state (already restored when resuming from a checkpoint)
+        if self.run_id not in self.state_manager.runs:
+            self.state_manager.initialize_run(self.run_id, {
+                "repo_url": repo_url,
+                "team_name": team_name,
+                "team_leader": team_leader,
+                "branch_name": self.branch_name,
+                "retry_limit": retry_limit,
+                "start_time": datetime.now().isoformat()
+            })
+    
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Dict, state_manager: StateManager) -> "AgentOrchestrator":
+        """Rebuild the orchestrator of an interrupted run"""
+        state_manager.restore_run(checkpoint["run_id"], checkpoint["state"], resumed=True)
+        orchestrator = cls(
+            repo_url=checkpoint["repo_url"],
+            team_name=checkpoint["team_name"],
+            team_leader=checkpoint["team_leader"],
+            retry_limit=checkpoint["retry_limit"],
+            state_manager=state_manager,
+            run_id=checkpoint["run_id"]
+        )
+        orchestrator._resume = checkpoint
+        orchestrator._elapsed_before = checkpoint.get("elapsed", 0.0)
+        return orchestrator
+        
+    @property
+    def repo_dir(self) -> str:
+        """The clone inside the workspace; agents scan, fix and test there"""
+        return self.git_agent.repo_dir or self.workspace_dir
+    
     def _generate_branch_name(self) -> str:
         """Generate branch name in required format: TEAM_NAME_LEADER_NAME_AI_Fix"""
         team = self.team_name.upper().replace(" ", "_")
@@ -62,21 +103,183 @@ class AgentOrchestrator:
         """Update current stage"""
         self.state_manager.update_stage(self.run_id, stage, progress)
     
+    async def _run_test_stage(self, iteration: int, iteration_head: str) -> Dict:
+        """
+        Run the tests affected by this iteration's commits. A passing subset
+        is confirmed with the full suite, and the full suite also runs on
+        the first iteration and every `full_suite_every` iterations.
+        """
+        changed_files = None
+        full_run_due = (
+            self.test_selection != "impact"
+            or iteration == 1
+            or (self.full_suite_every and iteration % self.full_suite_every == 0)
+        )
+        if not full_run_due:
+            try:
+                changed_files = await self.git_agent.changed_files(iteration_head)
+            except Exception as e:
+                self._log(f"Could not determine changed files, running full suite: {e}", "info")
+        
+        if changed_files is None:
+            self._log("run tests --all", "command")
+        else:
+            self._log(f"run tests --related ({len(changed_files)} changed files)", "command")
+        
+        test_result = await self._run_recorded_tests(changed_files)
+        
+        if test_result["passed"] and test_result.get("mode") == "impact":
+            self._log(
+                f"{len(test_result['selected_tests'])} affected test file(s) passed. "
+                "Confirming with full suite...", "info"
+            )
+            self._log("run tests --all", "command")
+            test_result = await self._run_recorded_tests(None)
+        
+        return test_result
+    
+    async def _run_recorded_tests(self, changed_files: Optional[List[str]]) -> Dict:
+        """Run tests and record the run in the CI/CD history"""
+        cicd_run_id = self.state_manager.add_cicd_run(self.run_id, "RUNNING")
+        
+        test_result = await self.test_agent.run_tests(self.repo_dir, changed_files, run_id=self.run_id)
+        
+        duration = f"{test_result['duration']:.1f}s"
+        status = "PASSED" if test_result["passed"] else "FAILED"
+        self.state_manager.update_cicd_run(self.run_id, cicd_run_id, status, duration)
+        for step in test_result.get("dependencies", []):
+            if step["status"] == "hit":
+                self._log(f"Restored {step['ecosystem']} dependencies from cache ({step['duration']:.1f}s)", "info")
+            elif step["status"] == "miss":
+                self._log(f"Installed {step['ecosystem']} dependencies and cached them ({step['duration']:.1f}s)", "info")
+            elif step["status"] == "failed":
+                self._log(f"Installing {step['ecosystem']} dependencies failed, running tests without them", "error")
+        if test_result.get("cached") and not test_result.get("skipped_tests"):
+            self._log("Code unchanged since a previous test run, reusing its result", "info")
+        elif test_result.get("command"):
+            self._log(f"Ran {test_result['command']} ({duration})", "info")
+        if test_result.get("skipped_tests"):
+            self._log(
+                f"Skipped {len(test_result['skipped_tests'])} test file(s) that passed before on identical code",
+                "info"
+            )
+        return test_result
+    
+    async def _process_issue(self, issue: Dict, iteration: int) -> bool:
+        """Generate, apply and commit a fix for one issue; True if a fix was committed"""
+        # Analyze
+        self._update_stage("ANALYZING", 30 + (iteration * 10))
+        self._log(f"Vulnerability detected in {issue['file']}", "error")
+        self._log("AI Agent analyzing context window...", "info")
+        
+        # Generate fix
+        self._update_stage("FIXING", 40 + (iteration * 10))
+        self._log(f"Generating patch with {self.fixer_agent.llm.provider.label}...", "info")
+        
+        fix_result = await self.fixer_agent.generate_fix(issue, self.repo_dir)
+        
+        if fix_result.get("prompt_tokens"):
+            self.state_manager.record_prompt(self.run_id, fix_result["prompt_tokens"])
+        
+        if fix_result["success"]:
+            if fix_result.get("local"):
+                self._log("Applying deterministic local fix...", "info")
+            else:
+                self._log("Applying patch...", "info")
+            await self.fixer_agent.apply_fix(fix_result, self.repo_dir)
+            
+            # Record fix
+            self.state_manager.add_fix(self.run_id, {
+                "file": issue["file"],
+                "line": issue["line"],
+                "bug_type": issue["type"],
+                "description": issue["description"],
+                "commit_message": fix_result["commit_message"],
+                "status": "IN_PROGRESS",
+                "severity": issue.get("severity", "MEDIUM")
+            })
+            
+            # Commit only this file; other workers may have fixes in flight
+            commit_msg = f"[AI-AGENT] {fix_result['commit_message']}"
+            file_path = fix_result.get("file_path")
+            # The span includes waiting for the lock; the git spans inside it show the work
+            async with get_metrics().span("commit", file=file_path), self._commit_lock:
+                await self.git_agent.commit_changes(commit_msg, [file_path] if file_path else None)
+            return True
+        elif fix_result.get("skipped"):
+            self._log(f"Skipped {issue['file']}:{issue['line']}: {fix_result['error']}", "info")
+        else:
+            self._log(f"Fix generation failed: {fix_result.get('error', 'unknown error')}", "error")
+        return False
+    
+    async def _checkpoint(self, phase: str, iteration: int, issues: List[Dict],
+                          progress: ProgressTracker, **extra):
+        """Persist everything needed to continue after `phase` of `iteration`"""
+        self.checkpoints.save(self.run_id, {
+            "run_id": self.run_id,
+            "repo_url": self.repo_url,
+            "team_name": self.team_name,
+            "team_leader": self.team_leader,
+            "retry_limit": self.retry_limit,
+            "workspace_dir": self.workspace_dir,
+            "branch_name": self.branch_name,
+            "branch_head": await self.git_agent.get_head(),
+            "phase": phase,
+            "iteration": iteration,
+            "issues": issues,
+            "progress": progress.to_dict(),
+            "patch_mode": self.fixer_agent.patch_mode,
+            "elapsed": self._elapsed_before + time.time() - self._started,
+            "state": self.state_manager.export_run(self.run_id),
+            **extra
+        })
+    
+    async def _resume_point(self) -> Optional[Dict]:
+        """The checkpoint to continue from, if the workspace survived the restart"""
+        checkpoint = self._resume
+        if checkpoint is None:
+            return None
+        
+        if not self.git_agent.attach_repository(self.repo_url):
+            self._log("Workspace of the interrupted run is gone, starting over", "error")
+            return None
+        
+        await self.git_agent.reset_to(self.branch_name, checkpoint["branch_head"])
+        self._log(
+            f"Resumed interrupted run after '{checkpoint['phase']}' "
+            f"(iteration {checkpoint['iteration']})", "success"
+        )
+        return checkpoint
+    
+    def _switch_fix_strategy(self):
+        """Iterations stalled: try the other fix mode before giving up"""
+        self.fixer_agent.patch_mode = not self.fixer_agent.patch_mode
+        mode = "targeted patches" if self.fixer_agent.patch_mode else "full-file rewrites"
+        self._log(f"No progress since the last iteration, switching to {mode}", "info")
+    
     async def run(self):
         """Main orchestration loop"""
+        # Metrics recorded by this task and its children are attributed to the run
+        token = current_run.set(self.run_id)
+        metrics = get_metrics()
+        metrics.add_gauge("rift_active_runs", 1)
+        try:
+            await self._run()
+        finally:
+            metrics.add_gauge("rift_active_runs", -1)
+            current_run.reset(token)
+    
+    async def _run(self):
+        """Clone, scan, fix and test until the tests pass or the loop gives up"""
         start_time = time.time()
+        self._started = start_time
         
         try:
-            # Check if git is available
+            # Check if git is available (probed once per process)
             try:
-                process = await asyncio.create_subprocess_shell(
-                    "git --version",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                await process.communicate()
-                if process.returncode != 0:
-                    raise Exception("Git is not installed or not accessible")
+                git = await get_capabilities().check("git")
+                if not git["available"]:
+                    raise Exception(git.get("error") or "Git is not installed or not accessible")
             except Exception as e:
                 self._log(f"Fatal error: Git not available - {str(e)}", "error")
                 self._update_stage("ERROR", 0)
@@ -85,83 +288,98 @@ class AgentOrchestrator:
                     "error": "Git not available",
                     "end_time": datetime.now().isoformat()
                 })
+                self.checkpoints.delete(self.run_id)
                 return
             
-            # Stage 1: Clone Repository
-            self._update_stage("CLONING", 10)
-            self._log(f"git clone {self.repo_url}", "command")
-            self._log("Cloning repository...", "info")
-            
-            await self.git_agent.clone_repository(self.repo_url)
-            
-            self._log("Repository cloned successfully", "success")
-            self._log(f"git checkout -b {self.branch_name}", "command")
-            
-            await self.git_agent.create_branch(self.branch_name)
-            self._log(f"Switched to new branch '{self.branch_name}'", "success")
-            
-            # Stage 2: Initial Scan
-            self._update_stage("SCANNING", 20)
-            self._log("npm run scan --deep", "command")
-            self._log("Initializing static code analysis...", "info")
-            
-            issues = await self.scanner_agent.scan_repository(self.workspace_dir)
-            self._log(f"Found {len(issues)} issues to fix", "info")
+            resume = await self._resume_point()
+            if resume:
+                iteration = resume["iteration"]
+                issues = resume["issues"]
+                progress = ProgressTracker.from_dict(resume["progress"])
+                self.fixer_agent.patch_mode = resume["patch_mode"]
+                pending_tests = resume["phase"] == "fixed"
+                iteration_head = resume.get("iteration_head")
+                fixes_applied = resume.get("fixes_applied", 0)
+            else:
+                # Stage 1: Clone Repository
+                self._update_stage("CLONING", 10)
+                self._log(f"git clone {self.repo_url}", "command")
+                self._log("Cloning repository...", "info")
+                
+                async with get_metrics().span("clone"):
+                    await self.git_agent.clone_repository(self.repo_url)
+                
+                self._log("Repository cloned successfully", "success")
+                self._log(f"git checkout -b {self.branch_name}", "command")
+                
+                await self.git_agent.create_branch(self.branch_name)
+                self._log(f"Switched to new branch '{self.branch_name}'", "success")
+                
+                iteration = 0
+                issues: List[Dict] = []
+                progress = ProgressTracker()
+                pending_tests = False
+                await self._checkpoint("cloned", iteration, issues, progress)
             
             # Stage 3: Fix Loop
-            iteration = 0
             all_tests_passed = False
+            stop_reason = STOP_RETRY_LIMIT
             
-            while iteration < self.retry_limit and not all_tests_passed:
-                iteration += 1
-                self._log(f"Starting iteration {iteration}/{self.retry_limit}", "info")
-                
-                # Process each issue
-                for issue in issues:
-                    # Analyze
-                    self._update_stage("ANALYZING", 30 + (iteration * 10))
-                    self._log(f"Vulnerability detected in {issue['file']}", "error")
-                    self._log("AI Agent analyzing context window...", "info")
-                    
-                    # Generate fix
-                    self._update_stage("FIXING", 40 + (iteration * 10))
-                    self._log("Generating patch with Gemini 2.0 Flash...", "info")
-                    
-                    fix_result = await self.fixer_agent.generate_fix(issue, self.workspace_dir)
+            while pending_tests or (iteration < self.retry_limit and not all_tests_passed):
+                if pending_tests:
+                    # Interrupted after committing fixes: only the tests are left
+                    pending_tests = False
+                    self._log(f"Resuming iteration {iteration}/{self.retry_limit} at the test stage", "info")
+                else:
+                    iteration += 1
+                    self._log(f"Starting iteration {iteration}/{self.retry_limit}", "info")
+                    iteration_head = await self.git_agent.get_head()
                     
-                    if fix_result["success"]:
-                        self._log("Applying patch...", "info")
-                        await self.fixer_agent.apply_fix(fix_result, self.workspace_dir)
-                        
-                        # Record fix
-                        self.state_manager.add_fix(self.run_id, {
-                            "file": issue["file"],
-                            "line": issue["line"],
-                            "bug_type": issue["type"],
-                            "description": issue["description"],
-                            "commit_message": fix_result["commit_message"],
-                            "status": "IN_PROGRESS",
-                            "severity": issue.get("severity", "MEDIUM")
-                        })
-                        
-                        # Commit
-                        commit_msg = f"[AI-AGENT] {fix_result['commit_message']}"
-                        await self.git_agent.commit_changes(commit_msg)
+                    # Stream issues to the fix workers; the first iteration fixes
+                    # while the scan (Stage 2) is still running
+                    if iteration == 1:
+                        self._update_stage("SCANNING", 20)
+                        self._log("npm run scan --deep", "command")
+                        self._log("Initializing static code analysis...", "info")
+                        source = self.scanner_agent.iter_issues(self.repo_dir)
+                    else:
+                        source = issues
+                    async with get_metrics().span("fix"):
+                        pipeline_result = await FixPipeline(
+                            lambda issue: self._process_issue(issue, iteration),
+                            repo_dir=self.repo_dir
+                        ).run(source)
+                    fixes_applied = pipeline_result["fixes_applied"]
+                    if iteration == 1:
+                        get_metrics().observe_stage("scan", pipeline_result["scan_duration"])
+                        issues = pipeline_result["issues"]
+                        self._log(
+                            f"Found {len(issues)} issues to fix "
+                            f"(scan took {pipeline_result['scan_duration']:.1f}s)", "info"
+                        )
+                    if pipeline_result["first_fix_after"] is not None:
+                        self._log(
+                            f"Applied {fixes_applied} fix(es), first after "
+                            f"{pipeline_result['first_fix_after']:.1f}s", "info"
+                        )
+                    await self._checkpoint(
+                        "fixed", iteration, issues, progress,
+                        iteration_head=iteration_head, fixes_applied=fixes_applied
+                    )
                     
                 # Stage 4: Run Tests
                 self._update_stage("TESTING", 60 + (iteration * 10))
-                self._log("npm test --related", "command")
-                
-                cicd_run_id = self.state_manager.add_cicd_run(self.run_id, "RUNNING")
                 
-                test_result = await self.test_agent.run_tests(self.workspace_dir)
-                
-                duration = f"{test_result['duration']:.1f}s"
+                async with get_metrics().span("test"):
+                    test_result = await self._run_test_stage(iteration, iteration_head)
+                outcome = progress.record(
+                    iteration, fixes_applied, test_result["failures"], test_result["passed"]
+                )
                 
                 if test_result["passed"]:
-                    self.state_manager.update_cicd_run(self.run_id, cicd_run_id, "PASSED", duration)
                     self._log("Tests passed. Verifying fix...", "success")
                     all_tests_passed = True
+                    stop_reason = STOP_TESTS_PASSED
                     
                     # Update all fixes to FIXED
                     self.state_manager.update_all_fixes_status(self.run_id, "FIXED")
@@ -171,14 +389,16 @@ class AgentOrchestrator:
                     self._log(f"git push origin {self.branch_name}", "command")
                     
                     try:
-                        await self.git_agent.push_branch(self.branch_name)
+                        async with get_metrics().span("push"):
+                            await self.git_agent.push_branch(self.branch_name)
                         
                         self._log("Creating Pull Request...", "info")
-                        pr_url = await self.git_agent.create_pull_request(
-                            self.branch_name,
-                            f"[AI-AGENT] Fix Critical Issues - {self.team_name}",
-                            f"Automated fixes by {self.team_leader}'s AI Agent"
-                        )
+                        async with get_metrics().span("pull_request"):
+                            pr_url = await self.git_agent.create_pull_request(
+                                self.branch_name,
+                                f"[AI-AGENT] Fix Critical Issues - {self.team_name}",
+                                f"Automated fixes by {self.team_leader}'s AI Agent"
+                            )
                         self._log(f"PR Created: {pr_url}", "success")
                     except Exception as push_error:
                         # If push fails due to auth, provide helpful message
@@ -192,18 +412,32 @@ class AgentOrchestrator:
                         # Don't fail the entire run, just mark as needing manual push
                     
                 else:
-                    self.state_manager.update_cicd_run(self.run_id, cicd_run_id, "FAILED", duration)
                     self._log(f"Tests failed: {test_result['failures']} failures", "error")
                     
                     # Get new issues from test failures
                     issues = await self.scanner_agent.analyze_test_failures(
                         test_result["failures"], 
-                        self.workspace_dir
+                        self.repo_dir
                     )
+                    
+                    if iteration < self.retry_limit:
+                        action = progress.next_action(fixes_applied, issues)
+                        if action == "stop":
+                            stop_reason = progress.stop_reason
+                            self._log(
+                                f"Stopping early: {stop_reason.replace('_', ' ')} "
+                                f"({outcome['failures']} failures, {fixes_applied} fixes this iteration)",
+                                "error"
+                            )
+                            break
+                        if action == "switch_strategy":
+                            self._switch_fix_strategy()
+                    
+                    await self._checkpoint("tested", iteration, issues, progress)
             
             # Finalize
             end_time = time.time()
-            total_time = end_time - start_time
+            total_time = self._elapsed_before + end_time - start_time
             
             self._update_stage("COMPLETED" if all_tests_passed else "FAILED", 100)
             
@@ -216,8 +450,11 @@ class AgentOrchestrator:
                 "final_status": final_status,
                 "total_time": total_time,
                 "iterations_used": iteration,
+                "stop_reason": stop_reason,
+                "progress": progress.summary(),
                 "end_time": datetime.now().isoformat()
             })
+            self.checkpoints.delete(self.run_id)
             
         except Exception as e:
             self._log(f"Fatal error: {str(e)}", "error")
@@ -227,3 +464,4 @@ class AgentOrchestrator:
                 "error": str(e),
                 "end_time": datetime.now().isoformat()
             })
+            self.checkpoints.delete(self.run_id)
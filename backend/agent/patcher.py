@@ -0,0 +1,229 @@
+"""
+Patcher - Parses and applies model-generated patches to source files
+"""
+import re
+from typing import List, Optional, Tuple
+
+
+class PatchError(Exception):
+    """Raised when a patch cannot be parsed or applied cleanly"""
+
+
+class Hunk:
+    """A single edit: replace `old_lines` near `start` with `new_lines`"""
+
+    def __init__(self, start: int, old_lines: List[str], new_lines: List[str],
+                 exact_range: bool = False):
+        # 1-based line number where the old lines are expected to begin
+        self.start = start
+        self.old_lines = old_lines
+        self.new_lines = new_lines
+        # Line-range replacements address lines by number only, no context
+        self.exact_range = exact_range
+
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+REPLACE_HEADER = re.compile(r'^REPLACE\s+(\d+)(?:\s*-\s*(\d+))?\s*:?\s*$')
+REPLACE_END = "END_REPLACE"
+
+
+def parse_patch(patch_text: str) -> List[Hunk]:
+    """Parse a unified diff or a set of REPLACE line-range blocks"""
+    lines = _strip_fences(patch_text).split('\n')
+
+    if any(REPLACE_HEADER.match(line.strip()) for line in lines):
+        return _parse_replacements(lines)
+    return _parse_unified(lines)
+
+
+def apply_patch(content: str, patch_text: str, fuzz: int = 2) -> str:
+    """
+    Apply a patch to `content` and return the patched text.
+
+    Unified hunks are located by their context, searching outward from the
+    line number in the header, so small line drifts are tolerated. If the
+    exact context is not found, whitespace differences are ignored and up to
+    `fuzz` leading/trailing context lines are dropped before giving up.
+    """
+    hunks = parse_patch(patch_text)
+    if not hunks:
+        raise PatchError("Patch contains no hunks")
+
+    trailing_newline = content.endswith('\n')
+    lines = content.split('\n')
+    if trailing_newline:
+        lines = lines[:-1]
+
+    # Resolve every hunk against the original text first, then apply from
+    # the bottom up so earlier edits do not shift later positions
+    resolved: List[Tuple[int, int, List[str]]] = []
+    for hunk in hunks:
+        resolved.append(_locate(lines, hunk, fuzz))
+
+    resolved.sort(key=lambda r: r[0])
+    for (start, end, _), (next_start, _, _) in zip(resolved, resolved[1:]):
+        if next_start < end:
+            raise PatchError(f"Overlapping hunks at line {next_start + 1}")
+
+    for start, end, new_lines in reversed(resolved):
+        lines[start:end] = new_lines
+
+    patched = '\n'.join(lines)
+    if trailing_newline:
+        patched += '\n'
+    return patched
+
+
+def _strip_fences(text: str) -> str:
+    """Remove a surrounding markdown code fence, keeping inner content intact"""
+    stripped = text.strip('\n')
+    fence_lines = stripped.split('\n')
+    if fence_lines and fence_lines[0].strip().startswith("```"):
+        fence_lines = fence_lines[1:]
+        if fence_lines and fence_lines[-1].strip() == "```":
+            fence_lines = fence_lines[:-1]
+    return '\n'.join(fence_lines)
+
+
+def _parse_unified(lines: List[str]) -> List[Hunk]:
+    hunks = []
+    current: Optional[Hunk] = None
+
+    for line in lines:
+        header = HUNK_HEADER.match(line)
+        if header:
+            current = Hunk(int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+
+        if current is None:
+            # File headers and any prose before the first hunk
+            continue
+
+        if line.startswith('\\'):
+            # "\ No newline at end of file"
+            continue
+        if line.startswith('+'):
+            current.new_lines.append(line[1:])
+        elif line.startswith('-'):
+            current.old_lines.append(line[1:])
+        elif line.startswith(' '):
+            current.old_lines.append(line[1:])
+            current.new_lines.append(line[1:])
+        elif line == '':
+            # Models often drop the leading space on blank context lines
+            current.old_lines.append('')
+            current.new_lines.append('')
+        else:
+            raise PatchError(f"Unexpected line in diff: {line[:60]!r}")
+
+    for hunk in hunks:
+        _trim_blank_edges(hunk)
+    return hunks
+
+
+def _parse_replacements(lines: List[str]) -> List[Hunk]:
+    hunks = []
+    current: Optional[Hunk] = None
+    end_line = 0
+
+    for line in lines:
+        header = REPLACE_HEADER.match(line.strip())
+        if current is None:
+            if header:
+                start = int(header.group(1))
+                end_line = int(header.group(2) or start)
+                if end_line < start:
+                    raise PatchError(f"Invalid line range {start}-{end_line}")
+                current = Hunk(start, [], [], exact_range=True)
+                # Store the range length in old_lines as placeholders
+                current.old_lines = [None] * (end_line - start + 1)
+            continue
+
+        if line.strip() == REPLACE_END:
+            hunks.append(current)
+            current = None
+            continue
+        current.new_lines.append(line)
+
+    if current is not None:
+        raise PatchError(f"Unterminated REPLACE block at line {current.start}")
+    return hunks
+
+
+def _trim_blank_edges(hunk: Hunk):
+    """Drop blank context lines the model added after the last real line"""
+    while hunk.old_lines and hunk.new_lines and \
+            hunk.old_lines[-1] == '' and hunk.new_lines[-1] == '':
+        hunk.old_lines.pop()
+        hunk.new_lines.pop()
+
+
+def _locate(lines: List[str], hunk: Hunk, fuzz: int) -> Tuple[int, int, List[str]]:
+    """Find where a hunk applies and return (start, end, replacement)"""
+    expected = max(0, hunk.start - 1)
+
+    if hunk.exact_range:
+        end = expected + len(hunk.old_lines)
+        if hunk.start < 1 or end > len(lines):
+            raise PatchError(
+                f"Line range {hunk.start}-{end} is outside the file ({len(lines)} lines)"
+            )
+        return expected, end, hunk.new_lines
+
+    if not hunk.old_lines:
+        # Pure insertion: trust the header position
+        position = min(expected, len(lines))
+        return position, position, hunk.new_lines
+
+    for normalize in (_exact, _loose):
+        for trim in range(0, fuzz + 1):
+            old, new, lead = _trim_context(hunk, trim)
+            if not old:
+                break
+            match = _search(lines, old, expected + lead, normalize)
+            if match is not None:
+                return match, match + len(old), new
+
+    raise PatchError(f"Hunk at line {hunk.start} does not match the current file")
+
+
+def _trim_context(hunk: Hunk, trim: int) -> Tuple[List[str], List[str], int]:
+    """Drop up to `trim` unchanged lines from each edge of a hunk"""
+    old, new = list(hunk.old_lines), list(hunk.new_lines)
+    lead = 0
+    for _ in range(trim):
+        if old and new and old[0] == new[0] and len(old) > 1:
+            old.pop(0)
+            new.pop(0)
+            lead += 1
+        if old and new and old[-1] == new[-1] and len(old) > 1:
+            old.pop()
+            new.pop()
+    return old, new, lead
+
+
+def _search(lines: List[str], old: List[str], expected: int, normalize) -> Optional[int]:
+    """Search outward from `expected` for a block equal to `old`"""
+    target = [normalize(line) for line in old]
+    last_start = len(lines) - len(old)
+    if last_start < 0:
+        return None
+
+    expected = min(max(expected, 0), last_start)
+    for offset in range(0, last_start + 1):
+        for candidate in (expected - offset, expected + offset):
+            if 0 <= candidate <= last_start and \
+                    all(normalize(lines[candidate + i]) == target[i] for i in range(len(old))):
+                return candidate
+            if offset == 0:
+                break
+    return None
+
+
+def _exact(line: str) -> str:
+    return line.rstrip()
+
+
+def _loose(line: str) -> str:
+    return ' '.join(line.split())
@@ -0,0 +1,126 @@
+"""
+Fix Pipeline - Streams issues from the scanner through triage to fix workers
+"""
+import os
+import asyncio
+import time
+from typing import AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from .metrics import get_metrics
+
+
+class FixPipeline:
+    """
+    scan -> triage -> fix, connected by bounded queues.
+
+    Fix workers start on the first issue the scanner emits instead of
+    waiting for the whole scan, so linter runs and LLM calls overlap. When
+    workers fall behind, the full queues block the upstream stages. Issues
+    for the same file are fixed one at a time because each fix reads the
+    file the previous one wrote. Linters report paths relative to the
+    repository and other scanners absolute ones, so paths are resolved
+    against `repo_dir` before deduplicating and locking.
+    """
+
+    def __init__(self, handle_issue: Callable[[Dict], Awaitable[bool]],
+                 workers: int = None, queue_size: int = None, repo_dir: str = None):
+        self.handle_issue = handle_issue
+        self.repo_dir = repo_dir or os.getcwd()
+        self.workers = workers or int(os.getenv("FIX_WORKERS", 4))
+        self.queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", 16))
+        self._file_locks: Dict[str, asyncio.Lock] = {}
+
+    async def run(self, source: Union[AsyncIterable[Dict], Iterable[Dict]]) -> Dict:
+        """
+        Feed every issue from `source` through the pipeline. Returns the
+        issues seen, the number of fixes applied and timing for the stages.
+        """
+        started = time.time()
+        metrics = get_metrics()
+        triage_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        fix_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def put(queue: asyncio.Queue, name: str, issue: Dict):
+            await queue.put(issue)
+            metrics.add_gauge("rift_pipeline_queue_depth", 1, queue=name)
+
+        async def get(queue: asyncio.Queue, name: str) -> Optional[Dict]:
+            issue = await queue.get()
+            if issue is not None:
+                metrics.add_gauge("rift_pipeline_queue_depth", -1, queue=name)
+            return issue
+
+        stats = {
+            "issues": [],
+            "fixes_applied": 0,
+            "scan_duration": None,
+            "first_fix_after": None
+        }
+
+        async def scan():
+            try:
+                if hasattr(source, "__aiter__"):
+                    async for issue in source:
+                        await put(triage_queue, "triage", issue)
+                else:
+                    for issue in source:
+                        await put(triage_queue, "triage", issue)
+            finally:
+                stats["scan_duration"] = time.time() - started
+                await triage_queue.put(None)
+
+        async def triage():
+            seen = set()
+            try:
+                while True:
+                    issue = await get(triage_queue, "triage")
+                    if issue is None:
+                        break
+                    key = (self._resolve(issue.get("file")), issue.get("line"),
+                           issue.get("type"), issue.get("description"))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    stats["issues"].append(issue)
+                    await put(fix_queue, "fix", issue)
+            finally:
+                for _ in range(self.workers):
+                    await fix_queue.put(None)
+
+        async def fix():
+            while True:
+                issue = await get(fix_queue, "fix")
+                if issue is None:
+                    return
+                async with self._file_lock(issue.get("file")):
+                    applied = await self.handle_issue(issue)
+                if applied:
+                    stats["fixes_applied"] += 1
+                    if stats["first_fix_after"] is None:
+                        stats["first_fix_after"] = time.time() - started
+
+        tasks = [asyncio.create_task(scan(), name="pipeline.scan"),
+                 asyncio.create_task(triage(), name="pipeline.triage")]
+        tasks += [asyncio.create_task(fix(), name=f"pipeline.fix-{i + 1}") for i in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Issues abandoned in the queues no longer count as waiting
+            for name, queue in (("triage", triage_queue), ("fix", fix_queue)):
+                while not queue.empty():
+                    if queue.get_nowait() is not None:
+                        metrics.add_gauge("rift_pipeline_queue_depth", -1, queue=name)
+
+        stats["duration"] = time.time() - started
+        return stats
+
+    def _resolve(self, path: Optional[str]) -> str:
+        return os.path.realpath(os.path.join(self.repo_dir, path or "unknown"))
+
+    def _file_lock(self, path: Optional[str]) -> asyncio.Lock:
+        key = self._resolve(path)
+        if key not in self._file_locks:
+            self._file_locks[key] = asyncio.Lock()
+        return self._file_locks[key]
@@ -0,0 +1,124 @@
+"""
+Progress Tracker - Detects when fix iterations stop making progress
+"""
+import os
+import re
+import hashlib
+from typing import Dict, List, Optional, Set
+
+
+# Parts of a failure message that change between identical failures
+VOLATILE_PATTERNS = [
+    (re.compile(r'0x[0-9a-fA-F]+'), '0x?'),
+    (re.compile(r'\d+(?:\.\d+)?\s*(?:ms|s|sec|seconds)\b'), '?s'),
+    (re.compile(r'/tmp/\S+'), '/tmp/?'),
+    (re.compile(r'\s+'), ' '),
+]
+
+# Why the loop ended, as reported in results.json
+STOP_TESTS_PASSED = "tests_passed"
+STOP_RETRY_LIMIT = "retry_limit"
+STOP_NO_PROGRESS = "no_progress"
+STOP_NO_FIXES = "no_fixes_applied"
+STOP_NO_ISSUES = "no_actionable_issues"
+
+
+def failure_fingerprint(failures: List[str]) -> str:
+    """Order-independent hash of a failure set, ignoring timings and addresses"""
+    digest = hashlib.sha256()
+    for failure in sorted(_normalize(f) for f in failures):
+        digest.update(failure.encode('utf-8') + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _normalize(failure: str) -> str:
+    for pattern, replacement in VOLATILE_PATTERNS:
+        failure = pattern.sub(replacement, failure)
+    return failure.strip()
+
+
+class ProgressTracker:
+    """
+    Records what each iteration achieved (fixes applied, failure set, tests
+    newly passing) and decides whether another iteration is worth its LLM
+    pass and test run.
+
+    An iteration made progress if it applied at least one fix and its
+    failure set is one the run has not seen before. After `patience`
+    iterations without progress the caller is asked to switch strategy
+    once; if that does not help either, the loop stops.
+    """
+
+    def __init__(self, patience: int = None):
+        self.patience = patience or int(os.getenv("CONVERGENCE_PATIENCE", 1))
+        self.history: List[Dict] = []
+        self.seen: Set[str] = set()
+        self.stalled = 0
+        self.strategy_switched = False
+        self.stop_reason: Optional[str] = None
+
+    def record(self, iteration: int, fixes_applied: int, failures: List[str], passed: bool) -> Dict:
+        """Record an iteration's outcome and return its summary"""
+        fingerprint = failure_fingerprint(failures)
+        current = {_normalize(f) for f in failures}
+        previous = self.history[-1]["_failures"] if self.history else set()
+
+        progressed = passed or (fixes_applied > 0 and fingerprint not in self.seen)
+        self.stalled = 0 if progressed else self.stalled + 1
+        self.seen.add(fingerprint)
+
+        entry = {
+            "iteration": iteration,
+            "fixes_applied": fixes_applied,
+            "failures": len(failures),
+            "newly_passing": len(previous - current),
+            "fingerprint": fingerprint,
+            "progressed": progressed,
+            "_failures": current
+        }
+        self.history.append(entry)
+        return self._public(entry)
+
+    def next_action(self, fixes_applied: int, issues: List[Dict]) -> Optional[str]:
+        """
+        "continue", "switch_strategy" or "stop" after the latest iteration.
+        On "stop", `stop_reason` says why.
+        """
+        if not issues:
+            self.stop_reason = STOP_NO_ISSUES
+            return "stop"
+        if self.stalled < self.patience:
+            return "continue"
+        if not self.strategy_switched:
+            self.strategy_switched = True
+            self.stalled = 0
+            return "switch_strategy"
+        self.stop_reason = STOP_NO_FIXES if fixes_applied == 0 else STOP_NO_PROGRESS
+        return "stop"
+
+    def summary(self) -> Dict:
+        return {
+            "iterations": [self._public(entry) for entry in self.history],
+            "strategy_switched": self.strategy_switched
+        }
+
+    def to_dict(self) -> Dict:
+        """Tracker state for checkpoints"""
+        return {
+            "history": [{**self._public(e), "_failures": sorted(e["_failures"])} for e in self.history],
+            "seen": sorted(self.seen),
+            "stalled": self.stalled,
+            "strategy_switched": self.strategy_switched
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProgressTracker":
+        tracker = cls()
+        tracker.history = [{**e, "_failures": set(e["_failures"])} for e in data.get("history", [])]
+        tracker.seen = set(data.get("seen", []))
+        tracker.stalled = data.get("stalled", 0)
+        tracker.strategy_switched = data.get("strategy_switched", False)
+        return tracker
+
+    def _public(self, entry: Dict) -> Dict:
+        return {k: v for k, v in entry.items() if not k.startswith("_")}
@@ -0,0 +1,67 @@
+"""
+Scan Cache - Memoizes per-file scan results by blob content
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+# Bump when ScannerAgent's per-file checks change, so stale results are not reused
+SCAN_RULES_VERSION = 1
+
+
+class ScanCache:
+    """
+    Per-file issues keyed by the file's git blob id and the parts of its
+    path the checks look at (extension, whether it is an __init__.py).
+    Identical files in forks, and files unchanged between fix iterations,
+    are scanned once. Issues are stored without their path and re-attached
+    on a hit. Bounded LRU, shared by every run in the process.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(os.getenv("SCAN_CACHE_ENTRIES", 50000))
+        self._entries: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file_path: str, content: bytes) -> str:
+        blob = hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+        name = os.path.basename(file_path)
+        variant = f"{os.path.splitext(name)[1]}:{name == '__init__.py'}"
+        return f"{SCAN_RULES_VERSION}:{variant}:{blob}"
+
+    def get(self, key: str, file_path: str) -> Optional[List[Dict]]:
+        with self._lock:
+            issues = self._entries.get(key)
+            if issues is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [{"file": file_path, **issue} for issue in issues]
+
+    def put(self, key: str, issues: List[Dict]):
+        stored = [{k: v for k, v in issue.items() if k != "file"} for issue in issues]
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[ScanCache] = None
+
+
+def get_scan_cache() -> ScanCache:
+    """Return the process-wide scan cache"""
+    global _cache
+    if _cache is None:
+        _cache = ScanCache()
+    return _cache
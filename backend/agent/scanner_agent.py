@@ -2,11 +2,16 @@
 Scanner Agent - Detects code issues and vulnerabilities
 """
 import os
+import ast
 import asyncio
 import json
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 import subprocess
 
+from .metrics import get_metrics
+from .scan_cache import get_scan_cache
+from .capabilities import get_capabilities
+
 
 class ScannerAgent:
     """Scans code for issues using multiple tools"""
@@ -22,38 +27,65 @@ class ScannerAgent:
             '.go': 'go',
             '.rs': 'rust'
         }
+        self.cache = get_scan_cache()
     
     async def scan_repository(self, repo_dir: str) -> List[Dict]:
         """Scan repository for issues"""
-        issues = []
-        
-        # Scan Python files
-        python_issues = await self._scan_python(repo_dir)
-        issues.extend(python_issues)
+        return [issue async for issue in self.iter_issues(repo_dir)]
+    
+    async def iter_issues(self, repo_dir: str, queue_size: int = 100) -> AsyncIterator[Dict]:
+        """
+        Yield issues as the scanners find them. Linters and the generic walk
+        run concurrently; the generic walk emits per file, and the bounded
+        queue makes scanners wait when the consumer falls behind.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        done = object()
         
-        # Scan JavaScript/TypeScript files
-        js_issues = await self._scan_javascript(repo_dir)
-        issues.extend(js_issues)
+        async def emit_all(scan):
+            for issue in await scan:
+                await queue.put(issue)
         
-        # Generic linting
-        generic_issues = await self._scan_generic(repo_dir)
-        issues.extend(generic_issues)
+        async def produce(scan):
+            try:
+                await scan
+            finally:
+                await queue.put(done)
         
-        return issues
+        producers = [
+            asyncio.create_task(produce(emit_all(self._scan_python(repo_dir))), name="scan.python"),
+            asyncio.create_task(produce(emit_all(self._scan_javascript(repo_dir))), name="scan.javascript"),
+            asyncio.create_task(produce(self._scan_generic(repo_dir, queue.put)), name="scan.generic")
+        ]
+        try:
+            remaining = len(producers)
+            while remaining:
+                issue = await queue.get()
+                if issue is done:
+                    remaining -= 1
+                else:
+                    yield issue
+        finally:
+            for producer in producers:
+                producer.cancel()
     
     async def _scan_python(self, repo_dir: str) -> List[Dict]:
         """Scan Python files using pylint, flake8"""
         issues = []
+        if not get_capabilities().has("pylint"):
+            return issues
         
         try:
             # Run pylint
-            process = await asyncio.create_subprocess_shell(
-                f"pylint --output-format=json {repo_dir}/**/*.py",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=repo_dir
-            )
-            stdout, _ = await process.communicate()
+            get_metrics().inc("rift_subprocesses_total", agent="scanner")
+            async with get_metrics().span("scan.pylint"):
+                process = await asyncio.create_subprocess_shell(
+                    f"pylint --output-format=json {repo_dir}/**/*.py",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=repo_dir
+                )
+                stdout, _ = await process.communicate()
             
             if stdout:
                 pylint_results = json.loads(stdout.decode())
@@ -73,16 +105,20 @@ class ScannerAgent:
     async def _scan_javascript(self, repo_dir: str) -> List[Dict]:
         """Scan JavaScript/TypeScript files using ESLint"""
         issues = []
+        if not get_capabilities().has("eslint"):
+            return issues
         
         try:
             # Run ESLint
-            process = await asyncio.create_subprocess_shell(
-                f"eslint --format json {repo_dir}",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=repo_dir
-            )
-            stdout, _ = await process.communicate()
+            get_metrics().inc("rift_subprocesses_total", agent="scanner")
+            async with get_metrics().span("scan.eslint"):
+                process = await asyncio.create_subprocess_shell(
+                    f"eslint --format json {repo_dir}",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=repo_dir
+                )
+                stdout, _ = await process.communicate()
             
             if stdout:
                 eslint_results = json.loads(stdout.decode())
@@ -100,21 +136,28 @@ class ScannerAgent:
         
         return issues
     
-    async def _scan_generic(self, repo_dir: str) -> List[Dict]:
-        """Generic code scanning for common issues"""
+    async def _scan_generic(self, repo_dir: str, emit=None) -> List[Dict]:
+        """Generic code scanning for common issues, optionally emitting per file"""
         issues = []
         
         # Walk through all files
         for root, dirs, files in os.walk(repo_dir):
             # Skip node_modules, .git, etc.
-            dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', 'venv']]
+            dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', 'venv', '.rift-venv']]
             
             for file in files:
                 ext = os.path.splitext(file)[1]
                 if ext in self.supported_languages:
                     file_path = os.path.join(root, file)
-                    file_issues = await self._scan_file(file_path)
-                    issues.extend(file_issues)
+                    with get_metrics().span("scan.file", file=os.path.relpath(file_path, repo_dir)):
+                        file_issues = await self._scan_file(file_path)
+                    if emit:
+                        for issue in file_issues:
+                            await emit(issue)
+                        # Let consumers run between files
+                        await asyncio.sleep(0)
+                    else:
+                        issues.extend(file_issues)
         
         return issues
     
@@ -123,17 +166,37 @@ class ScannerAgent:
         issues = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            
+            # Identical content (a fork's copy, an unchanged file) was scanned before
+            cache_key = self.cache.key(file_path, data)
+            cached = self.cache.get(cache_key, file_path)
+            if cached is not None:
+                return cached
+            
+            # Universal newlines, as text-mode open() would give
+            content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+            lines = content.splitlines(keepends=True)
+            
+            # Unused imports (Python)
+            if file_path.endswith('.py'):
+                issues.extend(self._find_unused_imports(file_path, content))
+            
+            # Trailing whitespace, reported once per file
+            trailing = [i for i, line in enumerate(lines, 1) if line.rstrip('\r\n') != line.rstrip()]
+            if trailing:
+                issues.append({
+                    "file": file_path,
+                    "line": trailing[0],
+                    "type": "LINTING",
+                    "description": f"Trailing whitespace on {len(trailing)} line(s)",
+                    "severity": "LOW"
+                })
             
             for i, line in enumerate(lines, 1):
                 # Check for common issues
                 
-                # Unused imports (Python)
-                if 'import ' in line and file_path.endswith('.py'):
-                    # Simple heuristic - would need AST analysis for accuracy
-                    pass
-                
                 # Missing semicolons (JavaScript)
                 if file_path.endswith('.js') and not line.strip().endswith((';', '{', '}', ',')):
                     if line.strip() and not line.strip().startswith('//'):
@@ -146,12 +209,53 @@ class ScannerAgent:
                         })
                 
                 # TODO: Add more pattern-based checks
+            
+            self.cache.put(cache_key, issues)
         
         except Exception as e:
             print(f"Error scanning {file_path}: {e}")
         
         return issues
     
+    def _find_unused_imports(self, file_path: str, content: str) -> List[Dict]:
+        """Find top-level imports whose names are never used in the module"""
+        if os.path.basename(file_path) == '__init__.py':
+            # Package re-exports are intentionally "unused"
+            return []
+        
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return []
+        
+        used = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                used.add(node.id)
+            elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+                # Names listed in __all__ or used in string annotations
+                used.update(node.value.replace('.', ' ').replace('[', ' ').split())
+        
+        issues = []
+        for node in tree.body:
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                continue
+            if isinstance(node, ast.ImportFrom) and node.module == '__future__':
+                continue
+            for alias in node.names:
+                if alias.name == '*':
+                    continue
+                binding = alias.asname or alias.name.split('.')[0]
+                if binding not in used:
+                    issues.append({
+                        "file": file_path,
+                        "line": node.lineno,
+                        "type": "LINTING",
+                        "description": f"Unused import '{alias.asname or alias.name}'",
+                        "severity": "LOW"
+                    })
+        return issues
+    
     async def analyze_test_failures(self, failures: List[str], repo_dir: str) -> List[Dict]:
         """Analyze test failures and convert to issues"""
         issues = []
@@ -208,3 +312,14 @@ class ScannerAgent:
             "fatal": "CRITICAL"
         }
         return severity_map.get(str(severity).lower(), "MEDIUM")
+
+
+_scanner: Optional[ScannerAgent] = None
+
+
+def get_scanner_agent() -> ScannerAgent:
+    """Return the process-wide scanner agent (it keeps no per-run state)"""
+    global _scanner
+    if _scanner is None:
+        _scanner = ScannerAgent()
+    return _scanner
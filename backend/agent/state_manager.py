@@ -3,19 +3,35 @@ State Manager - Manages agent execution state and results
 """
 import json
 import time
+import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 from collections import defaultdict
 
+from .metrics import get_metrics
+from .log_store import RunLog
+
+
+def trace_path(run_id: str) -> str:
+    return f"/tmp/trace_{run_id}.json"
+
 
 class StateManager:
     """Manages state for all agent runs"""
     
     def __init__(self):
         self.runs: Dict[str, Dict] = {}
-        self.logs: Dict[str, List] = defaultdict(list)
+        self.logs: Dict[str, RunLog] = {}
         self.fixes: Dict[str, List] = defaultdict(list)
         self.cicd_runs: Dict[str, List] = defaultdict(list)
+        self.prompt_sizes: Dict[str, List[int]] = defaultdict(list)
+        self.batches: Dict[str, Dict] = {}
+        # Bumped by every change to a run; with the epoch it is the run's ETag
+        self.versions: Dict[str, int] = {}
+        self.epoch = uuid.uuid4().hex[:8]
+    
+    def _changed(self, run_id: str):
+        self.versions[run_id] = self.versions.get(run_id, 0) + 1
     
     def initialize_run(self, run_id: str, metadata: Dict):
         """Initialize a new run"""
@@ -31,21 +47,22 @@ class StateManager:
                 "uptime": 0
             }
         }
+        self._changed(run_id)
     
-    def add_log(self, run_id: str, message: str, log_type: str = "info"):
-        """Add a log entry"""
-        self.logs[run_id].append({
-            "id": f"{run_id}_{len(self.logs[run_id])}",
-            "timestamp": datetime.now().isoformat(),
-            "message": message,
-            "type": log_type
-        })
+    def add_log(self, run_id: str, message: str, log_type: str = "info") -> int:
+        """Add a log entry and return its sequence number"""
+        log = self.logs.get(run_id)
+        if log is None:
+            log = self.logs[run_id] = RunLog(run_id)
+        self._changed(run_id)
+        return log.append(message, log_type)
     
     def update_stage(self, run_id: str, stage: str, progress: float):
         """Update current stage and progress"""
         if run_id in self.runs:
             self.runs[run_id]["stage"] = stage
             self.runs[run_id]["progress"] = progress
+            self._changed(run_id)
     
     def add_fix(self, run_id: str, fix_data: Dict):
         """Add a fix record"""
@@ -56,6 +73,7 @@ class StateManager:
             **fix_data
         }
         self.fixes[run_id].append(fix_record)
+        self._changed(run_id)
         
         # Update stats
         if run_id in self.runs:
@@ -72,6 +90,7 @@ class StateManager:
                     self.runs[run_id]["stats"]["fixed_bugs"] += 1
                 elif status == "FAILED":
                     self.runs[run_id]["stats"]["failed_fixes"] += 1
+                self._changed(run_id)
                 break
     
     def update_all_fixes_status(self, run_id: str, status: str):
@@ -81,6 +100,7 @@ class StateManager:
                 fix["status"] = status
                 if status == "FIXED":
                     self.runs[run_id]["stats"]["fixed_bugs"] += 1
+        self._changed(run_id)
     
     def add_cicd_run(self, run_id: str, status: str) -> int:
         """Add a CI/CD run record"""
@@ -91,6 +111,7 @@ class StateManager:
             "timestamp": datetime.now().isoformat(),
             "duration": "0s"
         })
+        self._changed(run_id)
         return cicd_id
     
     def update_cicd_run(self, run_id: str, cicd_id: int, status: str, duration: str):
@@ -99,8 +120,25 @@ class StateManager:
             if run["id"] == cicd_id:
                 run["status"] = status
                 run["duration"] = duration
+                self._changed(run_id)
                 break
     
+    def record_prompt(self, run_id: str, tokens: int):
+        """Record the estimated token size of a fix prompt"""
+        self.prompt_sizes[run_id].append(tokens)
+    
+    def get_prompt_stats(self, run_id: str) -> Dict:
+        """Summarize prompt sizes for a run"""
+        sizes = self.prompt_sizes[run_id]
+        if not sizes:
+            return {"prompts": 0, "total_tokens": 0, "mean_tokens": 0, "max_tokens": 0}
+        return {
+            "prompts": len(sizes),
+            "total_tokens": sum(sizes),
+            "mean_tokens": round(sum(sizes) / len(sizes), 1),
+            "max_tokens": max(sizes)
+        }
+    
     def get_status(self, run_id: str) -> Optional[Dict]:
         """Get current status of a run"""
         if run_id not in self.runs:
@@ -116,14 +154,63 @@ class StateManager:
             "repo_url": run["repo_url"],
             "team_name": run["team_name"],
             "team_leader": run["team_leader"],
-            "branch_name": run["branch_name"]
+            "branch_name": run["branch_name"],
+            "log_epoch": self.logs[run_id].epoch if run_id in self.logs else 0
+        }
+    
+    def create_batch(self, batch_id: str, run_ids: List[str]):
+        """Group runs started together by /api/analyze/batch"""
+        self.batches[batch_id] = {
+            "run_ids": run_ids,
+            "start_time": datetime.now().isoformat(),
+            "started": time.time()
+        }
+    
+    def get_batch_status(self, batch_id: str) -> Optional[Dict]:
+        """Aggregate progress of a batch and the status of each of its runs"""
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        
+        runs = []
+        final_statuses = defaultdict(int)
+        for run_id in batch["run_ids"]:
+            run = self.runs.get(run_id)
+            if run is None:
+                continue
+            finished = run["status"] == "completed"
+            if finished:
+                final_statuses[run.get("final_status", "UNKNOWN")] += 1
+            runs.append({
+                "run_id": run_id,
+                "repo_url": run["repo_url"],
+                "team_name": run["team_name"],
+                "status": run["status"],
+                "stage": run["stage"],
+                "progress": 100 if finished else run["progress"],
+                "final_status": run.get("final_status"),
+                "total_time": run.get("total_time")
+            })
+        
+        completed = sum(1 for run in runs if run["status"] == "completed")
+        return {
+            "batch_id": batch_id,
+            "start_time": batch["start_time"],
+            "elapsed": round(time.time() - batch["started"], 1),
+            "total": len(runs),
+            "completed": completed,
+            "status": "completed" if runs and completed == len(runs) else "running",
+            "progress": round(sum(run["progress"] for run in runs) / len(runs), 1) if runs else 0,
+            "final_statuses": dict(final_statuses),
+            "runs": runs
         }
     
-    def get_logs(self, run_id: str, limit: int = 100) -> Optional[List]:
-        """Get logs for a run"""
+    def get_logs(self, run_id: str, limit: int = 100, after: Optional[int] = None) -> Optional[List]:
+        """Get logs for a run (the newest `limit`, or the `limit` after sequence `after`)"""
         if run_id not in self.runs:
             return None
-        return self.logs[run_id][-limit:]
+        log = self.logs.get(run_id)
+        return log.entries(limit, after) if log else []
     
     def get_fixes(self, run_id: str) -> Optional[List]:
         """Get all fixes for a run"""
@@ -137,16 +224,83 @@ class StateManager:
             return None
         return self.cicd_runs[run_id]
     
+    def etag(self, run_id: str) -> Optional[str]:
+        """Entity tag of a run's current state; changes whenever the state does"""
+        if run_id not in self.runs:
+            return None
+        return f'"{self.epoch}-{self.versions.get(run_id, 0)}"'
+    
+    def get_snapshot(self, run_id: str, after: Optional[int] = None, limit: int = 500) -> Optional[Dict]:
+        """Status, logs (after sequence `after`), fixes and CI/CD runs in one response"""
+        if run_id not in self.runs:
+            return None
+        return {
+            "run_id": run_id,
+            "version": self.versions.get(run_id, 0),
+            "status": self.get_status(run_id),
+            "logs": self.get_logs(run_id, limit=limit, after=after),
+            "fixes": self.fixes[run_id],
+            "cicd_runs": self.cicd_runs[run_id]
+        }
+    
+    def export_run(self, run_id: str) -> Dict:
+        """Everything recorded for a run, as plain data for checkpoints"""
+        return {
+            "run": self.runs[run_id],
+            "logs": self.logs[run_id].export() if run_id in self.logs else [],
+            "fixes": self.fixes[run_id],
+            "cicd_runs": self.cicd_runs[run_id],
+            "prompt_sizes": self.prompt_sizes[run_id]
+        }
+    
+    def restore_run(self, run_id: str, snapshot: Dict, resumed: bool = False):
+        """
+        Reload a run exported by `export_run`. With `resumed`, the run
+        continues from this (possibly older) state, so its log starts a new
+        epoch and clients re-read it instead of trusting their last seq.
+        """
+        self.runs[run_id] = snapshot["run"]
+        self.logs[run_id] = RunLog.restore(run_id, snapshot.get("logs"))
+        if resumed:
+            self.logs[run_id].epoch += 1
+        self.fixes[run_id] = snapshot.get("fixes", [])
+        self.cicd_runs[run_id] = snapshot.get("cicd_runs", [])
+        self.prompt_sizes[run_id] = snapshot.get("prompt_sizes", [])
+        self._changed(run_id)
+    
     def finalize_run(self, run_id: str, final_data: Dict):
         """Finalize a run and generate results.json"""
         if run_id in self.runs:
             self.runs[run_id].update(final_data)
             self.runs[run_id]["status"] = "completed"
+            # Keep the timings with the run; the metrics registry forgets it below
+            metrics = get_metrics()
+            if not self.runs[run_id].get("timings"):
+                self.runs[run_id]["timings"] = metrics.run_summary(run_id)
+            self._changed(run_id)
             
             # Generate results.json
             results = self.get_complete_results(run_id)
             with open(f"/tmp/results_{run_id}.json", "w") as f:
                 json.dump(results, f, indent=2)
+            
+            # Move the finished timeline out of memory, for /api/runs/{run_id}/trace
+            trace = metrics.trace(run_id)
+            if trace:
+                with open(trace_path(run_id), "w") as f:
+                    json.dump(trace, f)
+            metrics.discard_run(run_id)
+    
+    def get_trace(self, run_id: str) -> Optional[Dict]:
+        """Chrome trace of a run, from memory or from the file written at finalize"""
+        trace = get_metrics().trace(run_id)
+        if trace is None and run_id in self.runs:
+            try:
+                with open(trace_path(run_id), "r") as f:
+                    trace = json.load(f)
+            except (OSError, ValueError):
+                trace = None
+        return trace
     
     def get_complete_results(self, run_id: str) -> Optional[Dict]:
         """Get complete results for a run"""
@@ -164,8 +318,13 @@ class StateManager:
             "end_time": run.get("end_time"),
             "total_time": run.get("total_time", 0),
             "final_status": run.get("final_status", "UNKNOWN"),
+            "stop_reason": run.get("stop_reason"),
+            "progress": run.get("progress"),
             "stats": run["stats"],
+            "prompt_stats": self.get_prompt_stats(run_id),
+            # Finished runs and runs executed by a worker process carry their timings
+            "timings": run.get("timings") or get_metrics().run_summary(run_id),
             "fixes": self.fixes[run_id],
             "cicd_runs": self.cicd_runs[run_id],
-            "logs": self.logs[run_id]
+            "logs": self.logs[run_id].entries() if run_id in self.logs else []
         }
@@ -4,22 +4,47 @@ Test Agent - Runs tests and analyzes results
 import os
 import asyncio
 import json
+import shlex
+import signal
+import tempfile
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from .impact_analyzer import ImpactAnalyzer, GLOBAL_FILES, SKIP_DIRS, is_test_file
+from .test_cache import get_test_cache, passed_test_files
+from .deps_cache import get_dependency_cache
+from .metrics import get_metrics
 
 
 class TestAgent:
     """Runs tests and analyzes results"""
     
+    __test__ = False  # not a pytest test class
+    
     def __init__(self):
         self.test_frameworks = {
             'python': ['pytest', 'unittest'],
             'javascript': ['jest', 'mocha', 'npm test'],
             'typescript': ['jest', 'npm test']
         }
+        self.workers = int(os.getenv("TEST_WORKERS", os.cpu_count() or 1))
+        self.shard_timeout = float(os.getenv("TEST_SHARD_TIMEOUT", 600))
+        self._xdist_available: Dict[str, bool] = {}
+        self.cache = get_test_cache()
+        self.install_deps = os.getenv("TEST_INSTALL_DEPS", "true").lower() == "true"
+        self.deps = get_dependency_cache()
     
-    async def run_tests(self, repo_dir: str) -> Dict:
-        """Run all tests in the repository"""
+    async def run_tests(self, repo_dir: str, changed_files: Optional[List[str]] = None,
+                        run_id: Optional[str] = None) -> Dict:
+        """
+        Run tests in the repository. With `changed_files`, only the test
+        files that depend on them are run; otherwise the full suite. Work is
+        spread across CPU cores and every shard has a timeout. Outcomes are
+        memoized by git tree (failures only for `run_id` and the same
+        dependencies), and test files that already passed against identical
+        dependencies are skipped. Dependencies are installed from the
+        lockfile-keyed cache before anything runs.
+        """
         
         start_time = time.time()
         
@@ -32,35 +57,375 @@ class TestAgent:
                 "passed": True,
                 "failures": [],
                 "duration": time.time() - start_time,
-                "message": "No tests found"
+                "message": "No tests found",
+                "mode": "full"
             }
         
-        # Run tests
-        process = await asyncio.create_subprocess_shell(
-            test_command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=repo_dir
+        tree = await self._tree_state(repo_dir)
+        analyzer = None
+        
+        mode = "full"
+        selected = None
+        if changed_files is not None:
+            analyzer = self._build_analyzer(repo_dir)
+            selected = analyzer.select_tests(changed_files) if analyzer else None
+            if selected is not None:
+                if not selected:
+                    return {
+                        "passed": True,
+                        "failures": [],
+                        "duration": time.time() - start_time,
+                        "message": "No tests affected by the changes",
+                        "mode": "impact",
+                        "selected_tests": []
+                    }
+                if self._build_command(test_command, selected):
+                    mode = "impact"
+        test_files = selected if mode == "impact" else None
+        
+        # Identical tree and command: reuse the verdict without running anything
+        verdict_key = None
+        scope = f"{run_id}:{self.deps.environment_key(repo_dir)}" if run_id else None
+        if tree:
+            verdict_key = self.cache.verdict_key(tree["tree"], test_command, test_files)
+            cached = self.cache.get_verdict(verdict_key, scope)
+            if cached:
+                return {**cached, "cached": True, "duration": time.time() - start_time}
+        
+        # Skip test files that passed before against the same dependency contents
+        file_keys: Dict[str, str] = {}
+        skipped: List[str] = []
+        if tree and self._supports_file_cache(repo_dir, test_command):
+            analyzer = analyzer or self._build_analyzer(repo_dir)
+            candidates = test_files if test_files is not None else self._discover_test_files(repo_dir, test_command)
+            if analyzer and candidates:
+                file_keys = {
+                    f: self._file_key(analyzer, tree["blobs"], f, test_command) for f in candidates
+                }
+                skipped = [f for f in candidates if self.cache.has_file_pass(file_keys[f])]
+                if skipped:
+                    test_files = [f for f in candidates if f not in skipped]
+                    if not test_files:
+                        result = {
+                            "passed": True,
+                            "failures": [],
+                            "duration": time.time() - start_time,
+                            "message": "All selected tests passed before on identical code",
+                            "mode": mode,
+                            "selected_tests": selected if mode == "impact" else None,
+                            "skipped_tests": skipped,
+                            "cached": True
+                        }
+                        self.cache.put_verdict(verdict_key, result)
+                        return result
+        
+        # Only pay for dependency setup once a run is actually needed
+        dependencies = []
+        env = None
+        if self.install_deps:
+            async with get_metrics().span("test.dependencies"):
+                prepared = await self.deps.prepare(repo_dir)
+            dependencies = prepared["steps"]
+            if prepared["env"]:
+                env = {**os.environ, **prepared["env"]}
+        
+        shards = await self._plan_shards(repo_dir, test_command, test_files, env)
+        shard_results = await asyncio.gather(
+            *[self._run_shard(command, repo_dir, files, env) for command, files in shards]
         )
+        commands = [command for command, _ in shards]
+        
+        # Merge shard results into the single-run shape
+        passed = all(shard["passed"] for shard in shard_results)
+        failures = []
+        for shard in shard_results:
+            failures.extend(shard["failures"])
+            for test_file in shard["passed_files"]:
+                if test_file in file_keys:
+                    self.cache.put_file_pass(file_keys[test_file])
+        
+        result = {
+            "passed": passed,
+            "failures": failures[:10],
+            "duration": time.time() - start_time,
+            "stdout": '\n'.join(shard["stdout"] for shard in shard_results),
+            "stderr": '\n'.join(shard["stderr"] for shard in shard_results),
+            "command": commands[0] if len(commands) == 1 else f"{len(commands)} shards of {test_command}",
+            "mode": mode,
+            "selected_tests": selected if mode == "impact" else None,
+            "skipped_tests": skipped,
+            "dependencies": dependencies,
+            "shards": [
+                {key: shard[key] for key in ("command", "passed", "duration", "timed_out")}
+                for shard in shard_results
+            ]
+        }
+        
+        # Timeouts depend on machine load, so they are not memoized
+        if verdict_key and not any(shard["timed_out"] for shard in shard_results):
+            self.cache.put_verdict(verdict_key, result, scope)
+        return result
+    
+    async def _tree_state(self, repo_dir: str) -> Optional[Dict]:
+        """HEAD's tree hash and blob ids, or None if the worktree has uncommitted changes"""
+        returncode, status = await self._git(repo_dir, "status", "--porcelain", "--untracked-files=no")
+        if returncode != 0 or status.strip():
+            return None
+        returncode, tree_hash = await self._git(repo_dir, "rev-parse", "HEAD^{tree}")
+        if returncode != 0:
+            return None
+        returncode, listing = await self._git(repo_dir, "ls-tree", "-r", "HEAD")
+        if returncode != 0:
+            return None
+        
+        blobs = {}
+        for line in listing.splitlines():
+            meta, _, path = line.partition('\t')
+            parts = meta.split()
+            if len(parts) == 3:
+                blobs[path] = parts[2]
+        return {"tree": tree_hash.strip(), "blobs": blobs}
+    
+    async def _git(self, repo_dir: str, *args: str) -> Tuple[int, str]:
+        async with get_metrics().subprocess_span("test", " ".join(("git",) + args)):
+            process = await asyncio.create_subprocess_exec(
+                "git", *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=repo_dir
+            )
+            stdout, _ = await process.communicate()
+        return process.returncode, stdout.decode(errors='replace')
+    
+    def _build_analyzer(self, repo_dir: str) -> Optional[ImpactAnalyzer]:
+        try:
+            return ImpactAnalyzer(repo_dir)
+        except Exception as e:
+            print(f"Impact analysis failed, running full suite: {e}")
+            return None
+    
+    def _supports_file_cache(self, repo_dir: str, test_command: str) -> bool:
+        """Per-file memoization needs JUnit reports and pytest's default file naming"""
+        if not test_command.startswith(('pytest', 'python -m pytest')):
+            return False
+        for config in ('pytest.ini', 'setup.cfg', 'tox.ini', 'pyproject.toml'):
+            try:
+                with open(os.path.join(repo_dir, config), 'r') as f:
+                    if 'python_files' in f.read():
+                        return False
+            except OSError:
+                continue
+        return True
+    
+    def _file_key(self, analyzer: ImpactAnalyzer, blobs: Dict[str, str],
+                  test_file: str, test_command: str) -> str:
+        """Hash of the test file's dependency closure plus repo-wide config"""
+        paths = analyzer.dependency_closure(test_file)
+        paths.update(path for path in blobs if os.path.basename(path) in GLOBAL_FILES)
+        return self.cache.file_key(
+            test_file, (f"{path}:{blobs.get(path, 'untracked')}" for path in paths), test_command
+        )
+    
+    async def _plan_shards(self, repo_dir: str, test_command: str, test_files: Optional[List[str]],
+                           env: Optional[Dict[str, str]] = None) -> List[Tuple[str, Optional[List[str]]]]:
+        """
+        Commands to run in parallel, each with the test files it names (None
+        for a whole-suite run): one natively parallel run or N file shards.
+        """
+        native = await self._build_native_parallel(repo_dir, test_command, test_files, env)
+        if native:
+            return [(native, test_files)]
+        
+        if self.workers > 1 and self._can_shard(repo_dir, test_command):
+            files = test_files if test_files is not None else self._discover_test_files(repo_dir, test_command)
+            if len(files) > 1:
+                shards = self._split_shards(repo_dir, files, min(self.workers, len(files)))
+                return [(self._build_command(test_command, shard), shard) for shard in shards]
+        
+        if test_files:
+            return [(self._build_command(test_command, test_files), test_files)]
+        return [(test_command, None)]
+    
+    async def _build_native_parallel(self, repo_dir: str, test_command: str, test_files: Optional[List[str]],
+                                     env: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Use the runner's own workers (pytest-xdist, Jest, go test -p) when available"""
+        if self.workers <= 1:
+            return None
+        
+        if test_command in ('pytest', 'python -m pytest') and await self._has_xdist(repo_dir, env):
+            command = f"{test_command} -n {self.workers}"
+        elif test_command == 'npm test' and self._uses_jest(repo_dir):
+            command = f"npm test -- --maxWorkers={self.workers}"
+        elif test_command == 'go test ./...':
+            command = f"go test -p {self.workers} ./..."
+        else:
+            return None
+        
+        if test_files:
+            return self._build_command(command, test_files)
+        return command
+    
+    async def _has_xdist(self, repo_dir: str, env: Optional[Dict[str, str]] = None) -> bool:
+        # Answer differs per virtualenv, so remember it per interpreter
+        interpreter = (env or {}).get("VIRTUAL_ENV", "system")
+        if interpreter not in self._xdist_available:
+            async with get_metrics().subprocess_span("test", "python -c 'import xdist'"):
+                process = await asyncio.create_subprocess_shell(
+                    "python -c 'import xdist'",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    cwd=repo_dir,
+                    env=env
+                )
+                self._xdist_available[interpreter] = await process.wait() == 0
+        return self._xdist_available[interpreter]
+    
+    def _uses_jest(self, repo_dir: str) -> bool:
+        return self._js_test_runner(repo_dir) == 'jest'
+    
+    def _js_test_runner(self, repo_dir: str) -> Optional[str]:
+        """The runner `npm test` starts, if it is one that takes test file paths"""
+        try:
+            with open(os.path.join(repo_dir, 'package.json'), 'r') as f:
+                script = json.load(f).get('scripts', {}).get('test', '')
+        except Exception:
+            return None
+        for runner in ('jest', 'vitest', 'mocha'):
+            if runner in script:
+                return runner
+        return None
+    
+    def _can_shard(self, repo_dir: str, test_command: str) -> bool:
+        """Whether the runner can be split into per-file shards"""
+        if test_command.startswith(('pytest', 'python -m pytest')):
+            return True
+        # Other scripts would ignore or choke on the appended file list
+        return test_command.startswith('npm test') and self._js_test_runner(repo_dir) is not None
+    
+    def _discover_test_files(self, repo_dir: str, test_command: str) -> List[str]:
+        """Test files the runner would pick up, relative to the repo"""
+        python = test_command.startswith(('pytest', 'python -m pytest'))
+        files = []
+        for root, dirs, names in os.walk(repo_dir):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), repo_dir)
+                if is_test_file(path) and path.endswith('.py') == python and not path.endswith('.go'):
+                    files.append(path)
+        return sorted(files)
+    
+    def _split_shards(self, repo_dir: str, files: List[str], count: int) -> List[List[str]]:
+        """Greedy split by file size so shards finish at about the same time"""
+        def size(path):
+            try:
+                return os.path.getsize(os.path.join(repo_dir, path))
+            except OSError:
+                return 0
+        
+        shards = [[] for _ in range(count)]
+        loads = [0] * count
+        for path in sorted(files, key=size, reverse=True):
+            lightest = loads.index(min(loads))
+            shards[lightest].append(path)
+            loads[lightest] += size(path)
+        return [sorted(shard) for shard in shards if shard]
+    
+    async def _run_shard(self, command: str, repo_dir: str, test_files: Optional[List[str]] = None,
+                         env: Optional[Dict[str, str]] = None) -> Dict:
+        """Run one test command, killing its process group after the timeout"""
+        start_time = time.time()
         
-        stdout, stderr = await process.communicate()
-        duration = time.time() - start_time
+        junit_path = None
+        if 'pytest' in command:
+            fd, junit_path = tempfile.mkstemp(prefix="rift_junit_", suffix=".xml")
+            os.close(fd)
+            command_line = f"{command} --junitxml={shlex.quote(junit_path)}"
+        else:
+            command_line = command
+        
+        get_metrics().inc("rift_subprocesses_total", agent="test")
+        shard_files = len(test_files) if test_files is not None else "all"
+        timed_out = False
+        async with get_metrics().span("test.shard", command=command, files=shard_files):
+            process = await asyncio.create_subprocess_shell(
+                command_line,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=repo_dir,
+                env=env,
+                start_new_session=True
+            )
+            
+            # Read into buffers owned here, so a timeout keeps what was printed
+            stdout, stderr = bytearray(), bytearray()
+            readers = asyncio.gather(_drain(process.stdout, stdout), _drain(process.stderr, stderr))
+            try:
+                await asyncio.wait_for(asyncio.shield(readers), self.shard_timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await readers
+            await process.wait()
+        
+        stdout, stderr = stdout.decode(errors='replace'), stderr.decode(errors='replace')
+        # pytest exits 5 when a file selection collects no tests
+        passed = not timed_out and (
+            process.returncode == 0
+            or (test_files is not None and process.returncode == 5 and 'pytest' in command)
+        )
         
-        # Parse test results
-        passed = process.returncode == 0
         failures = []
+        if timed_out:
+            failures.append(f"Timed out after {self.shard_timeout:.0f}s: {command}")
+            if "FAIL" in stdout + stderr:
+                failures.extend(self._parse_test_failures(stdout, stderr))
+        elif not passed:
+            failures = self._parse_test_failures(stdout, stderr)
+            if not failures:
+                failures = [f"{command} exited with code {process.returncode}"]
         
-        if not passed:
-            failures = self._parse_test_failures(stdout.decode(), stderr.decode())
+        passed_files = []
+        if junit_path:
+            if not timed_out:
+                reported = test_files if test_files is not None else self._discover_test_files(repo_dir, command)
+                passed_files = passed_test_files(junit_path, reported)
+            os.unlink(junit_path)
         
         return {
+            "command": command,
             "passed": passed,
             "failures": failures,
-            "duration": duration,
-            "stdout": stdout.decode(),
-            "stderr": stderr.decode()
+            "duration": time.time() - start_time,
+            "timed_out": timed_out,
+            "passed_files": passed_files,
+            "stdout": stdout,
+            "stderr": stderr
         }
     
+    def _build_command(self, test_command: str, test_files: List[str]) -> Optional[str]:
+        """Restrict a test command (optionally with worker flags) to specific test files"""
+        quoted = ' '.join(shlex.quote(f) for f in test_files)
+        
+        if test_command.startswith(('pytest', 'python -m pytest')):
+            return f"{test_command} {quoted}"
+        
+        if test_command.startswith('npm test'):
+            # Jest, Vitest and Mocha all accept test file paths
+            separator = "" if " -- " in test_command else " --"
+            return f"{test_command}{separator} {quoted}"
+        
+        if test_command.startswith('go test'):
+            directories = {os.path.dirname(f) for f in test_files}
+            packages = sorted(f"./{d}" if d else "." for d in directories)
+            base = test_command[:-len(' ./...')] if test_command.endswith(' ./...') else test_command
+            return f"{base} " + ' '.join(shlex.quote(p) for p in packages)
+        
+        # cargo test and unknown runners: no file-level selection
+        return None
+    
     async def _detect_test_command(self, repo_dir: str) -> str:
         """Detect which test command to use"""
         
@@ -121,3 +486,22 @@ class TestAgent:
                     failures.append(line.strip())
         
         return failures[:10]  # Limit to first 10 failures
+
+
+async def _drain(stream: asyncio.StreamReader, buffer: bytearray):
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return
+        buffer.extend(chunk)
+
+
+_test_agent: Optional[TestAgent] = None
+
+
+def get_test_agent() -> TestAgent:
+    """Return the process-wide test agent (it keeps no per-run state)"""
+    global _test_agent
+    if _test_agent is None:
+        _test_agent = TestAgent()
+    return _test_agent
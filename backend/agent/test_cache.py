@@ -0,0 +1,141 @@
+"""
+Test Cache - Memoizes test outcomes by git tree and per-test-file dependency hash
+"""
+import os
+import json
+import hashlib
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, Iterable, List, Optional
+
+
+def default_cache_dir() -> str:
+    return os.getenv("RIFT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rift_cache"))
+
+
+class TestResultCache:
+    """
+    Two levels of memoization, both stored as small JSON files so several
+    processes can share them:
+
+    - verdicts: the merged result of a test command on an exact git tree.
+      Passes are shared by every run. A failure may come from the
+      environment (a flaky test, a missing service) rather than the tree,
+      so it is only reused within its `scope`: the run that saw it, with
+      the same dependencies
+    - file passes: a test file that passed while every file it depends on
+      had the same content, keyed by a hash over those blob ids
+    """
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "tests")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    # Whole-tree verdicts
+
+    def verdict_key(self, tree_hash: str, command: str, test_files: Optional[List[str]]) -> str:
+        selection = "\n".join(test_files) if test_files is not None else "*"
+        return _digest("verdict", tree_hash, command, selection)
+
+    def get_verdict(self, key: str, scope: Optional[str] = None) -> Optional[Dict]:
+        verdict = self._read(key)
+        if verdict is None and scope:
+            verdict = self._read(_digest("failure", key, scope))
+        if verdict is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return verdict
+
+    def put_verdict(self, key: str, result: Dict, scope: Optional[str] = None):
+        """Store a pass for every run, a failure only for `scope` (and not at all without one)"""
+        if not result["passed"]:
+            if not scope:
+                return
+            key = _digest("failure", key, scope)
+        keep = ("passed", "failures", "duration", "command", "mode", "selected_tests", "message")
+        self._write(key, {k: result[k] for k in keep if k in result})
+
+    # Per test file passes
+
+    def file_key(self, test_file: str, blob_ids: Iterable[str], command: str) -> str:
+        return _digest("file", test_file, command, *sorted(blob_ids))
+
+    def has_file_pass(self, key: str) -> bool:
+        return self._read(key) is not None
+
+    def put_file_pass(self, key: str):
+        self._write(key, {"passed": True})
+
+    # Storage
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, value: Dict):
+        # Write-then-rename so concurrent readers never see partial files
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(value, f)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Failed to write test cache entry: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+
+def passed_test_files(junit_path: str, test_files: List[str]) -> List[str]:
+    """
+    Test files whose every test case passed (or was skipped) according to a
+    pytest JUnit XML report.
+    """
+    try:
+        root = ElementTree.parse(junit_path).getroot()
+    except (OSError, ElementTree.ParseError):
+        return []
+
+    # pytest's default xunit2 report names cases by dotted module path
+    modules = {os.path.splitext(f)[0].replace(os.sep, '.').replace('/', '.'): f for f in test_files}
+    outcome: Dict[str, bool] = {}
+    for case in root.iter('testcase'):
+        test_file = case.get('file')
+        if test_file not in test_files:
+            classname = case.get('classname', '')
+            test_file = next(
+                (path for module, path in modules.items()
+                 if classname == module or classname.startswith(module + '.')),
+                None
+            )
+        if test_file is None:
+            continue
+        failed = case.find('failure') is not None or case.find('error') is not None
+        outcome[test_file] = outcome.get(test_file, True) and not failed
+
+    return sorted(path for path, ok in outcome.items() if ok)
+
+
+_cache: Optional[TestResultCache] = None
+
+
+def get_test_cache() -> TestResultCache:
+    """Return the process-wide test result cache"""
+    global _cache
+    if _cache is None:
+        _cache = TestResultCache()
+    return _cache
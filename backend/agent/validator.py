@@ -0,0 +1,184 @@
+"""
+Validator - Fast syntax checks for generated fixes before they are written
+"""
+import os
+import shutil
+import asyncio
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .metrics import get_metrics
+
+
+JS_EXTENSIONS = ('.js', '.mjs', '.cjs')
+BRACE_EXTENSIONS = ('.jsx', '.ts', '.tsx', '.java', '.rs')
+
+
+class ValidationResult:
+    """Outcome of a syntax check"""
+
+    def __init__(self, valid: bool, error: str = "", validator: str = ""):
+        self.valid = valid
+        self.error = error
+        self.validator = validator
+
+    def to_dict(self) -> Dict:
+        return {"valid": self.valid, "error": self.error, "validator": self.validator}
+
+
+class FixValidator:
+    """
+    Checks that a fixed file still parses: `compile()` for Python, `node
+    --check` for JavaScript, `gofmt -e` for Go and a delimiter balance check
+    for other brace languages. CPU-bound checks run in a process pool.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or int(
+            os.getenv("VALIDATOR_WORKERS", min(4, os.cpu_count() or 1))
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.node = shutil.which("node")
+        self.gofmt = shutil.which("gofmt")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that owns an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def shutdown(self):
+        """Stop the process pool (it is started again on the next validation)"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def validate(self, file_path: str, content: str) -> ValidationResult:
+        """Check `content` as the new contents of `file_path`"""
+        loop = asyncio.get_running_loop()
+
+        if file_path.endswith('.py'):
+            error = await loop.run_in_executor(self._get_pool(), check_python, content, file_path)
+            return ValidationResult(not error, error, "python")
+
+        if file_path.endswith(JS_EXTENSIONS) and self.node:
+            return await self._run_checker([self.node, "--check"], content, file_path, "node")
+
+        if file_path.endswith('.go') and self.gofmt:
+            return await self._run_checker([self.gofmt, "-e"], content, file_path, "gofmt")
+
+        if file_path.endswith(JS_EXTENSIONS + BRACE_EXTENSIONS + ('.go',)):
+            # Single quotes are lifetimes in Rust, not strings
+            quotes = '"' if file_path.endswith('.rs') else '"\'`'
+            error = await loop.run_in_executor(self._get_pool(), check_delimiters, content, quotes)
+            return ValidationResult(not error, error, "delimiters")
+
+        return ValidationResult(True, "", "none")
+
+    async def _run_checker(self, command: list, content: str, file_path: str,
+                           name: str) -> ValidationResult:
+        suffix = os.path.splitext(file_path)[1]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, prefix="rift_validate_")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            async with get_metrics().subprocess_span("validator", " ".join(command)):
+                process = await asyncio.create_subprocess_exec(
+                    *command, temp_path,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                _, stderr = await process.communicate()
+            if process.returncode == 0:
+                return ValidationResult(True, "", name)
+            error = stderr.decode(errors='replace').replace(temp_path, os.path.basename(file_path))
+            # Drop the checker's own stack trace, keep the parser message
+            error = '\n'.join(l for l in error.split('\n') if not l.startswith('    at '))
+            return ValidationResult(False, error.strip()[:500], name)
+        finally:
+            os.unlink(temp_path)
+
+
+def check_python(content: str, file_path: str) -> str:
+    """Return a syntax error message, or "" if the code compiles"""
+    try:
+        compile(content, file_path, 'exec', dont_inherit=True)
+        return ""
+    except SyntaxError as e:
+        return f"SyntaxError: {e.msg} (line {e.lineno})"
+    except ValueError as e:
+        return f"ValueError: {e}"
+
+
+def check_delimiters(content: str, quotes: str = '"\'`') -> str:
+    """
+    Return an error if (), [] and {} are unbalanced outside of strings and
+    comments, or "" if they balance. Handles //, /* */, quotes and template
+    literals, which covers JS/TS/Java/Go/Rust well enough to catch truncated
+    or mangled patches.
+    """
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    line = 1
+    i = 0
+    length = len(content)
+
+    while i < length:
+        char = content[i]
+        if char == '\n':
+            line += 1
+        elif char == '/' and content.startswith('//', i):
+            end = content.find('\n', i)
+            i = length if end == -1 else end
+            continue
+        elif char == '/' and content.startswith('/*', i):
+            end = content.find('*/', i + 2)
+            if end == -1:
+                return f"Unterminated block comment (line {line})"
+            line += content.count('\n', i, end)
+            i = end + 2
+            continue
+        elif char in quotes:
+            start_line = line
+            i += 1
+            while i < length and content[i] != char:
+                if content[i] == '\\':
+                    i += 1
+                elif content[i] == '\n':
+                    if char != '`':
+                        # Unterminated single-line string, e.g. a stray apostrophe
+                        break
+                    line += 1
+                i += 1
+            if i >= length and char == '`':
+                return f"Unterminated template literal (line {start_line})"
+            if i < length and content[i] == '\n':
+                continue
+        elif char in '([{':
+            stack.append((char, line))
+        elif char in ')]}':
+            if not stack or stack[-1][0] != pairs[char]:
+                return f"Unexpected '{char}' (line {line})"
+            stack.pop()
+        i += 1
+
+    if stack:
+        char, opened = stack[-1]
+        return f"Unclosed '{char}' (line {opened})"
+    return ""
+
+
+_validator: Optional[FixValidator] = None
+
+
+def get_fix_validator() -> FixValidator:
+    """Return the process-wide validator, creating it on first use"""
+    global _validator
+    if _validator is None:
+        _validator = FixValidator()
+    return _validator
@@ -3,16 +3,25 @@ RIFT 2026 - Autonomous CI/CD Healing Agent
 Main FastAPI Application
 """
 import os
+import sys
+import uuid
 import asyncio
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import subprocess
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from typing import List, Optional
 import uvicorn
 
 from backend.agent.orchestrator import AgentOrchestrator
 from backend.agent.state_manager import StateManager
+from backend.agent.llm_client import get_llm_client
+from backend.agent.checkpoint import get_checkpoint_store
+from backend.agent.metrics import get_metrics
+from backend.agent.loop_monitor import get_loop_monitor
+from backend.agent.capabilities import get_capabilities
+from backend.agent.job_queue import get_job_queue, FAILED
 
 app = FastAPI(title="RIFT CI/CD Healing Agent API", version="1.0.0")
 
@@ -27,11 +36,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The dashboard reads the snapshot ETag to send it back in If-None-Match
+    expose_headers=["ETag"],
 )
 
 # Global state manager
 state_manager = StateManager()
 
+# Runs resumed on startup; referenced so the tasks are not garbage collected
+resumed_tasks = set()
+
+# "inline" runs agents in this process; "queue" hands them to worker processes
+EXECUTION_MODE = os.getenv("RIFT_EXECUTION_MODE", "inline").lower()
+
+# Snapshot version of each queued run last loaded into the state manager
+synced_versions = {}
+
+# Worker pool started with the API in queue mode
+worker_pool: Optional[subprocess.Popen] = None
+
+# Startup probe of git, linters and test runners (see /health)
+capability_probe: Optional[asyncio.Task] = None
+
 
 class AnalyzeRequest(BaseModel):
     repo_url: HttpUrl
@@ -40,6 +66,17 @@ class AnalyzeRequest(BaseModel):
     retry_limit: int = 5
 
 
+class BatchRepository(BaseModel):
+    repo_url: HttpUrl
+    team_name: str
+    team_leader: str
+
+
+class BatchAnalyzeRequest(BaseModel):
+    repos: List[BatchRepository]
+    retry_limit: int = 5
+
+
 class AgentStatus(BaseModel):
     run_id: str
     status: str
@@ -48,6 +85,106 @@ class AgentStatus(BaseModel):
     message: str
 
 
+def sync_run(run_id: str):
+    """Load the latest state a worker published for a queued run"""
+    if EXECUTION_MODE != "queue":
+        return
+    queue = get_job_queue()
+    snapshot = queue.snapshot(run_id, synced_versions.get(run_id, 0))
+    if snapshot is not None:
+        state_manager.restore_run(run_id, snapshot["data"])
+        synced_versions[run_id] = snapshot["version"]
+    elif run_id in state_manager.runs and state_manager.runs[run_id]["status"] != "completed":
+        job = queue.job(run_id)
+        if job and job["status"] == FAILED:
+            state_manager.add_log(run_id, f"Fatal error: {job['error']}", "error")
+            state_manager.finalize_run(run_id, {"final_status": "ERROR", "error": job["error"]})
+
+
+def enqueue_run(orchestrator: AgentOrchestrator):
+    """Hand a run to the worker processes; they publish its state as it goes"""
+    state_manager.update_stage(orchestrator.run_id, "QUEUED", 0)
+    get_job_queue().enqueue(orchestrator.run_id, {
+        "repo_url": orchestrator.repo_url,
+        "team_name": orchestrator.team_name,
+        "team_leader": orchestrator.team_leader,
+        "retry_limit": orchestrator.retry_limit
+    })
+
+
+async def run_batch(orchestrators: List[AgentOrchestrator]):
+    """Run a batch in this process, a few runs at a time"""
+    semaphore = asyncio.Semaphore(int(os.getenv("BATCH_CONCURRENCY", 4)))
+    
+    async def run_one(orchestrator: AgentOrchestrator):
+        async with semaphore:
+            await run_agent(orchestrator)
+    
+    await asyncio.gather(*[run_one(orchestrator) for orchestrator in orchestrators])
+
+
+async def run_agent(orchestrator: AgentOrchestrator):
+    """Run an orchestrator, recording errors that escape it"""
+    try:
+        await orchestrator.run()
+    except Exception as e:
+        print(f"[RIFT] Background task error for {orchestrator.run_id}: {str(e)}")
+        orchestrator._log(f"Fatal error: {str(e)}", "error")
+        orchestrator._update_stage("ERROR", 0)
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Report code that blocks the event loop (and so every request)"""
+    get_loop_monitor().start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await get_loop_monitor().stop()
+
+
+@app.on_event("startup")
+async def probe_capabilities():
+    """Find git, linters and test runners once, in the background, for every run to reuse"""
+    global capability_probe
+    capability_probe = asyncio.create_task(get_capabilities().probe(), name="capabilities.probe")
+
+
+@app.on_event("startup")
+async def start_worker_pool():
+    """In queue mode, start the worker processes unless they are deployed separately"""
+    global worker_pool
+    if EXECUTION_MODE != "queue" or os.getenv("RIFT_START_WORKERS", "true").lower() != "true":
+        return
+    worker_pool = subprocess.Popen([sys.executable, "-m", "backend.worker"])
+    print(f"[RIFT] Started worker pool (pid {worker_pool.pid})")
+
+
+@app.on_event("shutdown")
+async def stop_worker_pool():
+    if worker_pool is not None and worker_pool.poll() is None:
+        worker_pool.terminate()
+
+
+@app.on_event("startup")
+async def resume_interrupted_runs():
+    """Continue runs a previous process was stopped in the middle of"""
+    # Workers resume queued runs themselves when a lease expires
+    if EXECUTION_MODE == "queue" or os.getenv("RIFT_RESUME_RUNS", "true").lower() != "true":
+        return
+    for checkpoint in get_checkpoint_store().pending():
+        try:
+            orchestrator = AgentOrchestrator.from_checkpoint(checkpoint, state_manager)
+        except Exception as e:
+            print(f"[RIFT] Could not resume run {checkpoint.get('run_id')}: {str(e)}")
+            continue
+        print(f"[RIFT] Resuming run {orchestrator.run_id} after '{checkpoint['phase']}'")
+        task = asyncio.create_task(run_agent(orchestrator))
+        resumed_tasks.add(task)
+        task.add_done_callback(resumed_tasks.discard)
+
+
 @app.get("/")
 async def root():
     return {
@@ -62,10 +199,24 @@ async def health_check():
     return {
         "status": "healthy",
         "active_runs": len(state_manager.runs),
-        "run_ids": list(state_manager.runs.keys())
+        "run_ids": list(state_manager.runs.keys()),
+        "llm": get_llm_client().get_stats(),
+        "event_loop": get_loop_monitor().get_stats(),
+        "execution_mode": EXECUTION_MODE,
+        "jobs": get_job_queue().counts() if EXECUTION_MODE == "queue" else None,
+        "capabilities": get_capabilities().get_stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: stage durations, subprocess counts, LLM latency and
+    tokens, pipeline queue depths, active runs and event loop lag
+    """
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/analyze")
 async def analyze_repository(request: AnalyzeRequest, background_tasks: BackgroundTasks):
     """
@@ -87,16 +238,16 @@ async def analyze_repository(request: AnalyzeRequest, background_tasks: Backgrou
         print(f"[RIFT] Created orchestrator with run_id: {run_id}")
         print(f"[RIFT] State manager has run: {run_id in state_manager.runs}")
         
-        # Start agent in background - wrap in async function
-        async def run_agent():
-            try:
-                await orchestrator.run()
-            except Exception as e:
-                print(f"[RIFT] Background task error for {run_id}: {str(e)}")
-                orchestrator._log(f"Fatal error: {str(e)}", "error")
-                orchestrator._update_stage("ERROR", 0)
+        if EXECUTION_MODE == "queue":
+            enqueue_run(orchestrator)
+            return {
+                "run_id": run_id,
+                "status": "queued",
+                "message": "Agent analysis queued"
+            }
         
-        background_tasks.add_task(run_agent)
+        # Start agent in background
+        background_tasks.add_task(run_agent, orchestrator)
         
         return {
             "run_id": run_id,
@@ -109,11 +260,69 @@ async def analyze_repository(request: AnalyzeRequest, background_tasks: Backgrou
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest, background_tasks: BackgroundTasks):
+    """
+    Start runs for many repositories at once. Forks share one git object
+    store and identical files are scanned once; progress is reported for
+    the batch as a whole at /api/batch/{batch_id}.
+    """
+    if not request.repos:
+        raise HTTPException(status_code=400, detail="No repositories given")
+    
+    try:
+        orchestrators = [
+            AgentOrchestrator(
+                repo_url=str(repo.repo_url),
+                team_name=repo.team_name,
+                team_leader=repo.team_leader,
+                retry_limit=request.retry_limit,
+                state_manager=state_manager
+            )
+            for repo in request.repos
+        ]
+    except Exception as e:
+        print(f"[RIFT] Error creating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    batch_id = str(uuid.uuid4())
+    run_ids = [orchestrator.run_id for orchestrator in orchestrators]
+    state_manager.create_batch(batch_id, run_ids)
+    print(f"[RIFT] Created batch {batch_id} with {len(run_ids)} runs")
+    
+    if EXECUTION_MODE == "queue":
+        for orchestrator in orchestrators:
+            enqueue_run(orchestrator)
+    else:
+        background_tasks.add_task(run_batch, orchestrators)
+    
+    return {
+        "batch_id": batch_id,
+        "run_ids": run_ids,
+        "status": "queued" if EXECUTION_MODE == "queue" else "started",
+        "message": f"Batch of {len(run_ids)} repositories started"
+    }
+
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """
+    Aggregate progress of a batch plus the status of each run in it
+    """
+    batch = state_manager.batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch ID not found")
+    for run_id in batch["run_ids"]:
+        sync_run(run_id)
+    return state_manager.get_batch_status(batch_id)
+
+
 @app.get("/api/status/{run_id}")
 async def get_status(run_id: str):
     """
     Get current status of an agent run
     """
+    sync_run(run_id)
     status = state_manager.get_status(run_id)
     if not status:
         # Return default status instead of 404 to prevent frontend errors
@@ -137,11 +346,13 @@ async def get_status(run_id: str):
 
 
 @app.get("/api/logs/{run_id}")
-async def get_logs(run_id: str, limit: int = 100):
+async def get_logs(run_id: str, limit: int = 100, after: Optional[int] = None):
     """
-    Get logs for a specific run
+    Get logs for a specific run: the last `limit` lines, or with `after`,
+    up to `limit` lines following that sequence number
     """
-    logs = state_manager.get_logs(run_id, limit=limit)
+    sync_run(run_id)
+    logs = state_manager.get_logs(run_id, limit=limit, after=after)
     if logs is None:
         # Return empty logs instead of 404
         return {"logs": []}
@@ -153,6 +364,7 @@ async def get_fixes(run_id: str):
     """
     Get all fixes applied during a run
     """
+    sync_run(run_id)
     fixes = state_manager.get_fixes(run_id)
     if fixes is None:
         # Return empty fixes instead of 404
@@ -165,6 +377,7 @@ async def get_cicd_runs(run_id: str):
     """
     Get CI/CD test runs for a specific agent run
     """
+    sync_run(run_id)
     runs = state_manager.get_cicd_runs(run_id)
     if runs is None:
         # Return empty runs instead of 404
@@ -172,11 +385,48 @@ async def get_cicd_runs(run_id: str):
     return {"cicd_runs": runs}
 
 
+@app.get("/api/runs/{run_id}/snapshot")
+async def get_run_snapshot(run_id: str, request: Request, after: Optional[int] = None, limit: int = 500):
+    """
+    Status, logs (after sequence `after`), fixes and CI/CD runs of a run in
+    one response. The ETag changes with every change to the run; a request
+    whose If-None-Match still matches gets an empty 304.
+    """
+    sync_run(run_id)
+    etag = state_manager.etag(run_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(
+        state_manager.get_snapshot(run_id, after=after, limit=limit),
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+@app.get("/api/runs/{run_id}/trace")
+async def get_trace(run_id: str):
+    """
+    Timeline of a run (subprocesses, model calls, commits, scan and test
+    shards) in Chrome trace-event format, for chrome://tracing or Perfetto
+    """
+    sync_run(run_id)
+    trace = state_manager.get_trace(run_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace recorded for this run")
+    return JSONResponse(
+        trace,
+        headers={"Content-Disposition": f'attachment; filename="trace_{run_id}.json"'}
+    )
+
+
 @app.get("/api/results/{run_id}")
 async def get_results(run_id: str):
     """
     Get complete results for a run (for results.json generation)
     """
+    sync_run(run_id)
     results = state_manager.get_complete_results(run_id)
     if not results:
         raise HTTPException(status_code=404, detail="Run ID not found")
@@ -0,0 +1,81 @@
+"""
+Dependency Cache tests - the shared venv must never hold workspace code or other platforms' packages
+"""
+import os
+import tempfile
+import unittest
+
+from backend.agent.deps_cache import DependencyCache, _poetry_pins
+
+
+def write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class PythonSpecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.temp.name, "repo")
+        self.cache = DependencyCache(os.path.join(self.temp.name, "cache"))
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_local_entries_are_kept_out_of_the_cached_venv(self):
+        write(os.path.join(self.repo, "requirements.txt"),
+              "-e .\n./libs/foo\nrequests==2.31.0  # http\n"
+              "-e git+https://github.com/org/lib.git#egg=lib\nwheels/pkg-1.0-py3-none-any.whl\n")
+        _, remote, local = self.cache._python_spec(self.repo)
+        self.assertEqual(remote, ["requests==2.31.0", "-e git+https://github.com/org/lib.git#egg=lib"])
+        self.assertEqual(local, ["-e .", "./libs/foo", "wheels/pkg-1.0-py3-none-any.whl"])
+
+    def test_nested_includes_are_part_of_the_key(self):
+        write(os.path.join(self.repo, "requirements.txt"), "-r base.txt\n-c constraints.txt\n")
+        write(os.path.join(self.repo, "base.txt"), "requests==2.31.0\n")
+        write(os.path.join(self.repo, "constraints.txt"), "urllib3<2\n")
+        key, remote, _ = self.cache._python_spec(self.repo)
+        self.assertIn("requests==2.31.0", remote)
+        self.assertIn(f"-c {os.path.realpath(os.path.join(self.repo, 'constraints.txt'))}", remote)
+
+        write(os.path.join(self.repo, "base.txt"), "requests==2.32.0\n")
+        self.assertNotEqual(self.cache._python_spec(self.repo)[0], key)
+        key = self.cache._python_spec(self.repo)[0]
+        write(os.path.join(self.repo, "constraints.txt"), "urllib3<3\n")
+        self.assertNotEqual(self.cache._python_spec(self.repo)[0], key)
+
+
+class PoetryPinsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.lock = os.path.join(self.temp.name, "poetry.lock")
+        self.pyproject = os.path.join(self.temp.name, "pyproject.toml")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_platform_only_packages_keep_their_markers(self):
+        write(self.pyproject, '[tool.poetry.dependencies]\npython = "^3.10"\n'
+                              'pywin32 = {version = "^306", markers = "sys_platform == \'win32\'"}\n'
+                              'click = "^8.0"\n')
+        write(self.lock, '[[package]]\nname = "click"\nversion = "8.1.7"\n\n'
+                         '[package.dependencies]\ncolorama = {version = "*", markers = "platform_system == \\"Windows\\""}\n\n'
+                         '[[package]]\nname = "colorama"\nversion = "0.4.6"\n\n'
+                         '[[package]]\nname = "pywin32"\nversion = "306"\n')
+        self.assertEqual(_poetry_pins(self.lock, self.pyproject), [
+            "click==8.1.7",
+            'colorama==0.4.6 ; (platform_system == "Windows")',
+            "pywin32==306 ; (sys_platform == 'win32')",
+        ])
+
+    def test_markers_recorded_in_the_lock_win(self):
+        write(self.lock, '[[package]]\nname = "pywin32"\nversion = "306"\n'
+                         'markers = "sys_platform == \\"win32\\""\n')
+        self.assertEqual(_poetry_pins(self.lock, self.pyproject), ['pywin32==306 ; sys_platform == "win32"'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+LLM Client tests - coalesced calls when the owning task is cancelled
+"""
+import time
+import asyncio
+import unittest
+
+from backend.agent.llm_client import LLMClient
+from backend.agent.llm_providers import LLMProvider
+
+
+class SlowProvider(LLMProvider):
+    name = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return f"echo: {prompt}"
+
+
+class CoalescingCancellationTest(unittest.TestCase):
+
+    def client(self, provider):
+        return LLMClient(requests_per_minute=6000, max_concurrency=4, max_retries=0, provider=provider)
+
+    def test_waiter_survives_owner_cancellation(self):
+        provider = SlowProvider(0.2)
+        client = self.client(provider)
+
+        async def scenario():
+            owner = asyncio.create_task(client.generate("same prompt"))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(client.generate("same prompt"))
+            await asyncio.sleep(0.05)
+            owner.cancel()
+            response = await asyncio.wait_for(waiter, timeout=5)
+            with self.assertRaises(asyncio.CancelledError):
+                await owner
+            return response
+
+        response = asyncio.run(scenario())
+        self.assertEqual(response.text, "echo: same prompt")
+        self.assertEqual(client.stats["coalesced"], 1)
+        self.assertEqual(provider.calls, 2)
+
+    def test_cancelled_waiter_is_cancelled(self):
+        client = self.client(SlowProvider(0.2))
+
+        async def scenario():
+            owner = asyncio.create_task(client.generate("same prompt"))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(client.generate("same prompt"))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            return await asyncio.wait_for(owner, timeout=5)
+
+        self.assertEqual(asyncio.run(scenario()).text, "echo: same prompt")
+
+
+if __name__ == "__main__":
+    unittest.main()
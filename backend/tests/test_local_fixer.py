@@ -0,0 +1,72 @@
+"""
+Local Fixer tests - rule-based edits must never produce broken code
+"""
+import unittest
+
+from backend.agent.local_fixer import LocalFixer
+
+
+def semicolon_issue(line: int, file: str = "app.js"):
+    return {"file": file, "line": line, "description": "Missing semicolon."}
+
+
+class MissingSemicolonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixer = LocalFixer()
+
+    def fix(self, lines, line):
+        content = "\n".join(lines) + "\n"
+        return self.fixer.fix(semicolon_issue(line), content)
+
+    def test_last_object_property_is_left_alone(self):
+        self.assertIsNone(self.fix(["const o = {", "  a: 1,", "  b: 2", "};"], 3))
+
+    def test_object_property_inside_literal_is_left_alone(self):
+        self.assertIsNone(self.fix(["const o = {", "  a: 1", "  , b: 2", "};"], 2))
+        self.assertIsNone(self.fix(["return {", "  a: call()", "}"], 2))
+
+    def test_array_element_is_left_alone(self):
+        self.assertIsNone(self.fix(["const a = [", "  1", "  , 2", "];"], 2))
+        self.assertIsNone(self.fix(["const a = [", "  1,", "  2", "];"], 3))
+
+    def test_call_argument_is_left_alone(self):
+        self.assertIsNone(self.fix(["foo(", "  bar", "  , baz", ")"], 2))
+
+    def test_statement_in_block_is_fixed(self):
+        result = self.fix(["function f() {", "  doThing()", "  return 1;", "}"], 2)
+        self.assertEqual(result["fixed_code"].split("\n")[1], "  doThing();")
+
+    def test_statement_in_callback_block_is_fixed(self):
+        result = self.fix(["run(() => {", "  doThing()", "  other();", "});"], 2)
+        self.assertEqual(result["fixed_code"].split("\n")[1], "  doThing();")
+
+    def test_statement_inside_template_literal_is_left_alone(self):
+        self.assertIsNone(self.fix(["const s = `", "  hello", "  world`;"], 2))
+
+
+class TrailingWhitespaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixer = LocalFixer()
+
+    def fix(self, file, lines):
+        issue = {"file": file, "line": 1, "description": "Trailing whitespace"}
+        result = self.fixer.fix(issue, "\n".join(lines) + "\n")
+        return result["fixed_code"].split("\n")[:-1]
+
+    def test_python_triple_quoted_string_is_preserved(self):
+        lines = ["x = 1   ", 's = """first  ', 'second  """   ', "y = 2 "]
+        self.assertEqual(self.fix("m.py", lines), ["x = 1", 's = """first  ', 'second  """', "y = 2"])
+
+    def test_js_template_literal_is_preserved(self):
+        lines = ["const a = 1;  ", "const s = `first  ", "${a}  ", "last`;  "]
+        self.assertEqual(self.fix("m.js", lines), ["const a = 1;", "const s = `first  ", "${a}  ", "last`;"])
+
+    def test_hash_in_js_string_does_not_hide_strings(self):
+        lines = ["const c = '#';  ", "const s = `x  ", "y`;"]
+        self.assertEqual(self.fix("m.js", lines), ["const c = '#';", "const s = `x  ", "y`;"])
+
+
+if __name__ == "__main__":
+    unittest.main()
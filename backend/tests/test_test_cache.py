@@ -0,0 +1,85 @@
+"""
+Test Cache tests - a failing verdict is only replayed for the run and environment that produced it
+"""
+import asyncio
+import os
+import subprocess
+import tempfile
+import unittest
+
+from backend.agent.test_agent import TestAgent
+from backend.agent.test_cache import TestResultCache
+
+FAILED = {"passed": False, "failures": ["FAILED test_app.py::test_value"], "duration": 1.0}
+PASSED = {"passed": True, "failures": [], "duration": 1.0}
+
+
+class VerdictScopeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.cache = TestResultCache(self.temp.name)
+        self.key = self.cache.verdict_key("tree", "pytest", None)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def test_failure_is_reused_within_its_run(self):
+        self.cache.put_verdict(self.key, FAILED, "run_a:deps1")
+        self.assertEqual(self.cache.get_verdict(self.key, "run_a:deps1")["failures"], FAILED["failures"])
+
+    def test_failure_is_dropped_for_another_run_or_environment(self):
+        self.cache.put_verdict(self.key, FAILED, "run_a:deps1")
+        self.assertIsNone(self.cache.get_verdict(self.key, "run_b:deps1"))
+        self.assertIsNone(self.cache.get_verdict(self.key, "run_a:deps2"))
+        self.assertIsNone(self.cache.get_verdict(self.key))
+
+    def test_failure_without_scope_is_not_stored(self):
+        self.cache.put_verdict(self.key, FAILED)
+        self.assertEqual(os.listdir(self.cache.cache_dir), [])
+
+    def test_pass_is_shared_by_every_run(self):
+        self.cache.put_verdict(self.key, PASSED, "run_a:deps1")
+        self.assertTrue(self.cache.get_verdict(self.key, "run_b:deps2")["passed"])
+        self.assertTrue(self.cache.get_verdict(self.key)["passed"])
+
+
+class RunTestsVerdictTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.temp.name, "repo")
+        os.makedirs(self.repo)
+        with open(os.path.join(self.repo, "test_app.py"), 'w') as f:
+            f.write("def test_value():\n    assert 1 == 2\n")
+        for command in (["git", "init", "-q"], ["git", "add", "."],
+                        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"]):
+            subprocess.run(command, cwd=self.repo, check=True)
+
+        self.agent = TestAgent()
+        self.agent.cache = TestResultCache(os.path.join(self.temp.name, "cache"))
+        self.agent.install_deps = False
+        self.agent.workers = 1
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def run_tests(self, run_id):
+        return asyncio.run(self.agent.run_tests(self.repo, run_id=run_id))
+
+    def test_same_run_reuses_failure_other_run_reruns(self):
+        first = self.run_tests("run_a")
+        self.assertFalse(first["passed"])
+        self.assertNotIn("cached", first)
+
+        again = self.run_tests("run_a")
+        self.assertFalse(again["passed"])
+        self.assertTrue(again["cached"])
+
+        other = self.run_tests("run_b")
+        self.assertFalse(other["passed"])
+        self.assertNotIn("cached", other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+RIFT 2026 - Autonomous CI/CD Healing Agent
+Worker processes that execute queued runs outside the API process
+
+    python -m backend.worker --processes 4
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from typing import Dict
+
+from backend.agent.orchestrator import AgentOrchestrator
+from backend.agent.state_manager import StateManager
+from backend.agent.checkpoint import get_checkpoint_store
+from backend.agent.job_queue import get_job_queue
+from backend.agent.loop_monitor import get_loop_monitor
+from backend.agent.capabilities import get_capabilities
+from backend.agent.validator import get_fix_validator
+from backend.agent.metrics import get_metrics
+
+
+def snapshot(state_manager: StateManager, run_id: str) -> Dict:
+    """Run state as the API serves it, including timings only this process knows"""
+    state = state_manager.export_run(run_id)
+    # Once finalized, the run holds its timings and the registry has dropped them
+    timings = state["run"].get("timings") or get_metrics().run_summary(run_id)
+    state["run"] = {**state["run"], "timings": timings}
+    return state
+
+
+async def execute(job: Dict, worker_id: str):
+    """Run one job, publishing its state until it finishes"""
+    queue = get_job_queue()
+    run_id = job["run_id"]
+    sync_interval = float(os.getenv("WORKER_SYNC_INTERVAL", 1.0))
+
+    # A fresh state manager per job: the API keeps the run's history, not the worker
+    state_manager = StateManager()
+    checkpoint = get_checkpoint_store().load(run_id)
+    if checkpoint:
+        print(f"[RIFT] Worker {worker_id} resuming run {run_id} after '{checkpoint['phase']}'")
+        orchestrator = AgentOrchestrator.from_checkpoint(checkpoint, state_manager)
+    else:
+        orchestrator = AgentOrchestrator(
+            repo_url=job["repo_url"],
+            team_name=job["team_name"],
+            team_leader=job["team_leader"],
+            retry_limit=job["retry_limit"],
+            state_manager=state_manager,
+            run_id=run_id
+        )
+
+    async def sync():
+        while True:
+            await asyncio.sleep(sync_interval)
+            queue.publish(run_id, snapshot(state_manager, run_id))
+            queue.heartbeat(run_id, worker_id)
+
+    syncer = asyncio.create_task(sync())
+    error = None
+    try:
+        await orchestrator.run()
+    except asyncio.CancelledError:
+        # Shutting down: the checkpoint stays, so the next worker resumes the run
+        queue.publish(run_id, snapshot(state_manager, run_id))
+        queue.release(run_id, worker_id)
+        raise
+    except Exception as e:
+        error = str(e)
+        print(f"[RIFT] Worker {worker_id} error for {run_id}: {error}")
+        orchestrator._log(f"Fatal error: {error}", "error")
+        orchestrator._update_stage("ERROR", 0)
+    finally:
+        syncer.cancel()
+    queue.publish(run_id, snapshot(state_manager, run_id))
+    queue.finish(run_id, worker_id, error)
+
+
+async def work(worker_id: str, concurrency: int):
+    """Claim jobs while below `concurrency` running ones, until SIGTERM/SIGINT"""
+    queue = get_job_queue()
+    poll_interval = float(os.getenv("WORKER_POLL_INTERVAL", 1.0))
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+    get_loop_monitor().start()
+    probe = asyncio.create_task(get_capabilities().probe(), name="capabilities.probe")
+
+    running = set()
+    print(f"[RIFT] Worker {worker_id} waiting for jobs in {queue.path}")
+    while not stopping.is_set():
+        while len(running) < concurrency:
+            job = queue.claim(worker_id)
+            if job is None:
+                break
+            print(f"[RIFT] Worker {worker_id} picked up run {job['run_id']} (attempt {job['attempt']})")
+            task = asyncio.create_task(execute(job, worker_id), name=f"run {job['run_id'][:8]}")
+            running.add(task)
+            task.add_done_callback(running.discard)
+        try:
+            await asyncio.wait_for(stopping.wait(), poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    # Hand unfinished runs back to the queue and exit cleanly, so process
+    # pools started by the agents shut down with us
+    for task in list(running):
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
+    probe.cancel()
+    await get_loop_monitor().stop()
+    # A worker is itself a child process: at exit it waits for its own
+    # children, so the validator's pool has to be stopped first
+    get_fix_validator().shutdown()
+    print(f"[RIFT] Worker {worker_id} stopped")
+
+
+def worker_main(concurrency: int):
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    asyncio.run(work(worker_id, concurrency))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RIFT agent worker pool")
+    parser.add_argument("--processes", type=int,
+                        default=int(os.getenv("RIFT_WORKERS", 0)) or os.cpu_count() or 1,
+                        help="worker processes (default: RIFT_WORKERS or the CPU count)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", 1)),
+                        help="runs each worker executes at once")
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    workers = [None] * args.processes
+
+    def shutdown(signum, frame):
+        for process in workers:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in workers:
+            if process is not None:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.kill()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Restart workers that die; their jobs are picked up again once the lease expires
+    while True:
+        for i, process in enumerate(workers):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                print(f"[RIFT] Worker process {process.pid} exited with {process.exitcode}, restarting")
+            # Not daemonic: workers start their own process pools (the validator)
+            workers[i] = context.Process(target=worker_main, args=(args.concurrency,))
+            workers[i].start()
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
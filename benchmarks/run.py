@@ -0,0 +1,168 @@
+"""
+Benchmarks - Runs AgentOrchestrator end to end on synthetic repositories
+
+    python -m benchmarks.run                      # every scenario, compared to baselines
+    python -m benchmarks.run --scenario small     # one scenario
+    python -m benchmarks.run --update-baselines   # record current numbers as baselines
+
+Each scenario runs in its own process so peak RSS is per scenario. The
+model is the offline stub provider and the remote is a local bare repo,
+so no network access or API key is needed.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+from .synthetic import generate_repository, make_bare_remote
+
+
+SCENARIOS = {
+    "small": {"files": 20, "js_ratio": 0.3, "lint_failures": 5, "test_failures": 1},
+    "medium": {"files": 200, "js_ratio": 0.3, "lint_failures": 25, "test_failures": 2},
+    "large": {"files": 1000, "js_ratio": 0.3, "lint_failures": 60, "test_failures": 3},
+}
+STAGES = ("clone", "scan", "fix", "commit", "test")
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Environment for the agent: offline model, fresh caches per scenario
+BENCH_ENV = {
+    "LLM_PROVIDER": "stub",
+    "LLM_STUB_LATENCY": "0.05",
+    "LLM_STUB_JITTER": "0.02",
+    "LLM_REQUESTS_PER_MINUTE": "6000",
+    "TEST_INSTALL_DEPS": "false",
+    "RIFT_RESUME_RUNS": "false",
+}
+
+
+def run_scenario(name: str, retry_limit: int = 2) -> Dict:
+    """Generate the scenario's repo and run the orchestrator on it (in this process)"""
+    work_dir = tempfile.mkdtemp(prefix=f"rift_bench_{name}_")
+    os.environ.update(BENCH_ENV)
+    os.environ["RIFT_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["RIFT_CHECKPOINT_DIR"] = os.path.join(work_dir, "checkpoints")
+
+    # Imported after the environment is set: agents read it at construction
+    import asyncio
+    from backend.agent.orchestrator import AgentOrchestrator
+    from backend.agent.state_manager import StateManager
+
+    repo = generate_repository(os.path.join(work_dir, "source"), **SCENARIOS[name])
+    remote = make_bare_remote(repo["path"], os.path.join(work_dir, "remote.git"))
+
+    state_manager = StateManager()
+    orchestrator = AgentOrchestrator(remote, "BENCH", name, retry_limit, state_manager)
+    started = time.time()
+    asyncio.run(orchestrator.run())
+    wall = time.time() - started
+
+    results = state_manager.get_complete_results(orchestrator.run_id)
+    stages = results["timings"]["stages"]
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    shutil.rmtree(orchestrator.workspace_dir, ignore_errors=True)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "scenario": name,
+        "repo": {k: v for k, v in repo.items() if k != "path"},
+        "final_status": results["final_status"],
+        "iterations": len((results.get("progress") or {}).get("iterations", [])),
+        "fixes": len(results["fixes"]),
+        "total": round(wall, 3),
+        **{stage: stages.get(stage, {}).get("total", 0.0) for stage in STAGES},
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(self_usage.ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(child_usage.ru_maxrss / 1024, 1)
+    }
+
+
+def run_isolated(name: str) -> Dict:
+    """Run one scenario in a child process and return its result"""
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--scenario", name, "--child"],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(result: Dict, baseline: Optional[Dict], tolerance: float) -> List[str]:
+    """Metrics that regressed past `tolerance` (a fraction) over the baseline"""
+    if not baseline:
+        return []
+    regressions = []
+    for metric in ("total", *STAGES, "peak_rss_mb"):
+        allowed = baseline.get(metric)
+        if allowed is None:
+            continue
+        # Sub-second stages jitter a lot; give them an absolute floor
+        limit = max(allowed * (1 + tolerance), allowed + 0.5)
+        if result.get(metric, 0) > limit:
+            regressions.append(f"{metric}: {result[metric]} > {limit:.2f} (baseline {allowed})")
+    return regressions
+
+
+def load_baselines() -> Dict:
+    try:
+        with open(BASELINES_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"tolerance": 0.5, "scenarios": {}}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="RIFT agent benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--update-baselines", action="store_true",
+                        help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, help="allowed slowdown as a fraction")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_scenario(args.scenario[0])))
+        return 0
+
+    baselines = load_baselines()
+    tolerance = args.tolerance if args.tolerance is not None else baselines.get("tolerance", 0.5)
+    failed = False
+    for name in args.scenario or list(SCENARIOS):
+        result = run_isolated(name)
+        regressions = compare(result, baselines["scenarios"].get(name), tolerance)
+        status = "FAIL" if regressions else "ok"
+        print(
+            f"{name:<8} {status:<4} total={result['total']:.2f}s "
+            + " ".join(f"{stage}={result[stage]:.2f}s" for stage in STAGES)
+            + f" rss={result['peak_rss_mb']}MB children={result['peak_child_rss_mb']}MB"
+            + f" fixes={result['fixes']} status={result['final_status']}"
+        )
+        for regression in regressions:
+            print(f"    regression: {regression}")
+        failed = failed or bool(regressions)
+        if args.update_baselines:
+            baselines["scenarios"][name] = {
+                metric: result[metric] for metric in ("total", *STAGES, "peak_rss_mb")
+            }
+
+    if args.update_baselines:
+        baselines["tolerance"] = tolerance
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {BASELINES_PATH}")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
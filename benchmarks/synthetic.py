@@ -0,0 +1,110 @@
+"""
+Synthetic Repositories - Generates git repos with injected lint and test failures
+"""
+import os
+import random
+import subprocess
+from typing import Dict
+
+
+PY_MODULE = '''import json
+
+
+def compute_{index}(values):
+    total = 0
+    for value in values:
+        total += value * {factor}
+    return total
+
+
+def describe_{index}(values):
+    return json.dumps({{"count": len(values), "total": compute_{index}(values)}})
+'''
+
+JS_MODULE = '''const factor = {factor};
+
+function compute{index}(values) {{
+  let total = 0;
+  for (const value of values) {{
+    total += value * factor;
+  }}
+  return total;
+}}
+
+module.exports = {{ compute{index} }};
+'''
+
+PY_TEST = '''from pkg.module_{index} import compute_{index}
+
+
+def test_compute_{index}():
+    assert compute_{index}([1, 2, 3]) == {expected}
+'''
+
+
+def generate_repository(path: str, files: int = 50, js_ratio: float = 0.3,
+                        lint_failures: int = 10, test_failures: int = 1,
+                        tests_per_module: float = 0.5, seed: int = 0) -> Dict:
+    """
+    Create a committed git repository at `path` with `files` source modules
+    (a `js_ratio` share of them JavaScript), pytest tests for a share of the
+    Python modules, `lint_failures` modules with trailing whitespace and
+    `test_failures` tests asserting the wrong result.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(path, "pkg"), exist_ok=True)
+    os.makedirs(os.path.join(path, "web"), exist_ok=True)
+    os.makedirs(os.path.join(path, "tests"), exist_ok=True)
+    _write(path, "pkg/__init__.py", "")
+    _write(path, "pytest.ini", "[pytest]\ntestpaths = tests\n")
+
+    js_count = int(files * js_ratio)
+    python_modules = []
+    for index in range(files):
+        factor = rng.randint(1, 9)
+        if index < js_count:
+            _write(path, f"web/module{index}.js", JS_MODULE.format(index=index, factor=factor))
+        else:
+            _write(path, f"pkg/module_{index}.py", PY_MODULE.format(index=index, factor=factor))
+            python_modules.append((index, factor))
+
+    linted = rng.sample(python_modules, min(lint_failures, len(python_modules)))
+    for index, _ in linted:
+        module = os.path.join(path, f"pkg/module_{index}.py")
+        with open(module, 'r') as f:
+            lines = f.read().splitlines()
+        lines[5] += "   "
+        _write(path, f"pkg/module_{index}.py", "\n".join(lines) + "\n")
+
+    tested = python_modules[:max(1, int(len(python_modules) * tests_per_module))] if python_modules else []
+    failing = set(index for index, _ in rng.sample(tested, min(test_failures, len(tested))))
+    for index, factor in tested:
+        expected = 6 * factor + (1 if index in failing else 0)
+        _write(path, f"tests/test_module_{index}.py", PY_TEST.format(index=index, expected=expected))
+
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "add", ".")
+    _git(path, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "Initial commit")
+    return {
+        "path": path,
+        "python_modules": len(python_modules),
+        "js_modules": js_count,
+        "tests": len(tested),
+        "lint_failures": len(linted),
+        "test_failures": len(failing)
+    }
+
+
+def make_bare_remote(source: str, remote: str) -> str:
+    """Bare clone of `source` the agent can clone from and push to"""
+    _git(os.path.dirname(remote) or ".", "clone", "-q", "--bare", source, remote)
+    return remote
+
+
+def _write(root: str, relative: str, content: str):
+    with open(os.path.join(root, relative), 'w') as f:
+        f.write(content)
+
+
+def _git(cwd: str, *args: str):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
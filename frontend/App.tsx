@@ -17,6 +17,34 @@ import { PlayIcon, StopIcon, CpuIcon, GitBranchIcon } from './components/Icons';
 // API Configuration
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+// Log lines fetched per request while catching up with a run
+const LOG_PAGE_SIZE = 500;
+
+// Merge polled records into the current list by ID. Unchanged records keep
+// their object (so their rows skip re-rendering) and the current array is
+// returned as-is when nothing changed, which skips the render entirely.
+function mergeById<T extends { id: string | number }>(current: T[], incoming: T[]): T[] {
+  const positions = new Map(current.map((record, index) => [record.id, index]));
+  let merged: T[] | null = null;
+  for (const record of incoming) {
+    const position = positions.get(record.id);
+    if (position === undefined) {
+      merged = merged ?? current.slice();
+      positions.set(record.id, merged.length);
+      merged.push(record);
+    } else if (!shallowEqual(current[position], record)) {
+      merged = merged ?? current.slice();
+      merged[position] = record;
+    }
+  }
+  return merged ?? current;
+}
+
+function shallowEqual<T extends object>(a: T, b: T): boolean {
+  const keys = Object.keys(a) as (keyof T)[];
+  return keys.length === Object.keys(b).length && keys.every(key => a[key] === b[key]);
+}
+
 function App() {
   const [repoUrl, setRepoUrl] = useState('');
   const [teamName, setTeamName] = useState('TEAM AMD');
@@ -39,6 +67,12 @@ function App() {
   
   const uptimeRef = useRef<ReturnType<typeof setInterval> | null>(null);
   const pollIntervalRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  // Sequence number of the last log line received; polls ask only for newer ones
+  const lastLogSeqRef = useRef(-1);
+  // Bumped by the server when a run resumes from a checkpoint and its log restarts
+  const logEpochRef = useRef(0);
+  // ETag of the last complete snapshot; unchanged runs answer it with a 304
+  const snapshotEtagRef = useRef<string | null>(null);
 
   // API Functions
   const startAgent = async () => {
@@ -77,100 +111,92 @@ function App() {
     }
   };
 
-  const fetchStatus = async (id: string) => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/status/${id}`);
-      if (!response.ok) {
-        console.warn(`Status fetch failed for ${id}: ${response.status}`);
-        return;
-      }
-      
-      const data = await response.json();
-      
-      // Check if run was not found (backend restarted)
-      if (data.status === 'not_found') {
-        console.warn('Run not found, keeping existing data');
-        // Don't reset - keep showing last known data
-        return;
-      }
-      
-      // Only update if we have valid data
-      if (data.stage) {
-        setStage(data.stage as AgentStage);
-        
-        // Stop polling if agent completed or failed
-        if (data.stage === 'COMPLETED' || data.stage === 'FAILED' || data.stage === 'ERROR') {
-          console.log('Agent finished, stopping polling');
-          setIsRunning(false);
-          stopPolling();
-        }
-      }
-      if (data.stats) {
-        setStats(prev => ({
-          ...prev,
-          ...data.stats,
-          activeRepo: prev.activeRepo || data.stats.activeRepo
-        }));
-      }
-    } catch (err) {
-      console.error('Error fetching status:', err);
-    }
-  };
-
-  const fetchLogs = async (id: string) => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/logs/${id}`);
-      if (!response.ok) return;
+  const applyStatus = (data: any) => {
+    // Only update if we have valid data
+    if (data.stage) {
+      setStage(data.stage as AgentStage);
       
-      const data = await response.json();
-      // Only update if we have logs
-      if (data.logs && data.logs.length > 0) {
-        setLogs(data.logs);
+      // Stop polling if agent completed or failed
+      if (data.stage === 'COMPLETED' || data.stage === 'FAILED' || data.stage === 'ERROR') {
+        console.log('Agent finished, stopping polling');
+        setIsRunning(false);
+        stopPolling();
       }
-    } catch (err) {
-      console.error('Error fetching logs:', err);
     }
-  };
-
-  const fetchFixes = async (id: string) => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/fixes/${id}`);
-      if (!response.ok) return;
-      
-      const data = await response.json();
-      // Only update if we have fixes
-      if (data.fixes && data.fixes.length > 0) {
-        setFixes(data.fixes);
-      }
-    } catch (err) {
-      console.error('Error fetching fixes:', err);
+    if (data.stats) {
+      setStats(prev => ({
+        ...prev,
+        ...data.stats,
+        activeRepo: prev.activeRepo || data.stats.activeRepo
+      }));
     }
   };
 
-  const fetchCicdRuns = async (id: string) => {
+  const fetchSnapshot = async (id: string) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/cicd-runs/${id}`);
-      if (!response.ok) return;
-      
-      const data = await response.json();
-      // Only update if we have CI/CD runs
-      if (data.cicd_runs && data.cicd_runs.length > 0) {
-        setCicdRuns(data.cicd_runs);
+      // One request for status, new log lines, fixes and CI/CD runs. While
+      // nothing changes the server answers our ETag with an empty 304.
+      // After a full page of logs, fetch again (unconditionally) for the rest.
+      for (let page = 0; page < 10; page++) {
+        const headers: Record<string, string> = {};
+        if (snapshotEtagRef.current) headers['If-None-Match'] = snapshotEtagRef.current;
+        const response = await fetch(
+          `${API_BASE_URL}/api/runs/${id}/snapshot?after=${lastLogSeqRef.current}&limit=${LOG_PAGE_SIZE}`,
+          { headers, cache: 'no-store' }
+        );
+        if (response.status === 304) return;
+        if (!response.ok) {
+          // Run not found (backend restarted): keep showing last known data
+          console.warn(`Snapshot fetch failed for ${id}: ${response.status}`);
+          return;
+        }
+        
+        const data = await response.json();
+        if ((data.status?.log_epoch ?? 0) !== logEpochRef.current) {
+          // Resumed run: sequence numbers were reused, so re-read the log from the start
+          logEpochRef.current = data.status?.log_epoch ?? 0;
+          lastLogSeqRef.current = -1;
+          snapshotEtagRef.current = null;
+          setLogs([]);
+          continue;
+        }
+        const newLogs: TimelineEvent[] = data.logs || [];
+        const morePages = newLogs.length === LOG_PAGE_SIZE;
+        snapshotEtagRef.current = morePages ? null : response.headers.get('ETag');
+        
+        applyStatus(data.status);
+        if (newLogs.length > 0) {
+          lastLogSeqRef.current = newLogs[newLogs.length - 1].seq;
+          setLogs(prev => {
+            const lastSeq = prev.length > 0 ? prev[prev.length - 1].seq : -1;
+            const fresh = newLogs.filter(log => log.seq > lastSeq);
+            return fresh.length > 0 ? prev.concat(fresh) : prev;
+          });
+        }
+        if (data.fixes && data.fixes.length > 0) {
+          setFixes(prev => mergeById(prev, data.fixes));
+        }
+        if (data.cicd_runs && data.cicd_runs.length > 0) {
+          setCicdRuns(prev => mergeById(prev, data.cicd_runs));
+        }
+        if (!morePages) return;
       }
     } catch (err) {
-      console.error('Error fetching CI/CD runs:', err);
+      console.error('Error fetching run snapshot:', err);
     }
   };
 
   const startPolling = (id: string) => {
-    // Poll every 2 seconds
+    // Poll every 2 seconds, skipping a tick while the previous poll is still running
+    let polling = false;
     pollIntervalRef.current = setInterval(async () => {
-      await Promise.all([
-        fetchStatus(id),
-        fetchLogs(id),
-        fetchFixes(id),
-        fetchCicdRuns(id)
-      ]);
+      if (polling) return;
+      polling = true;
+      try {
+        await fetchSnapshot(id);
+      } finally {
+        polling = false;
+      }
     }, 2000);
   };
 
@@ -219,6 +245,9 @@ function App() {
 
   const handleStart = () => {
     setLogs([]);
+    lastLogSeqRef.current = -1;
+    logEpochRef.current = 0;
+    snapshotEtagRef.current = null;
     setStats({ totalBugs: 0, fixedBugs: 0, failedFixes: 0, activeRepo: repoUrl, uptime: 0 });
     setFixes([]);
     setCicdRuns([]);
@@ -1,6 +1,8 @@
-import React, { useState } from 'react';
+import React, { memo, useMemo, useState } from 'react';
+import { flushSync } from 'react-dom';
 import { FixRecord, FixStatus, BugType } from '../types';
 import { CheckCircleIcon, XCircleIcon, ActivityIcon, ShieldIcon, DownloadIcon, FilterIcon, PdfIcon } from './Icons';
+import { useVirtualList } from './useVirtualList';
 import html2canvas from 'html2canvas';
 import { jsPDF } from 'jspdf';
 
@@ -8,29 +10,70 @@ interface FixTableProps {
   fixes: FixRecord[];
 }
 
+const getBugTypeStyle = (type: BugType) => {
+  switch (type) {
+    case BugType.SECURITY: return 'bg-red-100 text-red-700 border-red-200';
+    case BugType.SYNTAX: return 'bg-orange-100 text-orange-700 border-orange-200';
+    case BugType.LINTING: return 'bg-blue-100 text-blue-700 border-blue-200';
+    case BugType.PERFORMANCE: return 'bg-purple-100 text-purple-700 border-purple-200';
+    default: return 'bg-slate-100 text-slate-700 border-slate-200';
+  }
+};
+
+const getStatusIcon = (status: FixStatus) => {
+  switch (status) {
+    case FixStatus.FIXED: return <CheckCircleIcon className="w-4 h-4 text-emerald-500" />;
+    case FixStatus.FAILED: return <XCircleIcon className="w-4 h-4 text-red-500" />;
+    case FixStatus.IN_PROGRESS: return <ActivityIcon className="w-4 h-4 text-blue-500 animate-spin" />;
+    default: return <div className="w-4 h-4 rounded-full border-2 border-slate-300" />;
+  }
+};
+
+interface FixRowProps {
+  fix: FixRecord;
+  measureRef: (element: HTMLElement | null) => void;
+}
+
+// App keeps the same object for an unchanged fix, so only changed rows re-render
+const FixRow = memo(({ fix, measureRef }: FixRowProps) => (
+  <tr ref={measureRef} data-key={fix.id} className="hover:bg-slate-50/50 transition-colors">
+    <td className="px-6 py-3 whitespace-nowrap">
+      <div className="flex items-center gap-2">
+        {getStatusIcon(fix.status)}
+        <span className={`text-xs font-bold ${
+          fix.status === FixStatus.FIXED ? 'text-emerald-700' : 
+          fix.status === FixStatus.FAILED ? 'text-red-700' : 'text-slate-600'
+        }`}>
+          {fix.status}
+        </span>
+      </div>
+    </td>
+    <td className="px-6 py-3 font-mono text-xs text-slate-600 whitespace-nowrap">
+      {fix.file} <span className="text-slate-400">:{fix.line}</span>
+    </td>
+    <td className="px-6 py-3 whitespace-nowrap">
+      <span className={`px-2 py-0.5 rounded border text-[10px] font-bold uppercase tracking-wider ${getBugTypeStyle(fix.bugType)}`}>
+        {fix.bugType}
+      </span>
+    </td>
+    <td className="px-6 py-3 min-w-[200px]">
+      <p className="text-slate-800 font-medium truncate max-w-[200px]" title={fix.commitMessage}>
+        {fix.commitMessage}
+      </p>
+      <p className="text-slate-400 text-xs truncate max-w-[200px]" title={fix.description}>
+        {fix.description}
+      </p>
+    </td>
+    <td className="px-6 py-3 text-slate-400 text-xs whitespace-nowrap">
+      {new Date(fix.timestamp).toLocaleTimeString()}
+    </td>
+  </tr>
+));
+
 export const FixTable: React.FC<FixTableProps> = ({ fixes }) => {
   const [activeFilter, setActiveFilter] = useState<BugType | 'ALL'>('ALL');
   const [isExporting, setIsExporting] = useState(false);
 
-  const getBugTypeStyle = (type: BugType) => {
-    switch (type) {
-      case BugType.SECURITY: return 'bg-red-100 text-red-700 border-red-200';
-      case BugType.SYNTAX: return 'bg-orange-100 text-orange-700 border-orange-200';
-      case BugType.LINTING: return 'bg-blue-100 text-blue-700 border-blue-200';
-      case BugType.PERFORMANCE: return 'bg-purple-100 text-purple-700 border-purple-200';
-      default: return 'bg-slate-100 text-slate-700 border-slate-200';
-    }
-  };
-
-  const getStatusIcon = (status: FixStatus) => {
-    switch (status) {
-      case FixStatus.FIXED: return <CheckCircleIcon className="w-4 h-4 text-emerald-500" />;
-      case FixStatus.FAILED: return <XCircleIcon className="w-4 h-4 text-red-500" />;
-      case FixStatus.IN_PROGRESS: return <ActivityIcon className="w-4 h-4 text-blue-500 animate-spin" />;
-      default: return <div className="w-4 h-4 rounded-full border-2 border-slate-300" />;
-    }
-  };
-
   const downloadCSV = () => {
     const headers = ['ID', 'Timestamp', 'Status', 'File', 'Line', 'Bug Type', 'Description', 'Commit Message'];
     const rows = fixes.map(fix => [
@@ -64,7 +107,8 @@ export const FixTable: React.FC<FixTableProps> = ({ fixes }) => {
     const tableElement = document.getElementById('fixes-table');
     if (!tableElement) return;
 
-    setIsExporting(true);
+    // Render every row (not just the visible window) before cloning the table
+    flushSync(() => setIsExporting(true));
 
     try {
       // Create a specific container for export off-screen
@@ -181,9 +225,17 @@ export const FixTable: React.FC<FixTableProps> = ({ fixes }) => {
     }
   };
 
-  const filteredFixes = activeFilter === 'ALL' 
-    ? fixes 
-    : fixes.filter(fix => fix.bugType === activeFilter);
+  const filteredFixes = useMemo(
+    () => activeFilter === 'ALL' ? fixes : fixes.filter(fix => fix.bugType === activeFilter),
+    [fixes, activeFilter]
+  );
+
+  const { scrollRef, items, measureElement, paddingTop, paddingBottom } = useVirtualList<HTMLDivElement>({
+    count: filteredFixes.length,
+    getKey: (index) => filteredFixes[index].id,
+    estimateSize: 61,
+    disabled: isExporting
+  });
 
   return (
     <div className="bg-white rounded-xl shadow-sm border border-slate-100 overflow-hidden flex flex-col h-full">
@@ -244,7 +296,7 @@ export const FixTable: React.FC<FixTableProps> = ({ fixes }) => {
       </div>
 
       {/* Scrollable Table Body */}
-      <div className="overflow-auto custom-scrollbar flex-1">
+      <div ref={scrollRef} className="overflow-auto custom-scrollbar flex-1">
         <table id="fixes-table" className="w-full text-left text-sm relative bg-white">
           <thead className="bg-slate-50 sticky top-0 z-10 shadow-sm">
             <tr>
@@ -265,40 +317,13 @@ export const FixTable: React.FC<FixTableProps> = ({ fixes }) => {
                 </td>
               </tr>
             ) : (
-              filteredFixes.map((fix) => (
-                <tr key={fix.id} className="hover:bg-slate-50/50 transition-colors">
-                  <td className="px-6 py-3 whitespace-nowrap">
-                    <div className="flex items-center gap-2">
-                      {getStatusIcon(fix.status)}
-                      <span className={`text-xs font-bold ${
-                        fix.status === FixStatus.FIXED ? 'text-emerald-700' : 
-                        fix.status === FixStatus.FAILED ? 'text-red-700' : 'text-slate-600'
-                      }`}>
-                        {fix.status}
-                      </span>
-                    </div>
-                  </td>
-                  <td className="px-6 py-3 font-mono text-xs text-slate-600 whitespace-nowrap">
-                    {fix.file} <span className="text-slate-400">:{fix.line}</span>
-                  </td>
-                  <td className="px-6 py-3 whitespace-nowrap">
-                    <span className={`px-2 py-0.5 rounded border text-[10px] font-bold uppercase tracking-wider ${getBugTypeStyle(fix.bugType)}`}>
-                      {fix.bugType}
-                    </span>
-                  </td>
-                  <td className="px-6 py-3 min-w-[200px]">
-                    <p className="text-slate-800 font-medium truncate max-w-[200px]" title={fix.commitMessage}>
-                      {fix.commitMessage}
-                    </p>
-                    <p className="text-slate-400 text-xs truncate max-w-[200px]" title={fix.description}>
-                      {fix.description}
-                    </p>
-                  </td>
-                  <td className="px-6 py-3 text-slate-400 text-xs whitespace-nowrap">
-                    {new Date(fix.timestamp).toLocaleTimeString()}
-                  </td>
-                </tr>
-              ))
+              <>
+                {paddingTop > 0 && <tr aria-hidden="true" style={{ height: paddingTop }} />}
+                {items.map(({ index }) => (
+                  <FixRow key={filteredFixes[index].id} fix={filteredFixes[index]} measureRef={measureElement} />
+                ))}
+                {paddingBottom > 0 && <tr aria-hidden="true" style={{ height: paddingBottom }} />}
+              </>
             )}
           </tbody>
         </table>
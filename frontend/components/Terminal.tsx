@@ -1,19 +1,58 @@
-import React, { useEffect, useRef } from 'react';
+import React, { memo, useLayoutEffect, useRef } from 'react';
 import { TimelineEvent } from '../types';
 import { TerminalIcon } from './Icons';
+import { useVirtualList } from './useVirtualList';
 
 interface TerminalProps {
   logs: TimelineEvent[];
 }
 
+interface LogLineProps {
+  log: TimelineEvent;
+  measureRef: (element: HTMLElement | null) => void;
+}
+
+// Lines are immutable, so a line already on screen never re-renders
+const LogLine = memo(({ log, measureRef }: LogLineProps) => (
+  <div ref={measureRef} data-key={log.id} className="pb-1.5 flex items-start opacity-90 hover:opacity-100 transition-opacity">
+    <span className="text-slate-500 mr-3 text-xs pt-0.5 select-none">
+      [{new Date(log.timestamp).toLocaleTimeString([], { hour12: false, hour: '2-digit', minute:'2-digit', second:'2-digit' })}]
+    </span>
+    <span className={`break-all ${
+      log.type === 'error' ? 'text-red-400' :
+      log.type === 'success' ? 'text-emerald-400' :
+      log.type === 'warning' ? 'text-yellow-400' :
+      log.type === 'command' ? 'text-blue-400 font-bold' :
+      'text-slate-300'
+    }`}>
+      {log.type === 'command' && <span className="text-slate-500 mr-2">$</span>}
+      {log.message}
+    </span>
+  </div>
+));
+
 export const Terminal: React.FC<TerminalProps> = ({ logs }) => {
-  const containerRef = useRef<HTMLDivElement>(null);
+  const { scrollRef, items, measureElement, paddingTop, paddingBottom } = useVirtualList<HTMLDivElement>({
+    count: logs.length,
+    getKey: (index) => logs[index].id,
+    estimateSize: 26
+  });
+  const followOutput = useRef(true);
+
+  // Keep following new lines unless the user scrolled up to read
+  useLayoutEffect(() => {
+    const container = scrollRef.current;
+    if (container && followOutput.current) {
+      container.scrollTop = container.scrollHeight;
+    }
+  }, [logs.length, paddingBottom]);
 
-  useEffect(() => {
-    if (containerRef.current) {
-      containerRef.current.scrollTop = containerRef.current.scrollHeight;
+  const handleScroll = () => {
+    const container = scrollRef.current;
+    if (container) {
+      followOutput.current = container.scrollHeight - container.scrollTop - container.clientHeight < 32;
     }
-  }, [logs]);
+  };
 
   return (
     <div className="bg-slate-900 rounded-xl overflow-hidden shadow-lg flex flex-col h-[400px]">
@@ -29,29 +68,18 @@ export const Terminal: React.FC<TerminalProps> = ({ logs }) => {
         </div>
       </div>
       <div 
-        ref={containerRef}
+        ref={scrollRef}
+        onScroll={handleScroll}
         className="flex-1 p-4 overflow-y-auto font-mono text-sm custom-scrollbar bg-[#0f172a]"
       >
         {logs.length === 0 && (
           <div className="text-slate-500 italic">Waiting for agent to start...</div>
         )}
-        {logs.map((log) => (
-          <div key={log.id} className="mb-1.5 flex items-start opacity-90 hover:opacity-100 transition-opacity">
-            <span className="text-slate-500 mr-3 text-xs pt-0.5 select-none">
-              [{new Date(log.timestamp).toLocaleTimeString([], { hour12: false, hour: '2-digit', minute:'2-digit', second:'2-digit' })}]
-            </span>
-            <span className={`break-all ${
-              log.type === 'error' ? 'text-red-400' :
-              log.type === 'success' ? 'text-emerald-400' :
-              log.type === 'warning' ? 'text-yellow-400' :
-              log.type === 'command' ? 'text-blue-400 font-bold' :
-              'text-slate-300'
-            }`}>
-              {log.type === 'command' && <span className="text-slate-500 mr-2">$</span>}
-              {log.message}
-            </span>
-          </div>
+        <div style={{ height: paddingTop }} />
+        {items.map(({ index }) => (
+          <LogLine key={logs[index].id} log={logs[index]} measureRef={measureElement} />
         ))}
+        <div style={{ height: paddingBottom }} />
       </div>
     </div>
   );
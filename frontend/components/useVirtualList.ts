@@ -0,0 +1,102 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+
+interface VirtualListOptions {
+  count: number;
+  getKey: (index: number) => string;
+  estimateSize: number;
+  overscan?: number;
+  disabled?: boolean;
+}
+
+export interface VirtualItem {
+  index: number;
+  key: string;
+}
+
+/**
+ * Windowed rendering for long scrollable lists. Only the rows inside the
+ * viewport (plus `overscan` on each side) are rendered; spacers of
+ * `paddingTop` / `paddingBottom` pixels stand in for the rest. Row heights
+ * start at `estimateSize` and are corrected as rows are measured, so rows
+ * may wrap; each row element needs `data-key` set to its key and
+ * `measureElement` as its ref. With `disabled`, every row is rendered
+ * (e.g. for export).
+ */
+export function useVirtualList<T extends HTMLElement>({
+  count,
+  getKey,
+  estimateSize,
+  overscan = 10,
+  disabled = false
+}: VirtualListOptions) {
+  const scrollRef = useRef<T>(null);
+  const sizes = useRef(new Map<string, number>());
+  const [scrollTop, setScrollTop] = useState(0);
+  const [viewportHeight, setViewportHeight] = useState(0);
+  const [, setLayoutVersion] = useState(0);
+
+  useEffect(() => {
+    const element = scrollRef.current;
+    if (!element) return;
+    const onScroll = () => setScrollTop(element.scrollTop);
+    const observer = new ResizeObserver(() => setViewportHeight(element.clientHeight));
+    element.addEventListener('scroll', onScroll, { passive: true });
+    observer.observe(element);
+    setViewportHeight(element.clientHeight);
+    return () => {
+      element.removeEventListener('scroll', onScroll);
+      observer.disconnect();
+    };
+  }, []);
+
+  // Row offsets are plain arithmetic; only the visible rows reach the DOM
+  const offsets = new Float64Array(count + 1);
+  for (let i = 0; i < count; i++) {
+    offsets[i + 1] = offsets[i] + (sizes.current.get(getKey(i)) ?? estimateSize);
+  }
+  const totalSize = offsets[count];
+
+  let start = 0;
+  let end = count;
+  if (!disabled) {
+    // First row whose bottom edge is below the top of the viewport
+    let low = 0;
+    let high = count;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (offsets[mid + 1] <= scrollTop) low = mid + 1;
+      else high = mid;
+    }
+    start = Math.max(low - overscan, 0);
+    end = low;
+    const bottom = scrollTop + (viewportHeight || estimateSize * 20);
+    while (end < count && offsets[end] < bottom) end++;
+    end = Math.min(end + overscan, count);
+  }
+
+  const items: VirtualItem[] = [];
+  for (let index = start; index < end; index++) {
+    items.push({ index, key: getKey(index) });
+  }
+
+  // Ref callback for rendered rows; a changed height triggers one re-layout
+  const measureElement = useCallback((element: HTMLElement | null) => {
+    if (!element) return;
+    const key = element.dataset.key;
+    if (key === undefined) return;
+    const height = element.getBoundingClientRect().height;
+    if (height > 0 && sizes.current.get(key) !== height) {
+      sizes.current.set(key, height);
+      setLayoutVersion(version => version + 1);
+    }
+  }, []);
+
+  return {
+    scrollRef,
+    items,
+    measureElement,
+    totalSize,
+    paddingTop: offsets[start],
+    paddingBottom: totalSize - offsets[end]
+  };
+}
@@ -32,6 +32,7 @@ export interface FixRecord {
 
 export interface TimelineEvent {
   id: string;
+  seq: number;
   timestamp: string;
   message: string;
   type: 'info' | 'success' | 'error' | 'warning' | 'command';